@@ -0,0 +1,154 @@
+"""
+HopJetAir Airport Resolver
+Resolves free-text airport input ("ORD", "KORD", "Chicago", "heathrow")
+against an in-memory snapshot of the airports table
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import select, func
+from .database_models import Airport, Route
+from .reference_cache import ReferenceCache
+
+# Match quality, best first
+EXACT_CITY, EXACT_NAME, CITY_PREFIX, NAME_PREFIX = range(4)
+
+
+class AirportRecord(NamedTuple):
+    id: int
+    iata_code: str
+    icao_code: Optional[str]
+    name: str
+    city: str
+    country: str
+    timezone: Optional[str]
+    latitude: Optional[float]
+    longitude: Optional[float]
+    route_count: int
+
+
+def normalize(text) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace"""
+    text = unicodedata.normalize("NFKD", str(text))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+class AirportResolver(ReferenceCache):
+    """
+    Exact IATA/ICAO maps plus a sorted prefix index over normalized city and
+    airport names. Ambiguous matches are ranked by match quality, then by the
+    number of routes served (so "London" gives LHR before LGW), then by code.
+    """
+
+    name = "airports"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._by_id: Dict[int, AirportRecord] = {}
+        self._by_iata: Dict[str, AirportRecord] = {}
+        self._by_icao: Dict[str, AirportRecord] = {}
+        self._keys: List[str] = []
+        self._entries: List[Tuple[int, AirportRecord]] = []
+
+    async def _load(self, db) -> None:
+        route_counts = dict(
+            (await db.execute(
+                select(Route.origin_airport_id, func.count(Route.id)).group_by(Route.origin_airport_id)
+            )).all()
+        )
+        rows = (await db.execute(select(
+            Airport.id, Airport.iata_code, Airport.icao_code, Airport.name, Airport.city,
+            Airport.country, Airport.timezone, Airport.latitude, Airport.longitude
+        ))).all()
+
+        by_id, by_iata, by_icao = {}, {}, {}
+        index = []
+        for row in rows:
+            record = AirportRecord(
+                id=row.id,
+                iata_code=row.iata_code,
+                icao_code=row.icao_code,
+                name=row.name,
+                city=row.city,
+                country=row.country,
+                timezone=row.timezone,
+                latitude=float(row.latitude) if row.latitude is not None else None,
+                longitude=float(row.longitude) if row.longitude is not None else None,
+                route_count=route_counts.get(row.id, 0)
+            )
+            by_id[record.id] = record
+            by_iata[record.iata_code.upper()] = record
+            if record.icao_code:
+                by_icao[record.icao_code.upper()] = record
+
+            city, name = normalize(record.city), normalize(record.name)
+            index.append((city, CITY_PREFIX, record))
+            index.append((name, NAME_PREFIX, record))
+            # Later words too, so "york" finds New York and "heathrow" finds London Heathrow
+            for token in city.split()[1:]:
+                index.append((token, CITY_PREFIX, record))
+            for token in name.split()[1:]:
+                if len(token) >= 3:
+                    index.append((token, NAME_PREFIX, record))
+
+        index.sort(key=lambda entry: entry[0])
+        # Swap in the new snapshot
+        self._by_id, self._by_iata, self._by_icao = by_id, by_iata, by_icao
+        self._keys = [entry[0] for entry in index]
+        self._entries = [(entry[1], entry[2]) for entry in index]
+
+    def get(self, airport_id: int) -> Optional[AirportRecord]:
+        return self._by_id.get(airport_id)
+
+    def by_code(self, code: str) -> Optional[AirportRecord]:
+        """Exact IATA or ICAO lookup"""
+        if not code:
+            return None
+        code = code.strip().upper()
+        return self._by_iata.get(code) or self._by_icao.get(code)
+
+    def _prefix_matches(self, query: str) -> Dict[int, Tuple[int, AirportRecord]]:
+        matches: Dict[int, Tuple[int, AirportRecord]] = {}
+        position = bisect_left(self._keys, query)
+        while position < len(self._keys) and self._keys[position].startswith(query):
+            quality, record = self._entries[position]
+            if self._keys[position] == query:
+                quality = EXACT_CITY if quality == CITY_PREFIX else EXACT_NAME
+            best = matches.get(record.id)
+            if best is None or quality < best[0]:
+                matches[record.id] = (quality, record)
+            position += 1
+        return matches
+
+    def candidates(self, query: str, limit: int = 5) -> List[AirportRecord]:
+        """Ranked airports matching the input, best first"""
+        if not query:
+            return []
+        exact = self.by_code(query)
+        if exact:
+            return [exact]
+
+        words = normalize(query).split()
+        # "New York, NY" -> try "new york ny", then "new york", then "new"
+        while words:
+            matches = self._prefix_matches(" ".join(words))
+            if matches:
+                ranked = sorted(
+                    matches.values(),
+                    key=lambda match: (match[0], -match[1].route_count, match[1].iata_code)
+                )
+                return [record for _, record in ranked[:limit]]
+            words.pop()
+        return []
+
+    def resolve(self, query: str) -> Optional[AirportRecord]:
+        """Best match for the input, or None"""
+        matches = self.candidates(query, limit=1)
+        return matches[0] if matches else None
+
+
+# Global resolver instance
+airport_resolver = AirportResolver()
@@ -7,7 +7,12 @@ from sqlalchemy.orm import joinedload
 from sqlalchemy import select, and_, or_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from .database_models import *
-from .database_connection import DatabaseError, BookingNotFoundError, FlightNotFoundError, PassengerNotFoundError
+from . import statements
+from . import read_models
+from .database_connection import DatabaseError, BookingNotFoundError, FlightNotFoundError, PassengerNotFoundError, is_transient_error
+from .query_helpers import on_day
+from .search_cache import search_cache
+from . import seat_inventory
 
 class BookingServices:
     """
@@ -25,104 +30,37 @@ class BookingServices:
             if not booking_ref:
                 return {"status": "error", "message": "Booking reference is required"}
 
-            # Load booking with passenger and segments
-            booking_stmt = (
-                select(Booking)
-                .options(joinedload(Booking.passenger))
-                .where(Booking.booking_reference == booking_ref)
-            )
-            booking = (await db.execute(booking_stmt)).scalars().first()
-
-            if not booking:
+            # Core read path: exact columns, no ORM entities (see read_models.py)
+            details = await read_models.booking_details(db, booking_ref)
+            if not details:
                 raise BookingNotFoundError(f"Booking {booking_ref} not found")
+            booking, segment_details = details["booking"], details["segments"]
 
             # Verify passenger name if provided
             if passenger_name:
-                passenger = booking.passenger
-                full_name = f"{passenger.first_name} {passenger.last_name}".lower()
+                full_name = f"{booking['first_name']} {booking['last_name']}".lower()
                 if passenger_name.lower() not in full_name:
                     return {"status": "error", "message": "Passenger name does not match booking"}
 
-            # Load booking segments with full relationship chain
-            segment_stmt = (
-                select(BookingSegment)
-                .options(
-                    joinedload(BookingSegment.flight)
-                    .joinedload(Flight.airline),
-                    joinedload(BookingSegment.flight)
-                    .joinedload(Flight.route)
-                    .joinedload(Route.origin_airport),
-                    joinedload(BookingSegment.flight)
-                    .joinedload(Flight.route)
-                    .joinedload(Route.destination_airport),
-                    joinedload(BookingSegment.flight)
-                    .joinedload(Flight.aircraft)
-                    .joinedload(Aircraft.aircraft_type)
-                )
-                .where(BookingSegment.booking_id == booking.id)
-            )
-            segments = (await db.execute(segment_stmt)).scalars().all()
-
-            segment_details = []
-            for segment in segments:
-                flight = segment.flight
-                route = flight.route
-
-                segment_info = {
-                    "segment_id": segment.id,
-                    "flight_number": flight.flight_number,
-                    "airline": flight.airline.name,
-                    "origin": {
-                        "code": route.origin_airport.iata_code,
-                        "name": route.origin_airport.name,
-                        "city": route.origin_airport.city,
-                        "country": route.origin_airport.country
-                    },
-                    "destination": {
-                        "code": route.destination_airport.iata_code,
-                        "name": route.destination_airport.name,
-                        "city": route.destination_airport.city,
-                        "country": route.destination_airport.country
-                    },
-                    "departure_time": flight.scheduled_departure.isoformat(),
-                    "arrival_time": flight.scheduled_arrival.isoformat(),
-                    "flight_duration": f"{route.flight_duration_minutes // 60}h {route.flight_duration_minutes % 60}m",
-                    "class_of_service": segment.class_of_service,
-                    "seat_number": segment.seat_number,
-                    "ticket_number": segment.ticket_number,
-                    "fare_basis": segment.fare_basis,
-                    "meal_preference": segment.meal_preference,
-                    "baggage_allowance": f"{segment.baggage_allowance_kg}kg",
-                    "check_in_status": segment.check_in_status,
-                    "boarding_pass_issued": segment.boarding_pass_issued,
-                    "special_requests": segment.special_requests,
-                    "gate": flight.gate,
-                    "terminal": flight.terminal,
-                    "aircraft": f"{flight.aircraft.aircraft_type.manufacturer} {flight.aircraft.aircraft_type.model}"
-                }
-                segment_details.append(segment_info)
-
-            passenger = booking.passenger
-
             return {
                 "status": "success",
                 "booking_details": {
-                    "booking_reference": booking.booking_reference,
-                    "booking_date": booking.booking_date.isoformat(),
-                    "booking_status": booking.status,
-                    "trip_type": booking.trip_type,
-                    "booking_source": booking.booking_source,
-                    "total_amount": float(booking.total_amount),
-                    "currency": booking.currency,
+                    "booking_reference": booking["booking_reference"],
+                    "booking_date": booking["booking_date"].isoformat(),
+                    "booking_status": booking["status"],
+                    "trip_type": booking["trip_type"],
+                    "booking_source": booking["booking_source"],
+                    "total_amount": float(booking["total_amount"]),
+                    "currency": booking["currency"],
                     "passenger_details": {
-                        "name": f"{passenger.first_name} {passenger.last_name}",
-                        "email": passenger.email,
-                        "phone": passenger.phone,
-                        "date_of_birth": passenger.date_of_birth.isoformat() if passenger.date_of_birth else None,
-                        "nationality": passenger.nationality,
-                        "passport_number": passenger.passport_number,
-                        "frequent_flyer_number": passenger.frequent_flyer_number,
-                        "tier_status": passenger.tier_status
+                        "name": f"{booking['first_name']} {booking['last_name']}",
+                        "email": booking["email"],
+                        "phone": booking["phone"],
+                        "date_of_birth": booking["date_of_birth"].isoformat() if booking["date_of_birth"] else None,
+                        "nationality": booking["nationality"],
+                        "passport_number": booking["passport_number"],
+                        "frequent_flyer_number": booking["frequent_flyer_number"],
+                        "tier_status": booking["tier_status"]
                     },
                     "flight_segments": segment_details,
                     "segment_count": len(segment_details)
@@ -154,8 +92,7 @@ class BookingServices:
                 booking = (await db.execute(booking_stmt)).scalars().first()
 
             elif email:
-                passenger_stmt = select(Passenger).where(Passenger.email == email)
-                passenger = (await db.execute(passenger_stmt)).scalars().first()
+                passenger = await statements.first(db, statements.PASSENGER_BY_EMAIL, email=email)
                 if passenger:
                     booking_stmt = (
                         select(Booking)
@@ -326,80 +263,23 @@ class BookingServices:
             if not email:
                 return {"status": "error", "message": "Email address is required"}
 
-            # Find passenger
-            passenger_stmt = select(Passenger).where(Passenger.email == email)
-            passenger = (await db.execute(passenger_stmt)).scalars().first()
+            # Core read path: passenger and all bookings with their segments in two queries
+            found = await read_models.passenger_bookings(db, email)
 
-            if not passenger:
+            if not found:
                 return {"status": "error", "message": "No bookings found for this email address"}
 
-            # Get bookings with segments and flights preloaded
-            booking_stmt = (
-                select(Booking)
-                .options(joinedload(Booking.passenger))
-                .where(Booking.passenger_id == passenger.id)
-                .order_by(Booking.booking_date.desc())
-            )
-            bookings = (await db.execute(booking_stmt)).scalars().all()
-
-            if not bookings:
+            passenger, booking_list = found["passenger"], found["bookings"]
+            if not booking_list:
                 return {"status": "error", "message": "No bookings found for this passenger"}
 
-            booking_list = []
-            for booking in bookings:
-                segment_stmt = (
-                    select(BookingSegment)
-                    .options(
-                        joinedload(BookingSegment.flight)
-                        .joinedload(Flight.route)
-                        .joinedload(Route.origin_airport),
-                        joinedload(BookingSegment.flight)
-                        .joinedload(Flight.route)
-                        .joinedload(Route.destination_airport)
-                    )
-                    .where(BookingSegment.booking_id == booking.id)
-                    .order_by(BookingSegment.id.asc())
-                )
-                segments = (await db.execute(segment_stmt)).scalars().all()
-
-                booking_info = {
-                    "booking_reference": booking.booking_reference,
-                    "booking_date": booking.booking_date.isoformat(),
-                    "status": booking.status,
-                    "total_amount": float(booking.total_amount),
-                    "currency": booking.currency,
-                    "trip_type": booking.trip_type,
-                    "flight_count": len(segments),
-                    "booking_source": booking.booking_source
-                }
-
-                if segments:
-                    first_segment = segments[0]
-                    flight = first_segment.flight
-                    route = flight.route
-
-                    booking_info["primary_route"] = {
-                        "origin": route.origin_airport.iata_code,
-                        "destination": route.destination_airport.iata_code,
-                        "origin_city": route.origin_airport.city,
-                        "destination_city": route.destination_airport.city,
-                        "departure_date": flight.scheduled_departure.strftime('%Y-%m-%d'),
-                        "departure_time": flight.scheduled_departure.strftime('%H:%M')
-                    }
-
-                    if len(segments) > 1:
-                        return_flight = segments[-1].flight
-                        booking_info["return_date"] = return_flight.scheduled_departure.strftime('%Y-%m-%d')
-
-                booking_list.append(booking_info)
-
             return {
                 "status": "success",
                 "email": email,
                 "passenger_details": {
-                    "name": f"{passenger.first_name} {passenger.last_name}",
-                    "tier_status": passenger.tier_status,
-                    "frequent_flyer_number": passenger.frequent_flyer_number
+                    "name": f"{passenger['first_name']} {passenger['last_name']}",
+                    "tier_status": passenger["tier_status"],
+                    "frequent_flyer_number": passenger["frequent_flyer_number"]
                 },
                 "bookings_found": len(booking_list),
                 "bookings": booking_list
@@ -488,7 +368,12 @@ class BookingServices:
                 refund_method="credit_card"
             )
             db.add(refund)
+            for segment in segments:
+                await seat_inventory.adjust(db, segment.flight_id, segment.class_of_service, booked=-1)
             await db.commit()
+            search_cache.invalidate_flights(
+                [s.flight_id for s in segments], [s.flight.route_id for s in segments]
+            )
 
             return {
                 "status": "success",
@@ -525,6 +410,8 @@ class BookingServices:
             return {"status": "error", "message": str(e)}
         except Exception as e:
             await db.rollback()
+            if is_transient_error(e):
+                raise
             return {"status": "error", "message": f"Cancellation failed: {str(e)}"}
     
     @staticmethod
@@ -690,7 +577,7 @@ class BookingServices:
                         )
                         .where(
                             Flight.flight_number == flight_number,
-                            func.date(Flight.scheduled_departure) == search_date
+                            on_day(Flight.scheduled_departure, search_date)
                         )
                     )
                     if airline_name:
@@ -894,7 +781,7 @@ class BookingServices:
 
                     flight_stmt = select(Flight).where(
                         Flight.route_id == route.id,
-                        func.date(Flight.scheduled_departure) == new_dep_date,
+                        on_day(Flight.scheduled_departure, new_dep_date),
                         Flight.status == "scheduled"
                     )
                     new_flights = (await db.execute(flight_stmt)).scalars().all()
@@ -930,7 +817,7 @@ class BookingServices:
 
                     return_stmt = select(Flight).where(
                         Flight.route_id == return_route.id,
-                        func.date(Flight.scheduled_departure) == new_ret_date,
+                        on_day(Flight.scheduled_departure, new_ret_date),
                         Flight.status == "scheduled"
                     )
                     new_return_flights = (await db.execute(return_stmt)).scalars().all()
@@ -1332,7 +1219,7 @@ class BookingServices:
                 flight_stmt = select(Flight).where(
                     and_(
                         Flight.flight_number == flight_number,
-                        func.date(Flight.scheduled_departure) == search_date
+                        on_day(Flight.scheduled_departure, search_date)
                     )
                 ).options(
                     joinedload(Flight.airline),
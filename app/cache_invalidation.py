@@ -0,0 +1,167 @@
+"""
+HopJetAir Cache Invalidation
+Search cache invalidations shared by every process serving the API
+
+search_cache lives in process memory. When a booking, cancellation or seat
+change drops searches locally, the flight and route ids are also sent with
+pg_notify on CHANNEL; every other worker (and every other container on the
+same database) LISTENs on a dedicated connection and drops the same entries.
+While that connection is down the local search cache is bypassed, and it is
+cleared on reconnect, because invalidations sent meanwhile were missed.
+
+Runs only when database_connection.SEARCH_CACHE_BROADCAST is set (more than
+one worker or DB_SERVICE_REPLICAS > 1); the listener connection is taken out
+of the worker's pool budget.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import socket
+from typing import Any, Dict, Iterable, Optional, Set
+import asyncpg
+from .database_connection import get_connection_string
+from .search_cache import SearchCache, search_cache
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "hopjetair_search_cache"
+INVALIDATION_RETRY_SECONDS = float(os.getenv("INVALIDATION_RETRY_SECONDS", "5"))
+# NOTIFY payloads must stay under 8000 bytes
+MESSAGE_IDS = 500
+
+
+class InvalidationBus:
+    """
+    Ids waiting to be sent are kept as sets, so a long outage costs one entry
+    per distinct flight/route and they all go out once the connection is back.
+    """
+
+    def __init__(self, cache: SearchCache):
+        self.cache = cache
+        self.origin = f"{socket.gethostname()}:{os.getpid()}"
+        self.connected = False
+        self.sent = 0
+        self.received = 0
+        self.reconnects = 0
+        self._flights: Set[int] = set()
+        self._routes: Set[int] = set()
+        self._wake = asyncio.Event()
+        self._sent_all = asyncio.Event()
+        self._sent_all.set()
+        self._connection: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def publish(self, flight_ids: Iterable[int], route_ids: Iterable[int]) -> None:
+        self._flights.update(flight_ids)
+        self._routes.update(route_ids)
+        self._sent_all.clear()
+        self._wake.set()
+
+    def _receive(self, connection, pid: int, channel: str, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed cache invalidation: {payload[:100]}")
+            return
+        if message.get("origin") == self.origin:
+            return
+        self.received += 1
+        self.cache.invalidate_flights(message.get("flights", ()), message.get("routes", ()), broadcast=False)
+
+    async def _send(self, connection: asyncpg.Connection) -> None:
+        while self._flights or self._routes:
+            flights = sorted(self._flights)[:MESSAGE_IDS]
+            routes = sorted(self._routes)[:MESSAGE_IDS - len(flights)]
+            payload = json.dumps({"origin": self.origin, "flights": flights, "routes": routes})
+            await connection.execute("SELECT pg_notify($1, $2)", CHANNEL, payload)
+            # Only forget ids once they are sent; a failed send retries after reconnect
+            self._flights.difference_update(flights)
+            self._routes.difference_update(routes)
+            self.sent += 1
+        self._sent_all.set()
+
+    async def _listen(self, connection: asyncpg.Connection) -> None:
+        closed = asyncio.Event()
+        connection.add_termination_listener(lambda _: closed.set())
+        await connection.add_listener(CHANNEL, self._receive)
+        # Invalidations sent while this worker was not listening are lost
+        self.cache.clear()
+        self.cache.suspended = False
+        self.connected = True
+        logger.info(f"Listening for search cache invalidations on '{CHANNEL}'")
+        while not closed.is_set():
+            self._wake.clear()
+            await self._send(connection)
+            waiters = [asyncio.create_task(self._wake.wait()), asyncio.create_task(closed.wait())]
+            try:
+                await asyncio.wait(waiters, return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                for waiter in waiters:
+                    waiter.cancel()
+        raise ConnectionError("invalidation listener connection closed")
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                url = await get_connection_string()
+                self._connection = await asyncpg.connect(url.replace("postgresql+asyncpg://", "postgresql://", 1))
+                await self._listen(self._connection)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Search cache invalidation listener down ({e}); bypassing the search cache")
+            finally:
+                self.connected = False
+                self.cache.suspended = True
+                await self._close()
+            self.reconnects += 1
+            await asyncio.sleep(INVALIDATION_RETRY_SECONDS)
+
+    async def _close(self) -> None:
+        if self._connection is not None:
+            try:
+                await self._connection.close(timeout=2)
+            except Exception:
+                self._connection.terminate()
+            self._connection = None
+
+    def start(self) -> None:
+        """Publish this worker's invalidations; bypass the cache until the listener is up"""
+        if self._task is None:
+            self.cache.publish = self.publish
+            self.cache.suspended = True
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        # Requests have drained; send what they invalidated before going away
+        if self.connected:
+            try:
+                await asyncio.wait_for(self._sent_all.wait(), timeout=2)
+            except asyncio.TimeoutError:
+                logger.warning("Shutting down with unsent search cache invalidations")
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        self.cache.publish = None
+        self.cache.suspended = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self._task is not None,
+            "connected": self.connected,
+            "sent": self.sent,
+            "received": self.received,
+            "reconnects": self.reconnects,
+            "pending_ids": len(self._flights) + len(self._routes),
+        }
+
+
+# Global invalidation bus of this worker process
+invalidation_bus = InvalidationBus(search_cache)
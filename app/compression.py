@@ -0,0 +1,226 @@
+"""
+HopJetAir Response Compression
+Content-Encoding negotiation for large JSON responses
+
+check_seat_availability, search_flight_prices and retrieve_booking_by_email
+answer with tens of kilobytes of repetitive JSON. CompressionMiddleware
+picks the best coding the client accepts (zstd, br, gzip; zstd and br only
+when the zstandard / brotli packages are installed) and compresses complete
+responses of at least COMPRESSION_MIN_BYTES. Streaming responses, responses
+that already have a Content-Encoding and endpoints listed in
+COMPRESSION_EXCLUDED_ENDPOINTS are sent as they are.
+
+A strong ETag set by the response cache becomes weak on compressed
+responses, since the bytes differ from the body it was computed over.
+
+Compression runs on the event loop, so the level follows the worker's CPU
+use: the highest of a coding's LEVELS while the process is mostly idle,
+the lowest once it is busy. Bytes in/out and time spent per endpoint and
+coding are exported at /metrics.
+"""
+
+import gzip
+import os
+import time
+from typing import Dict, Optional
+from starlette.datastructures import Headers, MutableHeaders
+from .metrics import metrics, current_endpoint
+
+try:
+    import brotli
+except ImportError:  # optional codec
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional codec
+    zstandard = None
+
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_EXCLUDED_ENDPOINTS = {
+    name.strip() for name in os.getenv("COMPRESSION_EXCLUDED_ENDPOINTS", "").split(",") if name.strip()
+}
+# Process CPU use (share of one core) above which the middle / lowest level is used
+COMPRESSION_CPU_BUSY = float(os.getenv("COMPRESSION_CPU_BUSY", "0.5"))
+COMPRESSION_CPU_SATURATED = float(os.getenv("COMPRESSION_CPU_SATURATED", "0.8"))
+
+COMPRESSIBLE_TYPES = ("application/json", "text/")
+
+# Levels per coding for idle / busy / saturated workers
+LEVELS = {
+    "zstd": (6, 3, 1),
+    "br": (5, 4, 1),
+    "gzip": (6, 4, 1),
+}
+
+_zstd_compressors: Dict[int, object] = {}
+
+
+def _zstd(body: bytes, level: int) -> bytes:
+    compressor = _zstd_compressors.get(level)
+    if compressor is None:
+        compressor = _zstd_compressors[level] = zstandard.ZstdCompressor(level=level)
+    return compressor.compress(body)
+
+
+def _br(body: bytes, level: int) -> bytes:
+    return brotli.compress(body, quality=level, mode=brotli.MODE_TEXT)
+
+
+def _gzip(body: bytes, level: int) -> bytes:
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+# Server preference order, used when the client accepts several equally
+CODECS = {}
+if zstandard is not None:
+    CODECS["zstd"] = _zstd
+if brotli is not None:
+    CODECS["br"] = _br
+CODECS["gzip"] = _gzip
+
+
+class CpuLoad:
+    """This process's CPU use as a share of one core, re-sampled at most once a second"""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.utilization = 0.0
+        self._wall = time.monotonic()
+        self._cpu = time.process_time()
+
+    def current(self) -> float:
+        wall = time.monotonic()
+        if wall - self._wall >= self.interval:
+            cpu = time.process_time()
+            self.utilization = (cpu - self._cpu) / (wall - self._wall)
+            self._wall, self._cpu = wall, cpu
+        return self.utilization
+
+
+cpu_load = CpuLoad()
+
+
+def current_level(encoding: str) -> int:
+    idle, busy, saturated = LEVELS[encoding]
+    load = cpu_load.current()
+    if load >= COMPRESSION_CPU_SATURATED:
+        return saturated
+    if load >= COMPRESSION_CPU_BUSY:
+        return busy
+    return idle
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """Best available coding for an Accept-Encoding header, or None for identity"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for coding in CODECS:
+        quality = accepted.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+compression_input_bytes = metrics.counter(
+    "http_compression_input_bytes_total", "Response bytes before compression", ("endpoint", "encoding"))
+compression_output_bytes = metrics.counter(
+    "http_compression_output_bytes_total", "Response bytes after compression", ("endpoint", "encoding"))
+compression_seconds = metrics.counter(
+    "http_compression_seconds_total", "Time spent compressing responses", ("endpoint", "encoding"))
+compression_skipped = metrics.counter(
+    "http_compression_skipped_total", "Responses sent uncompressed to clients that accept compression, by reason",
+    ("reason",))
+metrics.gauge(
+    "http_compression_level", "Level the next response would be compressed at", ("encoding",),
+    lambda: {(encoding,): current_level(encoding) for encoding in CODECS})
+
+
+def _endpoint(path: str) -> str:
+    return path.rstrip("/").rsplit("/", 1)[-1]
+
+
+class CompressionMiddleware:
+    """ASGI middleware compressing complete, compressible responses"""
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES,
+                 excluded_endpoints=COMPRESSION_EXCLUDED_ENDPOINTS):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.excluded_endpoints = set(excluded_endpoints)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        if _endpoint(scope["path"]) in self.excluded_endpoints:
+            compression_skipped.inc(reason="excluded")
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            headers = MutableHeaders(raw=start_message["headers"])
+            body = message.get("body", b"")
+            reason = None
+            if message.get("more_body", False):
+                reason = "streaming"
+            elif "content-encoding" in headers:
+                reason = "encoded"
+            elif not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+                reason = "content_type"
+            elif len(body) < self.minimum_size:
+                reason = "small"
+            if reason is not None:
+                compression_skipped.inc(reason=reason)
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            endpoint = current_endpoint()
+            started = time.perf_counter()
+            compressed = CODECS[encoding](body, current_level(encoding))
+            compression_seconds.inc(time.perf_counter() - started, endpoint=endpoint, encoding=encoding)
+            compression_input_bytes.inc(len(body), endpoint=endpoint, encoding=encoding)
+            compression_output_bytes.inc(len(compressed), endpoint=endpoint, encoding=encoding)
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(compressed))
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # The encoded bytes differ from the identity body the strong tag was computed over
+                headers["ETag"] = f"W/{etag}"
+            headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
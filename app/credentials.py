@@ -0,0 +1,231 @@
+"""
+HopJetAir Database Credentials
+Pluggable credential providers, resolved during startup rather than at import
+time and cached with a refresh interval so rotated secrets are picked up
+without a restart
+
+Providers are tried in DB_CREDENTIAL_PROVIDERS order; one that is not
+configured (no file, no secret name, ...) is skipped:
+  file            JSON file at DB_CREDENTIALS_FILE
+  local_secrets   Secrets Manager stand-in: JSON file at LOCAL_SECRETS_FILE
+                  mapping secret names to secrets, looked up by DB_SECRET_NAME
+  secrets_manager AWS Secrets Manager (DB_SECRET_NAME, AWS_REGION); boto3 is
+                  only imported when this provider runs
+  env             DB_USER / DB_PASS
+All secret sources use the keys "db_user" and "db_pass".
+"""
+
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROVIDER_CHAIN = "file,local_secrets,secrets_manager,env"
+CREDENTIALS_REFRESH_SECONDS = int(os.getenv("DB_CREDENTIALS_REFRESH_SECONDS", "3600"))
+
+
+class DatabaseCredentials(NamedTuple):
+    user: str
+    password: str
+    source: str
+
+
+def _from_secret(secret: Dict, source: str) -> Optional[DatabaseCredentials]:
+    user, password = secret.get('db_user'), secret.get('db_pass')
+    if not all([user, password]):
+        logger.warning(f"Incomplete user/pass from {source}, trying the next provider")
+        return None
+    return DatabaseCredentials(user, password, source)
+
+
+def _read_json(path: str) -> Dict:
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+class CredentialProvider(ABC):
+    """Returns credentials, or None when the provider is not configured"""
+
+    name = "base"
+
+    @abstractmethod
+    async def fetch(self) -> Optional[DatabaseCredentials]:
+        """Credentials from this source, None when it is not configured"""
+
+
+class EnvCredentialProvider(CredentialProvider):
+    name = "env"
+
+    async def fetch(self) -> Optional[DatabaseCredentials]:
+        user, password = os.getenv("DB_USER"), os.getenv("DB_PASS")
+        if not all([user, password]):
+            return None
+        return DatabaseCredentials(user, password, self.name)
+
+
+class FileCredentialProvider(CredentialProvider):
+    name = "file"
+
+    async def fetch(self) -> Optional[DatabaseCredentials]:
+        path = os.getenv("DB_CREDENTIALS_FILE")
+        if not path:
+            return None
+        return _from_secret(await asyncio.to_thread(_read_json, path), f"{self.name}:{path}")
+
+
+class LocalSecretsProvider(CredentialProvider):
+    """Reads the same secret layout as Secrets Manager from a local JSON file"""
+
+    name = "local_secrets"
+
+    async def fetch(self) -> Optional[DatabaseCredentials]:
+        path, secret_name = os.getenv("LOCAL_SECRETS_FILE"), os.getenv("DB_SECRET_NAME")
+        if not path or not secret_name:
+            return None
+        secrets = await asyncio.to_thread(_read_json, path)
+        secret = secrets.get(secret_name)
+        if isinstance(secret, str):
+            secret = json.loads(secret)
+        if not secret:
+            logger.warning(f"Secret '{secret_name}' not found in {path}")
+            return None
+        return _from_secret(secret, f"{self.name}:{secret_name}")
+
+
+class SecretsManagerProvider(CredentialProvider):
+    name = "secrets_manager"
+
+    @staticmethod
+    def _get_secret(secret_name: str, region_name: str) -> Dict:
+        import boto3
+
+        client = boto3.session.Session().client(service_name='secretsmanager', region_name=region_name)
+        response = client.get_secret_value(SecretId=secret_name)
+        return json.loads(response['SecretString'])
+
+    async def fetch(self) -> Optional[DatabaseCredentials]:
+        secret_name, region_name = os.getenv("DB_SECRET_NAME"), os.getenv("AWS_REGION")
+        if not secret_name or not region_name:
+            return None
+        # boto3 is synchronous; keep it off the event loop
+        secret = await asyncio.to_thread(self._get_secret, secret_name, region_name)
+        logger.info(f"Fetched credentials from AWS Secrets Manager for secret: {secret_name}")
+        return _from_secret(secret, f"{self.name}:{secret_name}")
+
+
+PROVIDERS = {
+    provider.name: provider
+    for provider in (FileCredentialProvider, LocalSecretsProvider, SecretsManagerProvider, EnvCredentialProvider)
+}
+
+
+def provider_chain(names: Optional[str] = None) -> List[CredentialProvider]:
+    names = names or os.getenv("DB_CREDENTIAL_PROVIDERS", DEFAULT_PROVIDER_CHAIN)
+    chain = []
+    for name in (n.strip() for n in names.split(",")):
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown credential provider '{name}'")
+        chain.append(PROVIDERS[name]())
+    return chain
+
+
+class CredentialCache:
+    """
+    Credentials from the first provider that answers, cached until
+    refresh_seconds have passed. While started, a background task re-resolves
+    them on that interval and awaits on_rotate(new_credentials) when they change.
+    """
+
+    def __init__(self, providers: Optional[List[CredentialProvider]] = None,
+                 refresh_seconds: int = CREDENTIALS_REFRESH_SECONDS):
+        self._providers = providers
+        self.refresh_seconds = refresh_seconds
+        self.credentials: Optional[DatabaseCredentials] = None
+        self.rotations = 0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._on_rotate: Optional[Callable[[DatabaseCredentials], Awaitable[None]]] = None
+
+    @property
+    def providers(self) -> List[CredentialProvider]:
+        if self._providers is None:
+            self._providers = provider_chain()
+        return self._providers
+
+    async def _resolve(self) -> DatabaseCredentials:
+        for provider in self.providers:
+            try:
+                credentials = await provider.fetch()
+            except Exception as e:
+                logger.error(f"Credential provider '{provider.name}' failed: {e}")
+                continue
+            if credentials:
+                return credentials
+        raise ValueError(
+            "No database credentials found. Configure one of the providers: "
+            + ", ".join(provider.name for provider in self.providers)
+        )
+
+    async def get(self, force: bool = False) -> DatabaseCredentials:
+        async with self._lock:
+            if self.credentials is None or force:
+                self.credentials = await self._resolve()
+                logger.info(f"Using database credentials from {self.credentials.source}")
+            return self.credentials
+
+    async def refresh(self) -> bool:
+        """
+        Re-resolve; when the credentials changed, await on_rotate and only then
+        adopt them, so a failed rotation is retried on the next refresh
+        """
+        async with self._lock:
+            credentials = await self._resolve()
+        previous = self.credentials
+        if previous is not None and credentials[:2] == previous[:2]:
+            return False
+        if previous is not None and self._on_rotate:
+            await self._on_rotate(credentials)
+        self.credentials = credentials
+        if previous is None:
+            return False
+        self.rotations += 1
+        logger.info(f"Database credentials rotated (source {credentials.source})")
+        return True
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Credential refresh failed, keeping current credentials: {e}")
+
+    def start(self, on_rotate: Callable[[DatabaseCredentials], Awaitable[None]]) -> None:
+        self._on_rotate = on_rotate
+        if self.refresh_seconds > 0 and self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict:
+        return {
+            "source": self.credentials.source if self.credentials else None,
+            "providers": [provider.name for provider in self.providers],
+            "refresh_seconds": self.refresh_seconds,
+            "rotations": self.rotations,
+        }
+
+
+# Global credential cache instance
+credential_cache = CredentialCache()
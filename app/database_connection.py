@@ -1,169 +1,356 @@
 import os
 import asyncio
+import functools
+import hashlib
+import hmac
+import math
+import random
+import secrets
+import time
 from contextlib import asynccontextmanager
-from psycopg_pool import AsyncConnectionPool
+from contextvars import ContextVar
+from typing import Optional
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.pool import NullPool
 from sqlalchemy.orm import declarative_base
 import logging
-import boto3
-import json
-from botocore.exceptions import ClientError
+from urllib.parse import quote_plus
+from .statements import QUERY_CACHE_SIZE, PREPARED_STATEMENT_CACHE_SIZE, StatementCacheStats
+from .metrics import metrics, TimedQueuePool, instrument_engine
+from . import query_budget
+from .credentials import credential_cache, DatabaseCredentials
+from .workers import worker_count
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Connection pool configuration
-MIN_CONNECTIONS = int(os.getenv("DB_MIN_CONNECTIONS", "5"))
-MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "20"))
+# Server connection budget: max_connections minus superuser slots and this
+# headroom (migrations, psql, monitoring) is shared by every worker of every replica
+DB_RESERVED_CONNECTIONS = int(os.getenv("DB_RESERVED_CONNECTIONS", "10"))
+# Worker processes of this container; "auto" resolves like app/serve.py does
+WEB_CONCURRENCY = worker_count()
+DB_SERVICE_REPLICAS = int(os.getenv("DB_SERVICE_REPLICAS", "1"))
+# With more than one process serving the API, each holds one more connection
+# to broadcast search cache invalidations (see cache_invalidation.py)
+SEARCH_CACHE_BROADCAST = WEB_CONCURRENCY > 1 or DB_SERVICE_REPLICAS > 1
+LISTENER_CONNECTIONS = 1 if SEARCH_CACHE_BROADCAST else 0
 
-# --- AWS Secrets Manager and Connection String Functions ---
+# Connection pool configuration, per container: each of the WEB_CONCURRENCY
+# worker processes gets an equal share (at least one connection), less its listener
+def _worker_share(total: int) -> int:
+    return max(total // WEB_CONCURRENCY, 1)
 
-def get_db_credentials():
-    """Fetch database credentials (user and password) from AWS Secrets Manager"""
-    secret_name = os.getenv("DB_SECRET_NAME")
-    region_name = os.getenv("AWS_REGION")
+MAX_CONNECTIONS = max(_worker_share(int(os.getenv("DB_MAX_CONNECTIONS", "20"))) - LISTENER_CONNECTIONS, 1)
+MIN_CONNECTIONS = min(_worker_share(int(os.getenv("DB_MIN_CONNECTIONS", "5"))), MAX_CONNECTIONS)
 
-    if not secret_name or not region_name:
-        logger.warning("DB_SECRET_NAME or AWS_REGION not set. Cannot fetch credentials from Secrets Manager.")
-        return None
+# Read replicas: comma-separated host[:port] serving the same database with the
+# same credentials. Read endpoints use a replica whose replay lag is within
+# DB_REPLICA_MAX_LAG_SECONDS; a client that just wrote reads from the primary
+# for DB_READ_YOUR_WRITES_SECONDS.
+DB_REPLICA_HOSTS = [host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()]
+DB_REPLICA_MAX_LAG_SECONDS = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", "5"))
+DB_REPLICA_LAG_CHECK_SECONDS = float(os.getenv("DB_REPLICA_LAG_CHECK_SECONDS", "2"))
+DB_READ_YOUR_WRITES_SECONDS = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "10"))
 
-    try:
-        client = boto3.session.Session().client(
-            service_name='secretsmanager',
-            region_name=region_name
-        )
-        get_secret_value_response = client.get_secret_value(SecretId=secret_name)
-        secret = json.loads(get_secret_value_response['SecretString'])
-        logger.info(f"Successfully fetched credentials from AWS Secrets Manager for secret: {secret_name}")
-        return secret
-    except ClientError as e:
-        logger.error(f"Error fetching secret '{secret_name}' from Secrets Manager: {e}")
-    except Exception as e:
-        logger.error(f"Unexpected error occurred while fetching secret: {e}")
-    
-    return None
+# The pin also travels with the client as a signed "primary until" token
+# (PIN_COOKIE cookie, PIN_HEADER header), so every worker process and
+# container sharing DB_PIN_SECRET honours it. app/serve.py generates one
+# secret for its workers; set it explicitly when containers share clients.
+DB_PIN_SECRET = (os.getenv("DB_PIN_SECRET") or secrets.token_hex(32)).encode()
+PIN_COOKIE = "hj_primary_until"
+PIN_HEADER = "X-Primary-Until"
+
+# Zero when the replica has replayed everything it received (an idle primary
+# does not count as lag), otherwise the age of the last replayed transaction
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+# --- Connection String ---
 
-def get_connection_string():
+def build_connection_string(credentials: DatabaseCredentials, host_port: str = None) -> str:
     """
-    Build database connection string dynamically.
-    user and pass from AWS Secrets Manager (or fallback to env).
-    Host, port, database name always from environment variables.
-    Returns SQLAlchemy compatible URL (e.g., postgresql+asyncpg://).
+    SQLAlchemy URL (postgresql+asyncpg://) from the resolved user/pass.
+    Host, port and database name always come from environment variables
+    (host_port, "host[:port]", overrides them for a replica).
     """
-    db_user = None
-    db_pass = None
-    
-    # Attempt to get user and pass from AWS Secrets Manager
-    try:
-        credentials = get_db_credentials()
-        if credentials:
-            db_pass = credentials.get('db_pass') # Common key in Secrets Manager
-            db_user = credentials.get('db_user') # Common key in Secrets Manager
-            
-            if not all([db_user, db_pass]):
-                logger.warning("Incomplete user/pass from Secrets Manager. Falling back to environment variables.")
-                db_user, db_pass = None, None # Reset to trigger fallback
-        else:
-            logger.warning("No credentials returned from AWS Secrets Manager. Falling back to environment variables for user/pass.")
-            
-    except Exception as e:
-        logger.error(f"Error during Secrets Manager credential retrieval for user/pass: {e}. Falling back to environment variables.")
-        db_user, db_pass = None, None
-
-    # Fallback to environment variables for user/pass if Secrets Manager failed or was incomplete
-    if not all([db_user, db_pass]):
-        db_user = os.getenv("DB_USER")
-        db_pass = os.getenv("DB_PASS")
-        logger.info("Using environment variables for database user and pass.")
-    else:
-        logger.info("Using AWS Secrets Manager credentials for database user and pass.")
-
-    # Always get host, port, and database name from environment variables
     host = os.getenv("DB_HOST")
     port = os.getenv("DB_PORT", "5432")
     database = os.getenv("DB_NAME")
-    
+    if host_port:
+        host, _, replica_port = host_port.partition(":")
+        port = replica_port or port
+
     # Validate required variables
-    if not all([host, database, db_user, db_pass]):
-        error_msg = "Missing required database configuration (host, database, user, or pass). Please set environment variables or AWS Secrets Manager."
+    if not all([host, database]):
+        error_msg = "Missing required database configuration (host or database). Please set environment variables."
         logger.critical(error_msg)
         raise ValueError(error_msg)
-    
-    # Build connection string for SQLAlchemy (with +asyncpg)
-    connection_string = f"postgresql+asyncpg://{db_user}:{db_pass}@{host}:{port}/{database}"
-    return connection_string
 
-# Initialize DATABASE_URL using the function
-DATABASE_URL = get_connection_string()
+    user, password = quote_plus(credentials.user), quote_plus(credentials.password)
+    return f"postgresql+asyncpg://{user}:{password}@{host}:{port}/{database}"
+
+async def get_connection_string(force_refresh: bool = False) -> str:
+    """Connection string with credentials from the provider chain (see credentials.py)"""
+    return build_connection_string(await credential_cache.get(force=force_refresh))
+
+# --- End Connection String ---
+
+
+async def get_connection_budget(url: str):
+    """
+    (pool_size, max_overflow) for this worker: the server's usable connections
+    divided across WEB_CONCURRENCY workers x DB_SERVICE_REPLICAS replicas,
+    less the invalidation listener, capped by this worker's share of
+    DB_MAX_CONNECTIONS. Falls back to the
+    worker's share of DB_MIN/DB_MAX_CONNECTIONS when the server cannot be asked.
+    """
+    probe = create_async_engine(url, poolclass=NullPool)
+    try:
+        async with probe.connect() as conn:
+            server_max = int((await conn.execute(text("SHOW max_connections"))).scalar())
+            superuser_reserved = int((await conn.execute(text("SHOW superuser_reserved_connections"))).scalar())
+    except Exception as e:
+        logger.warning(f"Could not read max_connections ({e}); using DB_MIN/DB_MAX_CONNECTIONS")
+        return MIN_CONNECTIONS, max(MAX_CONNECTIONS - MIN_CONNECTIONS, 0)
+    finally:
+        await probe.dispose()
+
+    usable = server_max - superuser_reserved - DB_RESERVED_CONNECTIONS
+    per_worker = usable // max(WEB_CONCURRENCY * DB_SERVICE_REPLICAS, 1)
+    budget = max(min(per_worker - LISTENER_CONNECTIONS, MAX_CONNECTIONS), 1)
+    pool_size = min(MIN_CONNECTIONS, budget)
+    logger.info(
+        f"Connection budget: {server_max} server max, {usable} usable, "
+        f"{WEB_CONCURRENCY} workers x {DB_SERVICE_REPLICAS} replicas -> {budget} per worker"
+    )
+    return pool_size, budget - pool_size
+
+
+async def create_engine_for(url: str, verify: bool = False, name: str = "primary"):
+    """
+    Budgeted, instrumented engine and session factory for url (name labels its
+    pool metrics); verify connects once before returning
+    """
+    pool_size, max_overflow = await get_connection_budget(url)
+
+    # Create async engine for SQLAlchemy
+    engine = create_async_engine(
+        url,
+        echo=False,
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=30,
+        pool_recycle=3600,
+        query_cache_size=QUERY_CACHE_SIZE,
+        connect_args={
+            "prepared_statement_cache_size": PREPARED_STATEMENT_CACHE_SIZE,
+            "server_settings": query_budget.server_settings()
+        }
+    )
+    instrument_engine(engine, name)
+    query_budget.instrument_engine(engine)
+    if verify:
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        except Exception:
+            await engine.dispose()
+            raise
+
+    # Create session factory
+    session_factory = async_sessionmaker(
+        engine,
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+    return engine, session_factory, pool_size, max_overflow
+
+
+def readonly_session_factory(engine):
+    """
+    Sessions on engine whose transactions start as READ ONLY (asyncpg
+    postgresql_readonly; reset when the connection returns to the pool)
+    """
+    return async_sessionmaker(
+        engine.execution_options(postgresql_readonly=True),
+        class_=AsyncSession,
+        expire_on_commit=False
+    )
+
 
-# --- End AWS Secrets Manager and Connection String Functions ---
+class Replica:
+    """A read replica's engine, its read-only session factory and its last measured replay lag"""
+
+    def __init__(self, name: str, engine):
+        self.name = name
+        self.engine = engine
+        self.session_factory = readonly_session_factory(engine)
+        self.lag_seconds = None  # unknown until the first check
+        self.error = None
+
+    @property
+    def usable(self) -> bool:
+        return self.lag_seconds is not None and self.lag_seconds <= DB_REPLICA_MAX_LAG_SECONDS
+
+    async def check_lag(self) -> None:
+        try:
+            async with self.engine.connect() as conn:
+                self.lag_seconds = float((await conn.execute(REPLICA_LAG_SQL)).scalar())
+            self.error = None
+        except Exception as e:
+            self.lag_seconds, self.error = None, str(e)
+            logger.warning(f"Replica {self.name} unavailable: {e}")
 
 
 class DatabaseManager:
     def __init__(self):
-        self.pool = None
         self.engine = None
         self.async_session_factory = None
+        self.readonly_session_factory = None
+        self.statement_stats = None
+        self.pool_size = 0
+        self.max_overflow = 0
+        self.replicas = []
+        self._replica_cursor = 0
+        self._pinned_until = {}
+        self._lag_task = None
         
     async def initialize(self):
-        """Initialize database connections and pool"""
+        """Initialize the primary engine (ORM sessions and raw queries) and any replicas"""
         try:
-            # Create async engine for SQLAlchemy
-            self.engine = create_async_engine(
-                DATABASE_URL,
-                echo=False,
-                pool_size=MIN_CONNECTIONS,
-                max_overflow=MAX_CONNECTIONS - MIN_CONNECTIONS,
-                pool_timeout=30,
-                pool_recycle=3600
+            credentials = await credential_cache.get()
+            self.engine, self.async_session_factory, self.pool_size, self.max_overflow = (
+                await create_engine_for(build_connection_string(credentials))
             )
-            
-            # Create session factory
-            self.async_session_factory = async_sessionmaker(
-                self.engine,
-                class_=AsyncSession,
-                expire_on_commit=False
-            )
-            
-            # Initialize connection pool for raw queries (psycopg_pool)
-            # Remove '+asyncpg' from the URL for psycopg_pool
-            raw_conn_info = DATABASE_URL.replace("+asyncpg", "")
-            self.pool = AsyncConnectionPool(
-                conninfo=raw_conn_info,
-                min_size=MIN_CONNECTIONS,
-                max_size=MAX_CONNECTIONS,
-                timeout=30
+            self.readonly_session_factory = readonly_session_factory(self.engine)
+            self.statement_stats = StatementCacheStats(self.engine)
+            await self._build_replicas(credentials)
+            logger.info(
+                f"Database connections initialized successfully (pool {self.pool_size} + {self.max_overflow} overflow, "
+                f"{len(self.replicas)} replicas)"
             )
             
-            await self.pool.open()
-            logger.info("Database connections initialized successfully")
-            
         except Exception as e:
             logger.error(f"Failed to initialize database: {e}")
             raise
+
+    async def _build_replicas(self, credentials: DatabaseCredentials, verify: bool = False):
+        replicas = []
+        for host_port in DB_REPLICA_HOSTS:
+            engine, _, _, _ = await create_engine_for(
+                build_connection_string(credentials, host_port), verify=verify, name=f"replica:{host_port}"
+            )
+            replicas.append(Replica(host_port, engine))
+        for replica in replicas:
+            await replica.check_lag()
+        self.replicas, previous = replicas, self.replicas
+        for replica in previous:
+            await replica.engine.dispose()
+
+    async def rotate(self, credentials: DatabaseCredentials):
+        """
+        Swap in pools built with rotated credentials once they are known to
+        work. Sessions already running finish on the old pool; its connections
+        close as they are returned.
+        """
+        engine, session_factory, pool_size, max_overflow = await create_engine_for(
+            build_connection_string(credentials), verify=True
+        )
+        previous = self.engine
+        self.engine, self.async_session_factory = engine, session_factory
+        self.readonly_session_factory = readonly_session_factory(engine)
+        self.statement_stats = StatementCacheStats(engine)
+        self.pool_size, self.max_overflow = pool_size, max_overflow
+        if previous:
+            await previous.dispose()
+        await self._build_replicas(credentials, verify=True)
+        logger.info("Database pools rebuilt with rotated credentials")
+
+    async def _monitor_replicas(self):
+        while True:
+            await asyncio.sleep(DB_REPLICA_LAG_CHECK_SECONDS)
+            for replica in self.replicas:
+                await replica.check_lag()
+
+    def start_replica_monitor(self):
+        if self.replicas and self._lag_task is None:
+            self._lag_task = asyncio.create_task(self._monitor_replicas())
+
+    async def stop_replica_monitor(self):
+        if self._lag_task:
+            self._lag_task.cancel()
+            try:
+                await self._lag_task
+            except asyncio.CancelledError:
+                pass
+            self._lag_task = None
     
     async def close(self):
         """Close all database connections"""
         try:
-            if self.pool:
-                await self.pool.close()
+            await self.stop_replica_monitor()
+            for replica in self.replicas:
+                await replica.engine.dispose()
             if self.engine:
                 await self.engine.dispose()
             logger.info("Database connections closed")
         except Exception as e:
             logger.error(f"Error closing database connections: {e}")
+
+    def pin_to_primary(self, client_key: str):
+        """Route this client's reads to the primary until its write has replicated"""
+        if not self.replicas:
+            return
+        pin = _primary_pin.get()
+        if pin is not None:
+            pin.pinned = True
+            pin.issued = make_pin_token(math.ceil(time.time() + DB_READ_YOUR_WRITES_SECONDS))
+        if not client_key:
+            return
+        now = time.monotonic()
+        if len(self._pinned_until) > 10000:
+            self._pinned_until = {key: until for key, until in self._pinned_until.items() if until > now}
+        self._pinned_until[client_key] = now + DB_READ_YOUR_WRITES_SECONDS
+
+    def _read_session_factory(self, client_key: str = None):
+        """Next usable replica (round robin), or the primary when pinned / all lag"""
+        pin = _primary_pin.get()
+        if pin is not None and pin.pinned:
+            return self.readonly_session_factory
+        if client_key and self._pinned_until.get(client_key, 0) > time.monotonic():
+            return self.readonly_session_factory
+        usable = [replica for replica in self.replicas if replica.usable]
+        if not usable:
+            return self.readonly_session_factory
+        self._replica_cursor = (self._replica_cursor + 1) % len(usable)
+        return usable[self._replica_cursor].session_factory
     
     @asynccontextmanager
-    async def get_session(self):
-        """Get async SQLAlchemy session"""
+    async def get_session(self, readonly: bool = False, client_key: str = None):
+        """
+        Get async SQLAlchemy session. Readonly sessions run a READ ONLY
+        transaction (possibly on a replica) that is never committed: closing
+        the session ends it and returns the connection to the pool.
+        """
         if not self.async_session_factory:
             raise RuntimeError("Database not initialized")
-        
-        async with self.async_session_factory() as session:
+
+        session_factory = self._read_session_factory(client_key) if readonly else self.async_session_factory
+        async with session_factory() as session:
             try:
                 yield session
-                await session.commit()
+                if not readonly:
+                    await session.commit()
             except Exception as e:
                 await session.rollback()
                 logger.error(f"Database session error: {e}")
@@ -173,23 +360,129 @@ class DatabaseManager:
     
     @asynccontextmanager
     async def get_connection(self):
-        """Get raw database connection from pool"""
-        if not self.pool:
-            raise RuntimeError("Database pool not initialized")
+        """Get a raw connection from the engine pool (committed on success, rolled back on error)"""
+        if not self.engine:
+            raise RuntimeError("Database not initialized")
         
-        async with self.pool.connection() as conn:
+        async with self.engine.begin() as conn:
             try:
                 yield conn
             except Exception as e:
                 logger.error(f"Database connection error: {e}")
                 raise
 
+    def pool_status(self):
+        """Checked-in/out counts of the shared pool"""
+        if not self.engine:
+            return {"initialized": False}
+        pool = self.engine.pool
+        return {
+            "initialized": True,
+            "size": pool.size(),
+            "max_overflow": self.max_overflow,
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow()
+        }
+
+    def replica_status(self):
+        return [
+            {
+                "host": replica.name,
+                "lag_seconds": replica.lag_seconds,
+                "usable": replica.usable,
+                "error": replica.error,
+                "checked_out": replica.engine.pool.checkedout()
+            }
+            for replica in self.replicas
+        ]
+
 # Global database manager instance
 db_manager = DatabaseManager()
 
+def _pool_connections():
+    """db_pool_connections gauge: size / in_use / idle / overflow per pool"""
+    pools = [("primary", db_manager.engine)] if db_manager.engine else []
+    pools += [(f"replica:{replica.name}", replica.engine) for replica in db_manager.replicas]
+    values = {}
+    for name, engine in pools:
+        pool = engine.pool
+        values[(name, "size")] = pool.size()
+        values[(name, "in_use")] = pool.checkedout()
+        values[(name, "idle")] = pool.checkedin()
+        values[(name, "overflow")] = max(pool.overflow(), 0)
+    return values
+
+metrics.gauge("db_pool_connections", "Pooled connections by state", ("pool", "state"), _pool_connections)
+
+def endpoint_from_path(path: str) -> str:
+    """Service endpoint name of a request path ("/search_flight" -> "search_flight")"""
+    return path.rstrip("/").rsplit("/", 1)[-1]
+
+def client_key(request: Request) -> str:
+    """Read-your-writes identity: X-Session-Id when sent, else the client address"""
+    return request.headers.get("x-session-id") or (request.client.host if request.client else None)
+
+class PrimaryPin:
+    """Read-your-writes state of one request, shared by the middleware and endpoint_session()"""
+
+    __slots__ = ("pinned", "issued")
+
+    def __init__(self, pinned: bool):
+        self.pinned = pinned  # reads go to the primary
+        self.issued: Optional[str] = None  # token to send back after a write
+
+_primary_pin: ContextVar[Optional[PrimaryPin]] = ContextVar("primary_pin", default=None)
+
+def _pin_signature(until: int) -> str:
+    return hmac.new(DB_PIN_SECRET, str(until).encode(), hashlib.sha256).hexdigest()[:32]
+
+def make_pin_token(until: int) -> str:
+    """Token "<unix time>.<signature>": read from the primary until then"""
+    return f"{until}.{_pin_signature(until)}"
+
+def valid_pin_token(token: Optional[str]) -> bool:
+    until, _, signature = (token or "").partition(".")
+    if not until.isdigit() or not hmac.compare_digest(signature, _pin_signature(int(until))):
+        return False
+    return int(until) > time.time()
+
+def start_pin_request(token: Optional[str]) -> PrimaryPin:
+    """Called per request by main.py's middleware with the token the client sent"""
+    pin = PrimaryPin(valid_pin_token(token))
+    _primary_pin.set(pin)
+    return pin
+
+@asynccontextmanager
+async def endpoint_session(endpoint_name: str, key: str = None):
+    """
+    Session for an endpoint by its service registry mode: 'none' endpoints
+    get no session (and no connection), 'read' endpoints a read-only session
+    that may be on a replica, 'write' endpoints the primary, after which the
+    client is pinned to it
+    """
+    from .service_registry import endpoint_access
+
+    mode = endpoint_access(endpoint_name)
+    if mode == "none":
+        yield None
+        return
+
+    if mode == "read":
+        async with db_manager.get_session(readonly=True, client_key=key) as session:
+            yield session
+        return
+
+    try:
+        async with db_manager.get_session() as session:
+            yield session
+    finally:
+        db_manager.pin_to_primary(key)
+
 # Dependency for FastAPI
-async def get_db_session():
-    async with db_manager.get_session() as session:
+async def get_db_session(request: Request):
+    """Session for the endpoint being called, see endpoint_session()"""
+    async with endpoint_session(endpoint_from_path(request.url.path), client_key(request)) as session:
         yield session
 
 async def get_db_connection():
@@ -199,8 +492,11 @@ async def get_db_connection():
 # Database initialization for app startup
 async def init_database():
     await db_manager.initialize()
+    db_manager.start_replica_monitor()
+    credential_cache.start(on_rotate=db_manager.rotate)
 
 async def close_database():
+    await credential_cache.stop()
     await db_manager.close()
 
 # Health check function
@@ -208,30 +504,24 @@ async def check_database_health():
     """Check if database is healthy"""
     try:
         async with db_manager.get_connection() as conn:
-            result = await conn.execute("SELECT 1")
-            return await result.fetchone() is not None
+            result = await conn.execute(text("SELECT 1"))
+            return result.scalar() is not None
     except Exception as e:
         logger.error(f"Database health check failed: {e}")
         return False
 
 # Utility functions for database operations
 async def execute_query(query: str, params: dict = None):
-    """Execute a raw SQL query"""
+    """Execute a raw SQL query (named :param placeholders)"""
     async with db_manager.get_connection() as conn:
-        if params:
-            result = await conn.execute(query, params)
-        else:
-            result = await conn.execute(query)
-        return await result.fetchall()
+        result = await conn.execute(text(query), params or {})
+        return result.fetchall()
 
 async def execute_single_query(query: str, params: dict = None):
     """Execute a query and return single result"""
     async with db_manager.get_connection() as conn:
-        if params:
-            result = await conn.execute(query, params)
-        else:
-            result = await conn.execute(query)
-        return await result.fetchone()
+        result = await conn.execute(text(query), params or {})
+        return result.fetchone()
 
 class DatabaseError(Exception):
     """Custom database exception"""
@@ -249,20 +539,63 @@ class PassengerNotFoundError(DatabaseError):
     """Passenger not found exception"""
     pass
 
-# Connection retry decorator
-def retry_db_operation(max_retries: int = 3, delay: float = 1.0):
-    """Decorator to retry database operations"""
+# Transient errors: serialization failure, deadlock, connection exceptions
+# (class 08) and server shutdown / crash recovery
+TRANSIENT_SQLSTATES = {"40001", "40P01", "57P01", "57P02", "57P03"}
+DB_RETRY_MAX_ATTEMPTS = int(os.getenv("DB_RETRY_MAX_ATTEMPTS", "4"))
+DB_RETRY_BASE_DELAY = float(os.getenv("DB_RETRY_BASE_DELAY", "0.05"))
+DB_RETRY_MAX_DELAY = float(os.getenv("DB_RETRY_MAX_DELAY", "1.0"))
+DB_RETRY_DEADLINE = float(os.getenv("DB_RETRY_DEADLINE", "5.0"))
+
+db_retries = metrics.counter(
+    "db_retries_total", "Retried units of work by outcome (retry, recovered, exhausted)", ("operation", "outcome"))
+
+def is_transient_error(error: BaseException) -> bool:
+    """True when re-running the unit of work in a new transaction may succeed"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, DBAPIError) and error.connection_invalidated:
+            return True
+        if isinstance(error, ConnectionError):
+            return True
+        sqlstate = getattr(error, "sqlstate", None) or getattr(getattr(error, "orig", None), "sqlstate", None)
+        if sqlstate and (sqlstate in TRANSIENT_SQLSTATES or sqlstate.startswith("08")):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+def retry_db_operation(max_attempts: int = DB_RETRY_MAX_ATTEMPTS, base_delay: float = DB_RETRY_BASE_DELAY,
+                       max_delay: float = DB_RETRY_MAX_DELAY, deadline: float = DB_RETRY_DEADLINE,
+                       operation: str = None):
+    """
+    Decorator re-running a whole unit of work on transient errors only.
+    The wrapped function must open its own session per call so every attempt
+    starts a fresh transaction. Sleeps use exponential backoff with full
+    jitter and never push past deadline seconds from the first attempt.
+    """
     def decorator(func):
+        name = operation or func.__name__
+
+        @functools.wraps(func)
         async def wrapper(*args, **kwargs):
-            for attempt in range(max_retries):
+            started = time.monotonic()
+            for attempt in range(1, max_attempts + 1):
                 try:
-                    return await func(*args, **kwargs)
+                    result = await func(*args, **kwargs)
+                    if attempt > 1:
+                        db_retries.inc(operation=name, outcome="recovered")
+                    return result
                 except Exception as e:
-                    if attempt == max_retries - 1:
-                        logger.error(f"Database operation failed after {max_retries} attempts: {e}")
+                    if not is_transient_error(e):
+                        raise
+                    delay = random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+                    if attempt == max_attempts or time.monotonic() - started + delay > deadline:
+                        db_retries.inc(operation=name, outcome="exhausted")
+                        logger.error(f"{name} failed after {attempt} attempts: {e}")
                         raise
-                    logger.warning(f"Database operation attempt {attempt + 1} failed: {e}, retrying...")
+                    db_retries.inc(operation=name, outcome="retry")
+                    logger.warning(f"{name} attempt {attempt} hit a transient error, retrying in {delay:.3f}s: {e}")
                     await asyncio.sleep(delay)
-            return None
         return wrapper
-    return decorator
\ No newline at end of file
+    return decorator
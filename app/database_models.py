@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Date, Time, Boolean, Text, ForeignKey, UniqueConstraint, Numeric
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Date, Time, Boolean, Text, ForeignKey, UniqueConstraint, Index, Numeric
 from decimal import Decimal as PyDecimal # Alias Python's Decimal if you still need it for other purposes, to avoid name collision with SQLAlchemy's DECIMAL/Numeric
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
@@ -125,6 +125,11 @@ class Flight(Base):
     gate = Column(String(10))
     terminal = Column(String(10))
     created_at = Column(DateTime, default=func.now())
+
+    __table_args__ = (
+        Index('idx_flights_number_date', 'flight_number', 'scheduled_departure'),
+        Index('idx_flights_route_departure', 'route_id', 'scheduled_departure'),
+    )
     
     # Relationships
     airline = relationship("Airline", back_populates="flights")
@@ -133,6 +138,7 @@ class Flight(Base):
     booking_segments = relationship("BookingSegment", back_populates="flight")
     flight_seats = relationship("FlightSeat", back_populates="flight")
     status_updates = relationship("FlightStatusUpdate", back_populates="flight")
+    inventory = relationship("FlightInventory", back_populates="flight")
 
 class Passenger(Base):
     __tablename__ = 'passengers'
@@ -235,6 +241,20 @@ class FlightSeat(Base):
     # Relationships
     flight = relationship("Flight", back_populates="flight_seats")
 
+class FlightInventory(Base):
+    """Seat counters per flight and cabin, maintained by the booking and seat paths"""
+    __tablename__ = 'flight_inventory'
+
+    flight_id = Column(Integer, ForeignKey('flights.id'), primary_key=True)
+    class_of_service = Column(String(20), primary_key=True)
+    capacity = Column(Integer, nullable=False, default=0)
+    booked = Column(Integer, nullable=False, default=0)
+    seats_assigned = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
+
+    # Relationships
+    flight = relationship("Flight", back_populates="inventory")
+
 class Baggage(Base):
     __tablename__ = 'baggage'
     
@@ -0,0 +1,157 @@
+"""
+HopJetAir Fare Engine
+Deterministic fares from route distance, cabin, advance purchase, season
+and load factor
+
+The distance, advance-purchase and season part of a route's fares is computed
+with NumPy for every departure day of the booking horizon and memoized per
+(distance, quote date) as one small vector. A quote is an index lookup into it
+times the cabin and load-factor multipliers, and identical requests always get
+identical prices.
+"""
+
+import math
+from datetime import date
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+CABINS = ('economy', 'premium_economy', 'business', 'first')
+CABIN_MULTIPLIERS = np.array([1.0, 1.6, 3.2, 5.5])
+
+# Distance taper: short sectors cost more per km
+BASE_FARE = 59.0
+RATE_PER_KM = ((0, 0.14), (1500, 0.10), (4000, 0.065))
+
+# Days between quote and departure: [0, 14) [14, 30) [30, 60) [60, ...)
+ADVANCE_PURCHASE_EDGES = np.array([14, 30, 60])
+ADVANCE_PURCHASE_MULTIPLIERS = np.array([1.5, 1.2, 1.0, 0.9])
+# Fare basis letters per advance-purchase bucket (economy)
+ADVANCE_PURCHASE_BOOKING_CLASSES = ('Y', 'B', 'M', 'H')
+
+# Index 0 = January
+SEASON_MULTIPLIERS = np.array([0.8, 0.8, 1.0, 1.0, 1.0, 1.3, 1.3, 1.3, 1.0, 1.0, 0.8, 1.3])
+
+# Load factor in 10% buckets: emptier flights sell their cheaper buckets
+LOAD_BUCKETS = 10
+LOAD_MULTIPLIERS = np.array([0.85, 0.9, 0.95, 1.0, 1.0, 1.05, 1.15, 1.25, 1.4, 1.6])
+
+# Departures further out than this are priced without the memoized table
+HORIZON_DAYS = 400
+# One HORIZON_DAYS float vector (~3 KiB) per distinct route distance and quote date
+FARE_TABLE_CACHE_SIZE = 256
+
+
+def distance_fare(distance_km: float) -> float:
+    """Economy base fare for a sector of the given length"""
+    fare, previous_edge, previous_rate = BASE_FARE, 0, RATE_PER_KM[0][1]
+    for edge, rate in RATE_PER_KM[1:]:
+        if distance_km <= edge:
+            break
+        fare += (edge - previous_edge) * previous_rate
+        previous_edge, previous_rate = edge, rate
+    return fare + max(distance_km - previous_edge, 0) * previous_rate
+
+
+def load_bucket(booked: Optional[int], capacity: Optional[int]) -> int:
+    """Load-factor bucket 0..9 for a cabin; unknown capacity counts as half full"""
+    if not capacity:
+        return LOAD_BUCKETS // 2
+    return min(max(int((booked or 0) * LOAD_BUCKETS // capacity), 0), LOAD_BUCKETS - 1)
+
+
+def _compute(distance_km: float, departures: np.ndarray, quote_date: date) -> np.ndarray:
+    """Cabin- and load-independent fare per departure for an array of datetime64[D] departures"""
+    days_ahead = (departures - np.datetime64(quote_date, 'D')).astype(int)
+    advance = ADVANCE_PURCHASE_MULTIPLIERS[np.searchsorted(ADVANCE_PURCHASE_EDGES, np.maximum(days_ahead, 0), side='right')]
+    months = departures.astype('datetime64[M]').astype(int) % 12
+    season = SEASON_MULTIPLIERS[months]
+
+    return distance_fare(distance_km) * advance * season
+
+
+def _apply(per_day: np.ndarray, cabin_index: int, buckets: np.ndarray) -> np.ndarray:
+    return np.round(CABIN_MULTIPLIERS[cabin_index] * per_day * LOAD_MULTIPLIERS[buckets], 2)
+
+
+@lru_cache(maxsize=FARE_TABLE_CACHE_SIZE)
+def fare_table(distance_km: int, quote_date: date) -> np.ndarray:
+    """
+    Memoized per-day fares for departures quote_date .. quote_date + HORIZON_DAYS,
+    before the cabin and load multipliers; the array is read-only
+    """
+    departures = np.datetime64(quote_date, 'D') + np.arange(HORIZON_DAYS)
+    table = _compute(distance_km, departures, quote_date)
+    table.setflags(write=False)
+    return table
+
+
+def _cabin_index(cabin: str) -> int:
+    cabin = (cabin or 'economy').lower().replace(' ', '_').replace('-', '_')
+    return CABINS.index(cabin) if cabin in CABINS else 0
+
+
+def fares(distance_km: float, cabin: str, departures: Sequence[date], buckets: Iterable[int],
+          quote_date: Optional[date] = None) -> np.ndarray:
+    """Vectorized fares for many departure days (each with its own load bucket) on one route"""
+    quote_date = quote_date or date.today()
+    distance_km = int(round(distance_km or 0))
+    day_offsets = np.array([(d - quote_date).days for d in departures], dtype=int)
+    buckets = np.clip(np.fromiter(buckets, dtype=int, count=len(day_offsets)), 0, LOAD_BUCKETS - 1)
+    cabin_index = _cabin_index(cabin)
+
+    in_horizon = (day_offsets >= 0) & (day_offsets < HORIZON_DAYS)
+    result = np.empty(len(day_offsets))
+    if in_horizon.any():
+        per_day = fare_table(distance_km, quote_date)[day_offsets[in_horizon]]
+        result[in_horizon] = _apply(per_day, cabin_index, buckets[in_horizon])
+    if (~in_horizon).any():
+        outside = np.array([np.datetime64(d, 'D') for d, keep in zip(departures, in_horizon) if not keep])
+        result[~in_horizon] = _apply(_compute(distance_km, outside, quote_date), cabin_index, buckets[~in_horizon])
+    return result
+
+
+def quote(distance_km: float, cabin: str, departure: date, bucket: int = LOAD_BUCKETS // 2,
+          quote_date: Optional[date] = None) -> float:
+    """Single fare per person"""
+    return float(fares(distance_km, cabin, [departure], [bucket], quote_date)[0])
+
+
+def max_bucket_within(distance_km: float, cabin: str, departure: date, ceiling: float,
+                      quote_date: Optional[date] = None) -> int:
+    """
+    Highest load bucket whose fare is <= ceiling on that departure, or -1 when
+    even the emptiest bucket is too expensive (fares never fall as load rises)
+    """
+    bucket_fares = fares(distance_km, cabin, [departure] * LOAD_BUCKETS, range(LOAD_BUCKETS), quote_date)
+    return int(np.searchsorted(bucket_fares, ceiling, side='right')) - 1
+
+
+def cabin_quotes(distance_km: float, departure: date, bucket: int = LOAD_BUCKETS // 2,
+                 quote_date: Optional[date] = None) -> Dict[str, float]:
+    """Fare per cabin for one departure"""
+    return {cabin: quote(distance_km, cabin, departure, bucket, quote_date) for cabin in CABINS}
+
+
+def booking_class(cabin: str, departure: date, quote_date: Optional[date] = None) -> str:
+    """Fare basis letter: advance-purchase bucket in economy, cabin initial otherwise"""
+    if _cabin_index(cabin) != 0:
+        return CABINS[_cabin_index(cabin)][0].upper()
+    days_ahead = max((departure - (quote_date or date.today())).days, 0)
+    return ADVANCE_PURCHASE_BOOKING_CLASSES[int(np.searchsorted(ADVANCE_PURCHASE_EDGES, days_ahead, side='right'))]
+
+
+def great_circle_km(lat1: Optional[float], lon1: Optional[float], lat2: Optional[float], lon2: Optional[float]) -> Optional[float]:
+    """Haversine distance, None when a coordinate is missing"""
+    if None in (lat1, lon1, lat2, lon2):
+        return None
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi, d_lambda = phi2 - phi1, math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+
+def fare_cache_info() -> Dict[str, int]:
+    info = fare_table.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "size": info.currsize, "max_size": info.maxsize}
@@ -1,16 +1,289 @@
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from typing import Dict, List, Optional, Any
+import base64
+import json
 import random
 import string
-from sqlalchemy.orm import joinedload
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy.orm import joinedload, aliased
+from sqlalchemy import select, and_, or_, func, case, literal, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 from .database_models import *
-from .database_connection import DatabaseError, BookingNotFoundError, FlightNotFoundError, PassengerNotFoundError
+from . import statements
+from . import read_models
+from .database_connection import DatabaseError, BookingNotFoundError, FlightNotFoundError, PassengerNotFoundError, is_transient_error
+from .query_helpers import on_day, between_days, day_bounds, parse_date, in_time_of_day
+from .airport_resolver import airport_resolver
+from .route_graph import route_graph, FlightDayIndex, minimum_connection_minutes
+from . import fare_engine
+from .fare_engine import load_bucket
+from .search_cache import search_cache
+from . import seat_inventory
+
+CABIN_CLASSES = ('economy', 'premium_economy', 'business', 'first')
+MAX_ITINERARIES = 10
+MAX_CALENDAR_DAYS = 62
+
+# search_flights keyset pagination: sort key columns (the flight id is always the tiebreaker)
+SEARCH_SORT_KEYS = {
+    'price': ['economy_bucket', 'scheduled_departure'],
+    'time': ['scheduled_departure'],
+    'arrival': ['scheduled_arrival'],
+}
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
 #done
 class FlightSearchService:
     @staticmethod
+    def _flight_inventory_query():
+        """
+        Flights joined to airline and aircraft type, with booked seat counts
+        per cabin read from flight_inventory (callers add the filters)
+        """
+        inventory = {cabin: aliased(FlightInventory, name=f"inventory_{cabin}") for cabin in CABIN_CLASSES}
+        stmt = (
+            select(
+                Flight.id,
+                Flight.flight_number,
+                Flight.route_id,
+                Flight.scheduled_departure,
+                Flight.scheduled_arrival,
+                Flight.status,
+                Flight.gate,
+                Flight.terminal,
+                Airline.name.label("airline_name"),
+                Airline.iata_code.label("airline_code"),
+                AircraftType.manufacturer,
+                AircraftType.model,
+                AircraftType.total_seats,
+                *[
+                    func.coalesce(inventory[cabin].capacity, getattr(AircraftType, f"seats_{cabin}")).label(f"seats_{cabin}")
+                    for cabin in CABIN_CLASSES
+                ],
+                sum(func.coalesce(inventory[cabin].booked, 0) for cabin in CABIN_CLASSES).label("booked_seats"),
+                *[
+                    func.coalesce(inventory[cabin].booked, 0).label(f"booked_{cabin}")
+                    for cabin in CABIN_CLASSES
+                ]
+            )
+            .join(Airline, Flight.airline_id == Airline.id)
+            .join(Aircraft, Flight.aircraft_id == Aircraft.id)
+            .join(AircraftType, Aircraft.aircraft_type_id == AircraftType.id)
+        )
+        for cabin, row in inventory.items():
+            stmt = stmt.outerjoin(row, and_(row.flight_id == Flight.id, row.class_of_service == cabin))
+        return stmt.order_by(Flight.scheduled_departure, Flight.id)
+
+    @staticmethod
+    def _flight_result(row, route) -> Dict[str, Any]:
+        """Build the search response entry for one row of _flight_inventory_query"""
+        seats_by_cabin = {}
+        for cabin in CABIN_CLASSES:
+            capacity = getattr(row, f"seats_{cabin}") or 0
+            if capacity:
+                seats_by_cabin[cabin] = max(capacity - getattr(row, f"booked_{cabin}"), 0)
+
+        departure_day = row.scheduled_departure.date()
+        return {
+            "flight_id": row.id,
+            "flight_number": row.flight_number,
+            "airline": row.airline_name,
+            "airline_code": row.airline_code,
+            "aircraft_type": f"{row.manufacturer} {row.model}",
+            "departure_time": row.scheduled_departure.isoformat(),
+            "arrival_time": row.scheduled_arrival.isoformat(),
+            "duration_minutes": route.flight_duration_minutes,
+            "booked_seats": row.booked_seats,
+            "available_seats": (row.total_seats or 0) - row.booked_seats,
+            "seats_by_cabin": seats_by_cabin,
+            "price_economy": fare_engine.quote(
+                route.distance_km, 'economy', departure_day, load_bucket(row.booked_economy, row.seats_economy)
+            ),
+            "price_business": fare_engine.quote(
+                route.distance_km, 'business', departure_day, load_bucket(row.booked_business, row.seats_business)
+            ),
+            "status": row.status,
+            "gate": row.gate,
+            "terminal": row.terminal
+        }
+
+    @staticmethod
+    async def _search_connections(db: AsyncSession, origin_airport, dest_airport, search_date: date) -> List[Dict[str, Any]]:
+        """
+        One- and two-stop itineraries for an airport pair without a direct route.
+        Paths come from the in-memory route graph; every leg's candidate flights
+        are fetched in a single query and joined up in memory.
+        """
+        paths = route_graph.connection_paths(origin_airport.id, dest_airport.id)
+        if not paths:
+            return []
+
+        # Later legs may depart the next day
+        first_day_start, _ = day_bounds(search_date)
+        window_end = first_day_start + timedelta(days=2)
+        route_ids = {edge.id for path in paths for edge in path}
+        leg_stmt = FlightSearchService._flight_inventory_query().where(
+            Flight.route_id.in_(route_ids),
+            Flight.scheduled_departure >= first_day_start,
+            Flight.scheduled_departure < window_end,
+            Flight.status.in_(['scheduled', 'boarding'])
+        )
+        rows = [
+            row for row in (await db.execute(leg_stmt)).all()
+            if (row.total_seats or 0) - row.booked_seats > 0
+        ]
+        index = FlightDayIndex(rows)
+
+        itineraries = []
+        for path in paths:
+            first_edge = path[0]
+            for first_row in index.departing_between(first_edge.id, *day_bounds(search_date)):
+                legs, layovers = [(first_row, first_edge)], []
+                for previous_edge, edge in zip(path, path[1:]):
+                    previous_row = legs[-1][0]
+                    hub = airport_resolver.get(edge.origin_airport_id)
+                    mct = minimum_connection_minutes(
+                        getattr(airport_resolver.get(previous_edge.origin_airport_id), 'country', None),
+                        getattr(hub, 'country', None),
+                        getattr(airport_resolver.get(edge.destination_airport_id), 'country', None)
+                    )
+                    next_row = index.next_connection(edge.id, previous_row.scheduled_arrival, mct)
+                    if next_row is None:
+                        break
+                    layovers.append({
+                        "airport": hub.iata_code if hub else None,
+                        "minutes": int((next_row.scheduled_departure - previous_row.scheduled_arrival).total_seconds() // 60),
+                        "minimum_connection_minutes": mct
+                    })
+                    legs.append((next_row, edge))
+                else:
+                    itineraries.append(FlightSearchService._itinerary_result(legs, layovers))
+
+        itineraries.sort(key=lambda i: (i["arrival_time"], i["stops"], i["departure_time"]))
+        return itineraries[:MAX_ITINERARIES]
+
+    @staticmethod
+    def _itinerary_result(legs, layovers) -> Dict[str, Any]:
+        leg_results = []
+        for row, edge in legs:
+            leg = FlightSearchService._flight_result(row, edge)
+            leg.update({
+                "origin": airport_resolver.get(edge.origin_airport_id).iata_code,
+                "destination": airport_resolver.get(edge.destination_airport_id).iata_code,
+            })
+            leg_results.append(leg)
+
+        departure, arrival = legs[0][0].scheduled_departure, legs[-1][0].scheduled_arrival
+        return {
+            "stops": len(legs) - 1,
+            "connection_airports": [layover["airport"] for layover in layovers],
+            "departure_time": departure.isoformat(),
+            "arrival_time": arrival.isoformat(),
+            "total_duration_minutes": int((arrival - departure).total_seconds() // 60),
+            "total_distance_km": sum(edge.distance_km for _, edge in legs),
+            "available_seats": min(leg["available_seats"] for leg in leg_results),
+            "price_economy": round(sum(leg["price_economy"] for leg in leg_results), 2),
+            "price_business": round(sum(leg["price_business"] for leg in leg_results), 2),
+            "legs": leg_results,
+            "layovers": layovers
+        }
+
+    @staticmethod
+    def _bucket_from_ratio(ratio) -> int:
+        """Load bucket from a booked/capacity ratio computed in SQL (None when the cabin is absent)"""
+        if ratio is None:
+            return fare_engine.LOAD_BUCKETS // 2
+        return min(int(float(ratio) * fare_engine.LOAD_BUCKETS), fare_engine.LOAD_BUCKETS - 1)
+
+    @staticmethod
+    async def _fare_calendar(db: AsyncSession, origin_airport, dest_airport, route, window: Dict[str, Any], search_date: date) -> Dict[str, Any]:
+        """
+        Lowest fare and seat availability for every day of departure_window,
+        aggregated per day in SQL from one range query over the route
+        """
+        start_day = parse_date(window.get('start'), search_date)
+        end_day = parse_date(window.get('end'), start_day)
+        if end_day < start_day:
+            start_day, end_day = end_day, start_day
+        end_day = min(end_day, start_day + timedelta(days=MAX_CALENDAR_DAYS - 1))
+
+        calendar = {
+            "status": "success",
+            "mode": "calendar",
+            "origin": {"code": origin_airport.iata_code, "name": origin_airport.name, "city": origin_airport.city},
+            "destination": {"code": dest_airport.iata_code, "name": dest_airport.name, "city": dest_airport.city},
+            "window": {"start": start_day.isoformat(), "end": end_day.isoformat()},
+            "days": [],
+            "cheapest_day": None
+        }
+        if not route:
+            calendar["message"] = "No direct flights available"
+            return calendar
+
+        flights = FlightSearchService._flight_inventory_query().where(
+            Flight.route_id == route.id,
+            between_days(Flight.scheduled_departure, start_day, end_day),
+            Flight.status.in_(['scheduled', 'boarding'])
+        ).subquery()
+        day = func.date_trunc('day', flights.c.scheduled_departure).label('day')
+        remaining_by_cabin = [
+            func.sum(func.coalesce(flights.c[f"seats_{cabin}"], 0) - flights.c[f"booked_{cabin}"]).label(f"remaining_{cabin}")
+            for cabin in CABIN_CLASSES
+        ]
+        # The emptiest flight of the day sells the lowest fare
+        lowest_load = [
+            func.min(flights.c[f"booked_{cabin}"] * 1.0 / func.nullif(flights.c[f"seats_{cabin}"], 0)).label(f"min_load_{cabin}")
+            for cabin in ('economy', 'business')
+        ]
+        day_stmt = (
+            select(
+                day,
+                func.count().label('flights'),
+                func.sum(func.coalesce(flights.c.total_seats, 0) - flights.c.booked_seats).label('available_seats'),
+                func.min(flights.c.scheduled_departure).label('first_departure'),
+                *remaining_by_cabin,
+                *lowest_load
+            )
+            .group_by(day)
+            .order_by(day)
+        )
+        by_day = {row.day.date(): row for row in (await db.execute(day_stmt)).all()}
+
+        open_days = sorted(day for day, row in by_day.items() if row.available_seats > 0)
+        lowest_fares = {
+            cabin: dict(zip(open_days, fare_engine.fares(
+                route.distance_km, cabin, open_days,
+                [FlightSearchService._bucket_from_ratio(getattr(by_day[day], f"min_load_{cabin}")) for day in open_days]
+            ).tolist()))
+            for cabin in ('economy', 'business')
+        }
+
+        current = start_day
+        while current <= end_day:
+            row = by_day.get(current)
+            entry = {"date": current.isoformat(), "flights": 0, "available_seats": 0, "seats_by_cabin": {},
+                     "lowest_fare_economy": None, "lowest_fare_business": None}
+            if row is not None:
+                # A sold-out day still lists its flights, with no seats and no fares
+                entry.update({
+                    "flights": row.flights,
+                    "available_seats": max(int(row.available_seats), 0),
+                    "seats_by_cabin": {cabin: max(int(getattr(row, f"remaining_{cabin}") or 0), 0) for cabin in CABIN_CLASSES},
+                    "first_departure": row.first_departure.isoformat(),
+                    "lowest_fare_economy": lowest_fares['economy'].get(current),
+                    "lowest_fare_business": lowest_fares['business'].get(current),
+                })
+            calendar["days"].append(entry)
+            current += timedelta(days=1)
+
+        priced = [d for d in calendar["days"] if d["lowest_fare_economy"] is not None]
+        if priced:
+            calendar["cheapest_day"] = min(priced, key=lambda d: d["lowest_fare_economy"])["date"]
+        return calendar
+
+    @staticmethod
+    @search_cache.cached('search_flight')
     async def search_flight(db: AsyncSession, params: Dict[str, Any]) -> Dict[str, Any]:
         """Search for available flights"""
         try:
@@ -19,15 +292,9 @@ class FlightSearchService:
             departure_date = params.get('departure_date', params.get('date'))
 
             # Get airports
-            origin_stmt = select(Airport).where(
-                or_(Airport.iata_code == origin, Airport.city.ilike(f"%{origin}%"))
-            )
-            dest_stmt = select(Airport).where(
-                or_(Airport.iata_code == destination, Airport.city.ilike(f"%{destination}%"))
-            )
-
-            origin_airport = (await db.execute(origin_stmt)).scalars().first()
-            dest_airport = (await db.execute(dest_stmt)).scalars().first()
+            await airport_resolver.ensure_loaded(db)
+            origin_airport = airport_resolver.resolve(origin)
+            dest_airport = airport_resolver.resolve(destination)
             
             print(f"DEBUG: Origin airport found: {origin_airport.name if origin_airport else 'None'}")
             print(f"DEBUG: Destination airport found: {dest_airport.name if dest_airport else 'None'}")            
@@ -54,63 +321,37 @@ class FlightSearchService:
                 search_date = departure_date
 
             # Find route
-            route_stmt = select(Route).where(
-                Route.origin_airport_id == origin_airport.id,
-                Route.destination_airport_id == dest_airport.id
-            )
-            route = (await db.execute(route_stmt)).scalars().first()
+            await route_graph.ensure_loaded(db)
+            route = route_graph.direct(origin_airport.id, dest_airport.id)
 
             print(f"DEBUG: Route found: {route is not None}")
 
+            if params.get('flexible_dates'):
+                return await FlightSearchService._fare_calendar(
+                    db, origin_airport, dest_airport, route, params.get('departure_window') or {}, search_date
+                )
+
             if not route:
+                connections = await FlightSearchService._search_connections(
+                    db, origin_airport, dest_airport, search_date
+                )
                 return {
                     "status": "success",
                     "message": "No direct flights available",
-                    "flights": []
+                    "flights": [],
+                    "connections": connections,
+                    "total_results": len(connections)
                 }
 
-            # Search flights with joinedload to avoid lazy-loading errors
-            flight_stmt = (
-                select(Flight)
-                .options(
-                    joinedload(Flight.airline),
-                    joinedload(Flight.aircraft).joinedload(Aircraft.aircraft_type),
-                    joinedload(Flight.route)
-                )
-                .where(
-                    Flight.route_id == route.id,
-                    func.date(Flight.scheduled_departure) == search_date,
-                    Flight.status.in_(['scheduled', 'boarding'])
-                )
+            # One query: flights with airline/aircraft details and booked seats per cabin
+            flight_stmt = FlightSearchService._flight_inventory_query().where(
+                Flight.route_id == route.id,
+                on_day(Flight.scheduled_departure, search_date),
+                Flight.status.in_(['scheduled', 'boarding'])
             )
-            flights = (await db.execute(flight_stmt)).scalars().all()
+            rows = (await db.execute(flight_stmt)).all()
 
-            flight_results = []
-            for flight in flights:
-                # Calculate available seats
-                booked_stmt = select(func.count()).where(
-                    BookingSegment.flight_id == flight.id
-                )
-                booked_seats = (await db.execute(booked_stmt)).scalar()
-
-                available_seats = flight.aircraft.aircraft_type.total_seats - booked_seats
-
-                flight_info = {
-                    "flight_id": flight.id,
-                    "flight_number": flight.flight_number,
-                    "airline": flight.airline.name,
-                    "aircraft_type": f"{flight.aircraft.aircraft_type.manufacturer} {flight.aircraft.aircraft_type.model}",
-                    "departure_time": flight.scheduled_departure.isoformat(),
-                    "arrival_time": flight.scheduled_arrival.isoformat(),
-                    "duration_minutes": route.flight_duration_minutes,
-                    "available_seats": available_seats,
-                    "price_economy": float(Decimal(str(random.uniform(200, 800)))),
-                    "price_business": float(Decimal(str(random.uniform(800, 2000)))),
-                    "status": flight.status,
-                    "gate": flight.gate,
-                    "terminal": flight.terminal
-                }
-                flight_results.append(flight_info)
+            flight_results = [FlightSearchService._flight_result(row, route) for row in rows]
 
             return {
                 "status": "success",
@@ -136,42 +377,108 @@ class FlightSearchService:
                 "flights": []
             }
     @staticmethod
+    def _load_bucket_expr(booked, capacity):
+        """SQL twin of fare_engine.load_bucket: floor(booked * 10 / capacity) capped at 9"""
+        return case(
+            (func.coalesce(capacity, 0) == 0, fare_engine.LOAD_BUCKETS // 2),
+            else_=func.least(booked * fare_engine.LOAD_BUCKETS // capacity, fare_engine.LOAD_BUCKETS - 1)
+        )
+
+    @staticmethod
+    def _encode_cursor(values: List[Any]) -> str:
+        payload = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, sort_by: str) -> List[Any]:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        # Timestamps sit right before the trailing id in every sort key
+        values[-2] = datetime.fromisoformat(values[-2])
+        if len(values) != len(SEARCH_SORT_KEYS[sort_by]) + 1:
+            raise ValueError("Cursor does not match sort_by")
+        return values
+
+    @staticmethod
     async def search_flights(db: AsyncSession, params: Dict[str, Any]) -> Dict[str, Any]:
         """Search flights with advanced filters"""
         try:
-            # Similar to search_flight but with more filtering options
-            result = await FlightSearchService.search_flight(db, params)
-            
-            # Add advanced filtering
-            if result["status"] == "success" and result["flights"]:
-                flights = result["flights"]
-                
-                # Filter by budget
-                max_price = params.get('max_price', params.get('budget', 10000))
-                if max_price:
-                    flights = [f for f in flights if f["price_economy"] <= max_price]
-                
-                # Filter by time preference
-                preferred_time = params.get('preferred_time', params.get('preferred_departure_time'))
-                if preferred_time:
-                    if preferred_time.lower() == 'morning':
-                        flights = [f for f in flights if 6 <= datetime.fromisoformat(f["departure_time"]).hour <= 11]
-                    elif preferred_time.lower() == 'afternoon':
-                        flights = [f for f in flights if 12 <= datetime.fromisoformat(f["departure_time"]).hour <= 17]
-                    elif preferred_time.lower() == 'evening':
-                        flights = [f for f in flights if 18 <= datetime.fromisoformat(f["departure_time"]).hour <= 23]
-                
-                # Sort by preference
-                sort_by = params.get('sort_by', 'price')
-                if sort_by == 'price':
-                    flights.sort(key=lambda x: x["price_economy"])
-                elif sort_by == 'time':
-                    flights.sort(key=lambda x: x["departure_time"])
-                
-                result["flights"] = flights
-                result["total_results"] = len(flights)
-            
-            return result
+            origin = params.get('origin', 'Chicago')
+            destination = params.get('destination', 'Madrid')
+            search_date = parse_date(params.get('departure_date', params.get('date')), datetime.now().date())
+
+            await airport_resolver.ensure_loaded(db)
+            await route_graph.ensure_loaded(db)
+            origin_airport = airport_resolver.resolve(origin)
+            dest_airport = airport_resolver.resolve(destination)
+            route = route_graph.direct(origin_airport.id, dest_airport.id) if origin_airport and dest_airport else None
+            if not route:
+                # Airport errors and connecting itineraries come from the basic search
+                return await FlightSearchService.search_flight(db, params)
+
+            sort_by = params.get('sort_by', 'price')
+            if sort_by not in SEARCH_SORT_KEYS:
+                sort_by = 'price'
+            limit = max(1, min(int(params.get('limit') or DEFAULT_PAGE_SIZE), MAX_PAGE_SIZE))
+
+            # Time-of-day window narrows the index range itself
+            preferred_time = params.get('preferred_time', params.get('preferred_departure_time'))
+            inner = FlightSearchService._flight_inventory_query().order_by(None).where(
+                Flight.route_id == route.id,
+                in_time_of_day(Flight.scheduled_departure, search_date, preferred_time),
+                Flight.status.in_(['scheduled', 'boarding'])
+            ).subquery()
+
+            economy_bucket = FlightSearchService._load_bucket_expr(inner.c.booked_economy, inner.c.seats_economy).label('economy_bucket')
+            sort_columns = {
+                'price': [economy_bucket, inner.c.scheduled_departure],
+                'time': [inner.c.scheduled_departure],
+                'arrival': [inner.c.scheduled_arrival],
+            }[sort_by] + [inner.c.id]
+            stmt = select(inner, economy_bucket)
+
+            # Price ceiling -> highest load bucket whose economy fare fits
+            max_price = params.get('max_price', params.get('budget', 10000))
+            if max_price:
+                max_bucket = fare_engine.max_bucket_within(route.distance_km, 'economy', search_date, float(max_price))
+                stmt = stmt.where(economy_bucket <= max_bucket)
+
+            cursor = params.get('cursor')
+            if cursor:
+                after = FlightSearchService._decode_cursor(cursor, sort_by)
+                stmt = stmt.where(tuple_(*sort_columns) > tuple_(*[literal(v) for v in after]))
+
+            stmt = stmt.order_by(*sort_columns).limit(limit + 1)
+            rows = (await db.execute(stmt)).all()
+
+            page, has_more = rows[:limit], len(rows) > limit
+            next_cursor = None
+            if has_more:
+                last = page[-1]
+                next_cursor = FlightSearchService._encode_cursor(
+                    [getattr(last, key) for key in SEARCH_SORT_KEYS[sort_by]] + [last.id]
+                )
+
+            flights = [FlightSearchService._flight_result(row, route) for row in page]
+            return {
+                "status": "success",
+                "origin": {
+                    "code": origin_airport.iata_code,
+                    "name": origin_airport.name,
+                    "city": origin_airport.city
+                },
+                "destination": {
+                    "code": dest_airport.iata_code,
+                    "name": dest_airport.name,
+                    "city": dest_airport.city
+                },
+                "date": search_date.isoformat(),
+                "flights": flights,
+                "total_results": len(flights),
+                "sort_by": sort_by,
+                "limit": limit,
+                "next_cursor": next_cursor
+            }
             
         except Exception as e:
             return {
@@ -193,66 +500,12 @@ class FlightStatusService:
                 if date_str else datetime.now().date()
             )
 
-            # Query flight
-            stmt = (
-                select(Flight)
-                .options(
-                    joinedload(Flight.route).joinedload(Route.origin_airport),
-                    joinedload(Flight.route).joinedload(Route.destination_airport),
-                    joinedload(Flight.airline)
-                )
-                .where(
-                    and_(
-                        Flight.flight_number == flight_number,
-                        func.date(Flight.scheduled_departure) == search_date
-                    )
-                )
-            )
-            flight = (await db.execute(stmt)).scalars().first()
+            # Core read path: flight, route, airline and latest update in one query
+            status_info = await read_models.flight_status(db, flight_number, search_date)
 
-            if not flight:
+            if not status_info:
                 raise FlightNotFoundError(f"Flight {flight_number} not found for {search_date}")
 
-            # Query latest status update
-            update_stmt = (
-                select(FlightStatusUpdate)
-                .where(FlightStatusUpdate.flight_id == flight.id)
-                .order_by(FlightStatusUpdate.update_time.desc())
-            )
-            latest_update = (await db.execute(update_stmt)).scalars().first()
-
-            route = flight.route
-            origin_airport = route.origin_airport
-            dest_airport = route.destination_airport
-
-            status_info = {
-                "flight_number": flight.flight_number,
-                "airline": flight.airline.name,
-                "status": flight.status,
-                "origin": {
-                    "code": origin_airport.iata_code,
-                    "name": origin_airport.name,
-                    "city": origin_airport.city
-                },
-                "destination": {
-                    "code": dest_airport.iata_code,
-                    "name": dest_airport.name,
-                    "city": dest_airport.city
-                },
-                "scheduled_departure": flight.scheduled_departure.isoformat(),
-                "scheduled_arrival": flight.scheduled_arrival.isoformat(),
-                "gate": flight.gate,
-                "terminal": flight.terminal
-            }
-
-            if latest_update:
-                status_info.update({
-                    "actual_departure": latest_update.new_departure_time.isoformat() if latest_update.new_departure_time else None,
-                    "actual_arrival": latest_update.new_arrival_time.isoformat() if latest_update.new_arrival_time else None,
-                    "delay_minutes": latest_update.delay_minutes,
-                    "update_reason": latest_update.reason
-                })
-
             return {
                 "status": "success",
                 "flight_status": status_info
@@ -276,6 +529,41 @@ class FlightStatusService:
 
 class FlightAvailabilityService:
     @staticmethod
+    async def _cabin_seats_left(db: AsyncSession, flight_ids: List[int], cabin: str) -> Dict[int, int]:
+        """
+        Free seats in one cabin for many flights in one grouped query: the
+        aircraft type's unblocked seat map for the cabin minus occupied seats
+        """
+        if not flight_ids:
+            return {}
+        occupied = and_(
+            FlightSeat.flight_id == Flight.id,
+            FlightSeat.seat_number == SeatMap.seat_number,
+            FlightSeat.status == 'occupied'
+        )
+        stmt = (
+            select(
+                Flight.id,
+                func.count(SeatMap.id).label("cabin_seats"),
+                func.count(FlightSeat.id).label("occupied_seats")
+            )
+            .join(Aircraft, Flight.aircraft_id == Aircraft.id)
+            .join(SeatMap, and_(
+                SeatMap.aircraft_type_id == Aircraft.aircraft_type_id,
+                SeatMap.class_of_service == cabin,
+                SeatMap.is_blocked.isnot(True)
+            ))
+            .outerjoin(FlightSeat, occupied)
+            .where(Flight.id.in_(flight_ids))
+            .group_by(Flight.id)
+        )
+        return {
+            row.id: row.cabin_seats - row.occupied_seats
+            for row in (await db.execute(stmt)).all()
+        }
+
+    @staticmethod
+    @search_cache.cached('check_flight_availability')
     async def check_flight_availability(db: AsyncSession, params: Dict[str, Any]) -> Dict[str, Any]:
         """Check flight availability"""
         try:
@@ -294,19 +582,26 @@ class FlightAvailabilityService:
             result = await FlightSearchService.search_flight(db, search_params)
             
             if result["status"] == "success":
-                # Filter by class availability
+                cabin = seat_inventory.normalize_cabin(class_of_service)
+                seats_left = await FlightAvailabilityService._cabin_seats_left(
+                    db, [flight["flight_id"] for flight in result["flights"]], cabin
+                )
+
+                # Keep flights with seats left in the requested cabin
                 available_flights = []
                 for flight in result["flights"]:
-                    class_available = True  # Simplified - in real system would check actual seat availability
-                    if class_available:
+                    # Aircraft types without a seat map fall back to the cabin counters
+                    cabin_seats = seats_left.get(flight["flight_id"], flight["seats_by_cabin"].get(cabin, 0))
+                    if cabin_seats > 0:
                         flight_info = {
+                            "flight_id": flight["flight_id"],
                             "flight_number": flight["flight_number"],
                             "airline": flight["airline"],
                             "departure_time": flight["departure_time"],
                             "arrival_time": flight["arrival_time"],
-                            "available_seats": flight["available_seats"],
+                            "available_seats": cabin_seats,
                             "class_of_service": class_of_service,
-                            "price": flight["price_economy"] if class_of_service == "economy" else flight["price_business"]
+                            "price": flight["price_economy"] if cabin == "economy" else flight["price_business"]
                         }
                         available_flights.append(flight_info)
                 
@@ -328,6 +623,7 @@ class FlightAvailabilityService:
             }
     
     @staticmethod
+    @search_cache.cached('query_flight_availability')
     async def query_flight_availability(db: AsyncSession, params: Dict[str, Any]) -> Dict[str, Any]:
         """Query flight availability with time preferences"""
         try:
@@ -359,15 +655,13 @@ class FlightAvailabilityService:
             new_date = params.get('new_date')
 
             # Get current booking
-            booking_stmt = select(Booking).where(Booking.booking_reference == booking_ref)
-            booking = (await db.execute(booking_stmt)).scalars().first()
+            booking = await statements.first(db, statements.BOOKING_BY_REFERENCE, booking_ref=booking_ref)
 
             if not booking:
                 raise BookingNotFoundError(f"Booking {booking_ref} not found")
 
             # Get first segment
-            segment_stmt = select(BookingSegment).where(BookingSegment.booking_id == booking.id)
-            segment = (await db.execute(segment_stmt)).scalars().first()
+            segment = await statements.first(db, statements.SEGMENT_BY_BOOKING, booking_id=booking.id)
 
             if not segment:
                 return {"status": "error", "message": "No flight segments found"}
@@ -414,16 +708,14 @@ class FlightBookingService:
             # Generate unique booking reference
             booking_ref = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
             while True:
-                stmt = select(Booking).where(Booking.booking_reference == booking_ref)
-                existing = (await db.execute(stmt)).scalars().first()
+                existing = await statements.first(db, statements.BOOKING_BY_REFERENCE, booking_ref=booking_ref)
                 if not existing:
                     break
                 booking_ref = ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
 
             # Find or create passenger
             passenger_email = params.get('contact', 'passenger@example.com')
-            passenger_stmt = select(Passenger).where(Passenger.email == passenger_email)
-            passenger = (await db.execute(passenger_stmt)).scalars().first()
+            passenger = await statements.first(db, statements.PASSENGER_BY_EMAIL, email=passenger_email)
 
             # If no matching passenger, pick one at random
             if not passenger:
@@ -456,16 +748,11 @@ class FlightBookingService:
             origin = params.get('origin', 'Chicago')
             destination = params.get('destination', 'Madrid')
 
-            origin_stmt = select(Airport).where(
-                or_(Airport.iata_code == origin, Airport.city.ilike(f"%{origin}%"))
-            )
-            dest_stmt = select(Airport).where(
-                or_(Airport.iata_code == destination, Airport.city.ilike(f"%{destination}%"))
-            )
-
-            origin_airport = (await db.execute(origin_stmt)).scalars().first()
-            dest_airport = (await db.execute(dest_stmt)).scalars().first()
+            await airport_resolver.ensure_loaded(db)
+            origin_airport = airport_resolver.resolve(origin)
+            dest_airport = airport_resolver.resolve(destination)
 
+            booked_flight = None
             if origin_airport and dest_airport:
                 route_stmt = select(Route).where(
                     Route.origin_airport_id == origin_airport.id,
@@ -479,11 +766,12 @@ class FlightBookingService:
 
                     flight_stmt = select(Flight).where(
                         Flight.route_id == route.id,
-                        func.date(Flight.scheduled_departure) == search_date
+                        on_day(Flight.scheduled_departure, search_date)
                     )
                     flight = (await db.execute(flight_stmt)).scalars().first()
 
                     if flight:
+                        booked_flight = flight
                         segment = BookingSegment(
                             booking_id=booking.id,
                             flight_id=flight.id,
@@ -493,8 +781,11 @@ class FlightBookingService:
                             baggage_allowance_kg=23
                         )
                         db.add(segment)
+                        await seat_inventory.adjust(db, flight.id, segment.class_of_service, booked=1)
 
             await db.commit()
+            if booked_flight:
+                search_cache.invalidate_flights([booked_flight.id], [booked_flight.route_id])
 
             return {
                 "status": "success",
@@ -513,6 +804,8 @@ class FlightBookingService:
 
         except Exception as e:
             await db.rollback()
+            if is_transient_error(e):
+                raise
             return {
                 "status": "error",
                 "message": f"Booking failed: {str(e)}"
@@ -528,8 +821,7 @@ class FlightChangeService:
             new_destination = params.get('new_destination')
 
             # Get current booking
-            booking_stmt = select(Booking).where(Booking.booking_reference == booking_ref)
-            booking = (await db.execute(booking_stmt)).scalars().first()
+            booking = await statements.first(db, statements.BOOKING_BY_REFERENCE, booking_ref=booking_ref)
 
             if not booking:
                 raise BookingNotFoundError(f"Booking {booking_ref} not found")
@@ -571,7 +863,7 @@ class FlightChangeService:
                         select(Flight)
                         .where(
                             Flight.route_id == current_flight.route_id,
-                            func.date(Flight.scheduled_departure) == search_date,
+                            on_day(Flight.scheduled_departure, search_date),
                             Flight.status == 'scheduled'
                         )
                     )
@@ -583,13 +875,8 @@ class FlightChangeService:
 
             # Handle destination change
             if new_destination:
-                dest_stmt = select(Airport).where(
-                    or_(
-                        Airport.iata_code == new_destination,
-                        Airport.city.ilike(f"%{new_destination}%")
-                    )
-                )
-                dest_airport = (await db.execute(dest_stmt)).scalars().first()
+                await airport_resolver.ensure_loaded(db)
+                dest_airport = airport_resolver.resolve(new_destination)
 
                 if dest_airport:
                     new_route_stmt = select(Route).where(
@@ -601,6 +888,9 @@ class FlightChangeService:
                         changes_made.append(f"Destination changed to {dest_airport.city}")
                         change_fee += Decimal('100')
 
+            cabin = seat_inventory.normalize_cabin(segment.class_of_service)
+            inventory = await seat_inventory.cabin_inventory(db, [f.id for f in new_flights[:3]])
+
             return {
                 "status": "success",
                 "booking_reference": booking_ref,
@@ -615,7 +905,7 @@ class FlightChangeService:
                     {
                         "flight_number": f.flight_number,
                         "departure": f.scheduled_departure.isoformat(),
-                        "available_seats": 25,
+                        "available_seats": inventory.get(f.id, {}).get(cabin, {}).get("available"),
                         "price_difference": random.randint(-100, 200)
                     } for f in new_flights[:3]
                 ] if new_flights else [],
@@ -640,15 +930,13 @@ class FlightChangeService:
             new_departure_date = params.get('new_departure_date')
 
             # Get current booking
-            booking_stmt = select(Booking).where(Booking.booking_reference == booking_ref)
-            booking = (await db.execute(booking_stmt)).scalars().first()
+            booking = await statements.first(db, statements.BOOKING_BY_REFERENCE, booking_ref=booking_ref)
 
             if not booking:
                 raise BookingNotFoundError(f"Booking {booking_ref} not found")
 
             # Get flight segment
-            segment_stmt = select(BookingSegment).where(BookingSegment.booking_id == booking.id)
-            segment = (await db.execute(segment_stmt)).scalars().first()
+            segment = await statements.first(db, statements.SEGMENT_BY_BOOKING, booking_id=booking.id)
 
             if segment:
                 # Update booking total with change fee
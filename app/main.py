@@ -1,15 +1,36 @@
 import os
+import asyncio
+import math
 from dotenv import load_dotenv
 load_dotenv()
 from datetime import datetime
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request, Response
+from fastapi.responses import PlainTextResponse
+from fastapi.routing import APIRoute
+from pydantic import ValidationError
+import time
 from pydantic import BaseModel
 from typing import Optional, List, Dict, Any
 import uvicorn
 from contextlib import asynccontextmanager
-from .service_registry import execute_service_endpoint, get_service_info, check_service_health
+from .service_registry import (
+    execute_service_endpoint, get_service_info, check_service_health, endpoint_access, endpoint_budget,
+    endpoint_cache_policy
+)
 
-from .database_connection import init_database, close_database, get_db_session
+from .database_connection import (
+    init_database, close_database, get_db_session, db_manager, endpoint_session, client_key, WEB_CONCURRENCY,
+    start_pin_request, PIN_COOKIE, PIN_HEADER, DB_READ_YOUR_WRITES_SECONDS, SEARCH_CACHE_BROADCAST
+)
+from .reference_cache import bind_reference_caches, stop_reference_caches, reference_cache_stats
+from .warmup import warm_up_until_ready, warmup_state
+from .workers import worker_stats
+from .search_cache import search_cache
+from .cache_invalidation import invalidation_bus
+from .credentials import credential_cache
+from .fare_engine import fare_cache_info
+from .metrics import metrics, start_request, finish_request
+from . import query_budget
 
 
 
@@ -38,25 +59,85 @@ from .request_models import (
     IssueTravelCreditVoucherRequest, IssueTravelVoucherRequest, EscalateToHumanAgentRequest,
     UpdateFlightDateRequest, GetBoardingPassPdfRequest, VerifyBookingAndGetBoardingPassRequest,
     PurchaseFlightInsuranceRequest, RetrieveFlightInsuranceRequest, PurchaseTripInsuranceRequest,
-    SearchFlightInsuranceRequest, SearchTripRequest, SearchTripInsuranceRequest
+    SearchFlightInsuranceRequest, SearchTripRequest, SearchTripInsuranceRequest, BatchRequest
 )
+from .response_models import service_response_model
+from .serialization import FastJSONResponse, dumps
+from .response_cache import response_cache, matching_etag, set_if_none_match, current_if_none_match
+from .compression import CompressionMiddleware
 
 # Lifespan context manager for startup/shutdown
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await init_database()
+    bind_reference_caches(db_manager.get_session)
+    if SEARCH_CACHE_BROADCAST and search_cache.enabled:
+        invalidation_bus.start()
+    # Pools, hot statements and reference caches warm in the background; /ready reports when done
+    warmup_task = asyncio.create_task(warm_up_until_ready(db_manager))
+    worker_stats.extra.update(
+        workers=lambda: WEB_CONCURRENCY,
+        ready=lambda: warmup_state.ready,
+        pool=db_manager.pool_status,
+        invalidation=invalidation_bus.stats,
+    )
+    if WEB_CONCURRENCY > 1:
+        # Published with the worker stats so /metrics in any worker covers all of them
+        worker_stats.extra["metrics"] = metrics.snapshot
+    worker_stats.start()
     yield
-    # Shutdown
+    # Shutdown: uvicorn has already stopped accepting and waited for in-flight requests
+    warmup_task.cancel()
+    try:
+        await warmup_task
+    except asyncio.CancelledError:
+        pass
+    await stop_reference_caches()
+    await invalidation_bus.stop()
     await close_database()
+    await worker_stats.stop()
 
 app = FastAPI(
     title="HopJetAir Customer Service API",
     description="Comprehensive airline customer service system for HopJetAir",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
+# Added before request_timings so it runs inside it: compression time counts as request time
+app.add_middleware(CompressionMiddleware)
+
+_route_names = None
+
+@app.middleware("http")
+async def request_timings(request: Request, call_next):
+    """Per-endpoint wall time split into pool wait, SQL and Python (see app/metrics.py)"""
+    global _route_names
+    if _route_names is None:
+        _route_names = {getattr(route, "path", "").strip("/") for route in app.routes}
+    endpoint = request.url.path.strip("/")
+    if endpoint not in _route_names:
+        endpoint = "other"
+    timings = start_request(endpoint)
+    query_budget.start_request(endpoint, endpoint_budget(endpoint))
+    set_if_none_match(request.headers.get("if-none-match"))
+    pin = start_pin_request(request.cookies.get(PIN_COOKIE) or request.headers.get(PIN_HEADER))
+    worker_stats.request_started()
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+        if pin.issued:
+            # Any worker honours it, unlike the in-process pin (see database_connection.py)
+            response.headers[PIN_HEADER] = pin.issued
+            response.set_cookie(PIN_COOKIE, pin.issued, max_age=math.ceil(DB_READ_YOUR_WRITES_SECONDS),
+                                httponly=True, samesite="lax")
+        return response
+    finally:
+        finish_request(timings, time.perf_counter() - started)
+        worker_stats.request_finished()
+
 
 # Main application endpoints
 @app.get("/")
@@ -74,6 +155,13 @@ async def root():
 async def health_check():
     # Lightweight check for task
      return {"status": "ok", "service": "non-ai-service"}
+
+@app.get("/ready")
+async def readiness_check(response: Response):
+    """Readiness: 503 until the startup warm-up (app/warmup.py) has finished"""
+    if not warmup_state.ready:
+        response.status_code = 503
+    return warmup_state.status()
         
     
 @app.get("/health-deep")
@@ -88,15 +176,52 @@ async def health_deep():
         "status": "healthy" if db_healthy and service_health["status"] == "healthy" else "unhealthy",
         "database": "connected" if db_healthy else "disconnected",
         "services": service_health,
+        "pool": db_manager.pool_status(),
+        "replicas": db_manager.replica_status(),
+        "credentials": credential_cache.stats(),
         "timestamp": datetime.now().isoformat(),
         "version": "1.0.0"
     }
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics_endpoint():
+    """Pool, SQL and request metrics in the Prometheus text format"""
+    if WEB_CONCURRENCY == 1:
+        return metrics.render()
+    return metrics.render({worker["pid"]: worker.get("metrics", {}) for worker in worker_stats.collect()})
+
 @app.get("/service-info")
 async def service_information():
     """Get information about available services"""
     return get_service_info()
 
+@app.get("/worker-stats")
+async def worker_statistics():
+    """Requests, CPU and pool usage of every worker process (see app/workers.py)"""
+    workers = [
+        {key: value for key, value in worker.items() if key != "metrics"} for worker in worker_stats.collect()
+    ]
+    return {
+        "pid": worker_stats.pid,
+        "configured_workers": WEB_CONCURRENCY,
+        "live_workers": len(workers),
+        "workers": workers,
+        "timestamp": datetime.now().isoformat()
+    }
+
+@app.get("/cache-stats")
+async def cache_stats():
+    """Hit/miss counters of the in-process caches"""
+    return {
+        "search": search_cache.stats(),
+        "invalidation": invalidation_bus.stats(),
+        "fares": fare_cache_info(),
+        "reference": reference_cache_stats(),
+        "responses": response_cache.stats(),
+        "statements": db_manager.statement_stats.stats() if db_manager.statement_stats else None,
+        "timestamp": datetime.now().isoformat()
+    }
+
 # endregion
 
 
@@ -104,194 +229,323 @@ async def service_information():
 # Generic endpoint handler using service registry
 async def handle_endpoint(endpoint_name: str, request_data: dict, db):
     """Generic handler for all endpoints using service registry"""
+    # Returned as a Response so FastAPI skips jsonable_encoder and response_model (see app/serialization.py)
+    policy = endpoint_cache_policy(endpoint_name)
+    if policy is not None and policy.applies(request_data):
+        return await cached_endpoint(endpoint_name, request_data, db, policy)
+    return FastJSONResponse(await service_result(endpoint_name, request_data, db))
+
+async def cached_endpoint(endpoint_name: str, request_data: dict, db, policy):
+    """Serve from the response cache, with ETag and 304 on If-None-Match (see app/response_cache.py)"""
+    key = response_cache.key(endpoint_name, request_data)
+    entry = response_cache.get(key, policy)
+    if entry is None:
+        envelope = await service_result(endpoint_name, request_data, db)
+        data = envelope["data"]
+        if not isinstance(data, dict) or data.get("status") != "success":
+            return FastJSONResponse(envelope)
+        entry = response_cache.set(key, policy, dumps(envelope))
+
+    headers = {"ETag": entry.etag, "Cache-Control": policy.cache_control}
+    matched = matching_etag(entry.etag, current_if_none_match())
+    if matched:
+        response_cache.not_modified += 1
+        return Response(status_code=304, headers={**headers, "ETag": matched})
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+async def service_result(endpoint_name: str, request_data: dict, db) -> Dict[str, Any]:
+    """The {"status", "data"} envelope of a service call; budget violations raise HTTPException"""
     try:
         result = await execute_service_endpoint(endpoint_name, db, request_data)
-        return {"status": "success", "data": result}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+    usage = query_budget.current_usage()
+    if usage and usage.violation:
+        raise HTTPException(status_code=usage.http_status, detail={
+            "error": "query_budget_exceeded",
+            "reason": usage.violation.kind,
+            "message": usage.violation.message,
+            "endpoint": endpoint_name
+        })
+    return {"status": "success", "data": result}
+
+# region Batch
+# Most calls an agent turn makes (booking details, flight status, seats, ...)
+# are independent reads; /batch runs them concurrently in one round trip
+BATCH_MAX_CALLS = int(os.getenv("BATCH_MAX_CALLS", "20"))
+_batch_models = None
+_batch_semaphore = None
+
+def batch_request_model(endpoint_name: str):
+    """Request model of an endpoint: its route's body model, else ENDPOINT_REQUEST_MODELS"""
+    global _batch_models
+    if _batch_models is None:
+        _batch_models = {
+            route.path.strip("/"): route.body_field.type_
+            for route in app.routes
+            if isinstance(route, APIRoute) and route.body_field is not None and route.path != "/batch"
+        }
+    return _batch_models.get(endpoint_name) or ENDPOINT_REQUEST_MODELS.get(endpoint_name)
+
+def batch_semaphore() -> asyncio.Semaphore:
+    """Shared by every batch so concurrent sub-calls never need more than the pool's base size"""
+    global _batch_semaphore
+    if _batch_semaphore is None:
+        _batch_semaphore = asyncio.Semaphore(int(os.getenv("BATCH_CONCURRENCY", "0")) or max(db_manager.pool_size, 1))
+    return _batch_semaphore
+
+async def run_batch_call(endpoint_name: str, params: dict, key: str) -> Dict[str, Any]:
+    """One sub-call with its own session, query budget and request metrics"""
+    started = time.perf_counter()
+    model = batch_request_model(endpoint_name)
+    if model is None:
+        status_code, body = 404, {"detail": f"Unknown endpoint '{endpoint_name}'"}
+    else:
+        try:
+            request_data = model(**params).dict()
+        except ValidationError as e:
+            status_code, body = 422, {"detail": e.errors(include_url=False)}
+        else:
+            timings = start_request(endpoint_name)
+            query_budget.start_request(endpoint_name, endpoint_budget(endpoint_name))
+            try:
+                if endpoint_access(endpoint_name) == "none":
+                    status_code, body = 200, await service_result(endpoint_name, request_data, None)
+                else:
+                    async with batch_semaphore():
+                        async with endpoint_session(endpoint_name, key) as db:
+                            status_code, body = 200, await service_result(endpoint_name, request_data, db)
+            except HTTPException as e:
+                status_code, body = e.status_code, {"detail": e.detail}
+            except Exception as e:
+                status_code, body = 500, {"detail": str(e)}
+            finally:
+                finish_request(timings, time.perf_counter() - started)
+    return {
+        "endpoint": endpoint_name,
+        "status_code": status_code,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+        **body
+    }
+
+@app.post("/batch")
+async def batch(request: BatchRequest, http_request: Request):
+    """
+    Run several endpoint calls concurrently; results come back in call order.
+    Each call gets the session its endpoint would get on its own route, so
+    calls in one batch are not one transaction and are not ordered.
+    """
+    if len(request.calls) > BATCH_MAX_CALLS:
+        raise HTTPException(status_code=422, detail=f"At most {BATCH_MAX_CALLS} calls per batch")
+    started = time.perf_counter()
+    key = client_key(http_request)
+    results = await asyncio.gather(*(run_batch_call(call.endpoint, call.params, key) for call in request.calls))
+    return FastJSONResponse({
+        "status": "success",
+        "results": results,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+    })
+
+# endregion
+
 # region Flight-related endpoints 8
-@app.post("/search_flight")
+@app.post("/search_flight", response_model=service_response_model("search_flight"))
 async def search_flight(request: SearchFlightRequest, db = Depends(get_db_session)):
     """Search for available flights"""
     return await handle_endpoint("search_flight", request.dict(), db)
 
-@app.post("/search_flights")
+@app.post("/search_flights", response_model=service_response_model("search_flights"))
 async def search_flights(request: SearchFlightsRequest, db = Depends(get_db_session)):
     """Search flights with advanced filters"""
     return await handle_endpoint("search_flights", request.dict(), db)
 
-@app.post("/book_flight")
+@app.post("/book_flight", response_model=service_response_model("book_flight"))
 async def book_flight(request: BookFlightRequest, db = Depends(get_db_session)):
     """Book a flight"""
     return await handle_endpoint("book_flight", request.dict(), db)
 
-@app.post("/check_flight_status")
+@app.post("/check_flight_status", response_model=service_response_model("check_flight_status"))
 async def check_flight_status(request: CheckFlightStatusRequest, db = Depends(get_db_session)):
     """Check flight status"""
     return await handle_endpoint("check_flight_status", request.dict(), db)
 
-@app.post("/check_flight_availability")
+@app.post("/check_flight_availability", response_model=service_response_model("check_flight_availability"))
 async def check_flight_availability(request: CheckFlightAvailabilityRequest, db = Depends(get_db_session)):
     """Check flight availability"""
     return await handle_endpoint("check_flight_availability", request.dict(), db)
 
-@app.post("/change_flight")
+@app.post("/change_flight", response_model=service_response_model("change_flight"))
 async def change_flight(request: ChangeFlightRequest, db = Depends(get_db_session)):
     """Change flight booking"""
     return await handle_endpoint("change_flight", request.dict(), db)
 
-@app.post("/search_flight_prices")
+@app.post("/search_flight_prices", response_model=service_response_model("search_flight_prices"))
 async def search_flight_prices(request: SearchFlightPricesRequest, db = Depends(get_db_session)):
     """Search flight prices"""
     return await handle_endpoint("search_flight_prices", request.dict(), db)
 
-@app.post("/check_flight_prices")
+@app.post("/check_flight_prices", response_model=service_response_model("check_flight_prices"))
 async def check_flight_prices(request: CheckFlightPricesRequest, db = Depends(get_db_session)):
     """Check flight prices"""
     return await handle_endpoint("check_flight_prices", request.dict(), db)
 # endregion
 
 # region Booking-related endpoints 6
-@app.post("/get_booking_details")
+@app.post("/get_booking_details", response_model=service_response_model("get_booking_details"))
 async def get_booking_details(request: GetBookingDetailsRequest, db = Depends(get_db_session)):
     """Get booking details"""
     return await handle_endpoint("get_booking_details", request.dict(), db)
 
-@app.post("/check_flight_reservation")
+@app.post("/check_flight_reservation", response_model=service_response_model("check_flight_reservation"))
 async def check_flight_reservation(request: CheckFlightReservationRequest, db = Depends(get_db_session)):
     """Check flight reservation"""
     return await handle_endpoint("check_flight_reservation", request.dict(), db)
 
-@app.post("/cancel_booking")
+@app.post("/cancel_booking", response_model=service_response_model("cancel_booking"))
 async def cancel_booking(request: CancelBookingRequest, db = Depends(get_db_session)):
     """Cancel booking"""
     return await handle_endpoint("cancel_booking", request.dict(), db)
 
-@app.post("/send_itinerary_email")
+@app.post("/send_itinerary_email", response_model=service_response_model("send_itinerary_email"))
 async def send_itinerary_email(request: SendItineraryEmailRequest, db = Depends(get_db_session)):
     """Send itinerary via email"""
     return await handle_endpoint("send_itinerary_email", request.dict(), db)
 
-@app.post("/check_arrival_time")
+@app.post("/check_arrival_time", response_model=service_response_model("check_arrival_time"))
 async def check_arrival_time(request: CheckArrivalTimeRequest, db = Depends(get_db_session)):
     """Check flight arrival time"""
     return await handle_endpoint("check_arrival_time", request.dict(), db)
 
-@app.post("/check_departure_time")
+@app.post("/check_departure_time", response_model=service_response_model("check_departure_time"))
 async def check_departure_time(request: CheckDepartureTimeRequest, db = Depends(get_db_session)):
     """Check flight departure time"""
     return await handle_endpoint("check_departure_time", request.dict(), db)
 #endregion
 
 # region Seat and Check-in endpoints 9
-@app.post("/check_seat_availability")
+@app.post("/check_seat_availability", response_model=service_response_model("check_seat_availability"))
 async def check_seat_availability(request: CheckSeatAvailabilityRequest, db = Depends(get_db_session)):
     """Check seat availability"""
     return await handle_endpoint("check_seat_availability", request.dict(), db)
 
-@app.post("/change_seat")
+@app.post("/change_seat", response_model=service_response_model("change_seat"))
 async def change_seat(request: ChangeSeatRequest, db = Depends(get_db_session)):
     """Change seat assignment"""
     return await handle_endpoint("change_seat", request.dict(), db)
 
-@app.post("/choose_seat")
+@app.post("/choose_seat", response_model=service_response_model("choose_seat"))
 async def choose_seat(request: ChooseSeatRequest, db = Depends(get_db_session)):
     """Choose seat"""
     return await handle_endpoint("choose_seat", request.dict(), db)
 
-@app.post("/check_in_passenger")
+@app.post("/check_in_passenger", response_model=service_response_model("check_in_passenger"))
 async def check_in_passenger(request: CheckInPassengerRequest, db = Depends(get_db_session)):
     """Check in passenger"""
     return await handle_endpoint("check_in_passenger", request.dict(), db)
 
-@app.post("/check_in")
+@app.post("/check_in", response_model=service_response_model("check_in"))
 async def check_in(request: CheckInRequest, db = Depends(get_db_session)):
     """Basic check-in"""
     return await handle_endpoint("check_in", request.dict(), db)
 
-@app.post("/get_boarding_pass")
+@app.post("/get_boarding_pass", response_model=service_response_model("get_boarding_pass"))
 async def get_boarding_pass(request: GetBoardingPassRequest, db = Depends(get_db_session)):
     """Get boarding pass"""
     return await handle_endpoint("get_boarding_pass", request.dict(), db)
 
-@app.post("/get_boarding_pass_pdf")
+@app.post("/get_boarding_pass_pdf", response_model=service_response_model("get_boarding_pass_pdf"))
 async def get_boarding_pass_pdf(request: GetBoardingPassPdfRequest, db = Depends(get_db_session)):
     """Get boarding pass PDF"""
     return await handle_endpoint("get_boarding_pass_pdf", request.dict(), db)
 
-@app.post("/send_boarding_pass_email")
+@app.post("/send_boarding_pass_email", response_model=service_response_model("send_boarding_pass_email"))
 async def send_boarding_pass_email(request: SendBoardingPassEmailRequest, db = Depends(get_db_session)):
     """Send boarding pass via email"""
     return await handle_endpoint("send_boarding_pass_email", request.dict(), db)
 
-@app.post("/check_flight_checkin_status")
+@app.post("/check_flight_checkin_status", response_model=service_response_model("check_flight_checkin_status"))
 async def check_flight_checkin_status(request: CheckFlightCheckinStatusRequest, db = Depends(get_db_session)):
     """Check flight check-in status"""
     return await handle_endpoint("check_flight_checkin_status", request.dict(), db)
 # endregion
 
 # region Trip and Package endpoints 4
-@app.post("/search_trip")
+@app.post("/search_trip", response_model=service_response_model("search_trip"))
 async def search_trip(request: SearchTripRequest, db = Depends(get_db_session)):
     """Search trip packages"""
     return await handle_endpoint("search_trip", request.dict(), db)
 
-@app.post("/book_trip")
+@app.post("/book_trip", response_model=service_response_model("book_trip"))
 async def book_trip(request: BookTripRequest, db = Depends(get_db_session)):
     """Book trip package"""
     return await handle_endpoint("book_trip", request.dict(), db)
 
-@app.post("/check_trip_details")
+@app.post("/check_trip_details", response_model=service_response_model("check_trip_details"))
 async def check_trip_details(request: CheckTripDetailsRequest, db = Depends(get_db_session)):
     """Check trip details"""
     return await handle_endpoint("check_trip_details", request.dict(), db)
 
-@app.post("/check_trip_offers")
+@app.post("/check_trip_offers", response_model=service_response_model("check_trip_offers"))
 async def check_trip_offers(request: CheckTripOffersRequest, db = Depends(get_db_session)):
     """Check trip offers"""
     return await handle_endpoint("check_trip_offers", request.dict(), db)
 #endregion
 
-# region Insurance endpoints 5
-@app.post("/purchase_flight_insurance")
+# region Insurance endpoints 7
+@app.post("/purchase_flight_insurance", response_model=service_response_model("purchase_flight_insurance"))
 async def purchase_flight_insurance(request: PurchaseFlightInsuranceRequest, db = Depends(get_db_session)):
     """Purchase flight insurance"""
     return await handle_endpoint("purchase_flight_insurance", request.dict(), db)
 
-@app.post("/purchase_trip_insurance")
+@app.post("/purchase_trip_insurance", response_model=service_response_model("purchase_trip_insurance"))
 async def purchase_trip_insurance(request: PurchaseTripInsuranceRequest, db = Depends(get_db_session)):
     """Purchase trip insurance"""
     return await handle_endpoint("purchase_trip_insurance", request.dict(), db)
 
+@app.post("/search_flight_insurance", response_model=service_response_model("search_flight_insurance"))
+async def search_flight_insurance(request: SearchFlightInsuranceRequest, db = Depends(get_db_session)):
+    """Search flight insurance options"""
+    return await handle_endpoint("search_flight_insurance", request.dict(), db)
+
+@app.post("/search_trip_insurance", response_model=service_response_model("search_trip_insurance"))
+async def search_trip_insurance(request: SearchTripInsuranceRequest, db = Depends(get_db_session)):
+    """Search trip insurance options"""
+    return await handle_endpoint("search_trip_insurance", request.dict(), db)
+
 #endregion
 
-# region Support and Policy endpoints 6
-@app.post("/query_policy_rag_db")
+# region Support and Policy endpoints 7
+@app.post("/query_policy_rag_db", response_model=service_response_model("query_policy_rag_db"))
 async def query_policy_rag_db(request: QueryPolicyRagDbRequest, db = Depends(get_db_session)):
     """Query airline policies"""
     return await handle_endpoint("query_policy_rag_db", request.dict(), db)
 
-@app.post("/escalate_to_human_agent")
+@app.post("/escalate_to_human_agent", response_model=service_response_model("escalate_to_human_agent"))
 async def escalate_to_human_agent(request: EscalateToHumanAgentRequest, db = Depends(get_db_session)):
     """Escalate to human agent"""
     return await handle_endpoint("escalate_to_human_agent", request.dict(), db)
 
-@app.post("/schedule_callback")
+@app.post("/schedule_callback", response_model=service_response_model("schedule_callback"))
 async def schedule_callback(request: ScheduleCallbackRequest, db = Depends(get_db_session)):
     """Schedule customer service callback"""
     return await handle_endpoint("schedule_callback", request.dict(), db)
 
-@app.post("/initiate_refund")
+@app.post("/initiate_refund", response_model=service_response_model("initiate_refund"))
 async def initiate_refund(request: InitiateRefundRequest, db = Depends(get_db_session)):
     """Initiate refund process"""
     return await handle_endpoint("initiate_refund", request.dict(), db)
 
-@app.post("/check_refund_eligibility")
+@app.post("/check_refund_eligibility", response_model=service_response_model("check_refund_eligibility"))
 async def check_refund_eligibility(request: CheckRefundEligibilityRequest, db = Depends(get_db_session)):
     """Check refund eligibility"""
     return await handle_endpoint("check_refund_eligibility", request.dict(), db)
 
+@app.post("/check_baggage_allowance", response_model=service_response_model("check_baggage_allowance"))
+async def check_baggage_allowance(request: CheckBaggageAllowanceRequest, db = Depends(get_db_session)):
+    """Check baggage allowance for a class, route type and (optionally) booking"""
+    return await handle_endpoint("check_baggage_allowance", request.dict(), db)
+
 
 #endregion
 
@@ -368,8 +622,10 @@ for endpoint_name in remaining_endpoints:
         f"/{endpoint_name}",
         make_endpoint(endpoint_name, request_model),
         methods=["POST"],
-        summary=swagger_summary # 
+        summary=swagger_summary, # 
+        response_model=service_response_model(endpoint_name)
     )
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8003)
\ No newline at end of file
+    # Single process; uvicorn would otherwise read WEB_CONCURRENCY itself (see app/serve.py)
+    uvicorn.run(app, host="0.0.0.0", port=8003, workers=1)
\ No newline at end of file
@@ -0,0 +1,260 @@
+"""
+HopJetAir Metrics
+In-process counters, gauges and histograms, rendered in the Prometheus text
+format at /metrics, and the database instrumentation that feeds them
+
+Per request the timings middleware splits the wall time into
+    pool_wait - waiting for a pooled connection (pool_timeout applies here)
+    sql       - cursor execution, first byte sent to last row received
+    python    - everything else (validation, ORM, serialization)
+so a slow endpoint shows which of the three to look at.
+
+With several worker processes each keeps its own registry; they publish
+snapshot() with their worker stats and /metrics renders all of them, every
+sample labelled with its worker's pid.
+"""
+
+import bisect
+import time
+from contextvars import ContextVar
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+AGE_BUCKETS = (1, 10, 60, 300, 900, 1800, 3600, 7200)
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: Dict) -> Tuple:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames: Iterable[str], key: Iterable, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, key)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _add_label(labels: str, pair: str) -> str:
+    return labels[:-1] + "," + pair + "}" if labels else "{" + pair + "}"
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name, self.documentation, self.labelnames = name, documentation, labelnames
+        self._values: Dict[Tuple, float] = {}
+        self._lock = Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        for key, value in list(self._values.items()):
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Gauge:
+    """Read at scrape time from a callback returning {label values tuple: value}"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...],
+                 callback: Callable[[], Dict[Tuple, float]]):
+        self.name, self.documentation, self.labelnames = name, documentation, labelnames
+        self.callback = callback
+
+    def samples(self):
+        for key, value in self.callback().items():
+            yield self.name, _format_labels(self.labelnames, key), value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name, self.documentation, self.labelnames = name, documentation, labelnames
+        self.buckets = buckets
+        self._series: Dict[Tuple, list] = {}  # key -> [bucket counts..., +Inf count, sum]
+        self._lock = Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = _label_key(self.labelnames, labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        for key, series in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                yield f"{self.name}_bucket", _format_labels(self.labelnames, key, f'le="{le}"'), cumulative
+            yield f"{self.name}_sum", _format_labels(self.labelnames, key), series[-1]
+            yield f"{self.name}_count", _format_labels(self.labelnames, key), cumulative
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                  buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...],
+              callback: Callable[[], Dict[Tuple, float]]) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def snapshot(self) -> Dict[str, List[list]]:
+        """Current samples of every metric, for another worker to render"""
+        return {name: [list(sample) for sample in metric.samples()] for name, metric in self._metrics.items()}
+
+    def render(self, workers: Optional[Dict[int, Dict[str, List[list]]]] = None) -> str:
+        """
+        Prometheus text exposition format. Given {pid: snapshot()} of every
+        worker (this one included), renders theirs with a worker label instead
+        of this process's own samples; sum without (worker) to combine them.
+        """
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if workers is None:
+                for name, labels, value in metric.samples():
+                    lines.append(f"{name}{labels} {value:g}")
+                continue
+            for pid, snapshot in sorted(workers.items()):
+                worker = f'worker="{pid}"'
+                for name, labels, value in snapshot.get(metric.name, ()):
+                    lines.append(f"{name}{_add_label(labels, worker)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics registry
+metrics = MetricsRegistry()
+
+pool_checkout_seconds = metrics.histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled connection", ("pool", "endpoint"))
+pool_checkouts = metrics.counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool", ("pool", "endpoint"))
+pool_checkout_timeouts = metrics.counter(
+    "db_pool_checkout_timeouts_total", "Checkouts that gave up after pool_timeout", ("pool", "endpoint"))
+pool_connection_age = metrics.histogram(
+    "db_pool_connection_age_seconds", "Age of connections at checkout", ("pool",), AGE_BUCKETS)
+pool_connects = metrics.counter(
+    "db_pool_connects_total", "New database connections opened", ("pool",))
+pool_invalidations = metrics.counter(
+    "db_pool_invalidations_total", "Connections invalidated (errors, rotation)", ("pool",))
+query_seconds = metrics.histogram(
+    "db_query_seconds", "SQL execution time per statement", ("endpoint",))
+request_seconds = metrics.histogram(
+    "http_request_seconds", "Request wall time", ("endpoint",))
+request_phase_seconds = metrics.histogram(
+    "http_request_phase_seconds", "Request wall time split into pool_wait, sql and python", ("endpoint", "phase"))
+
+
+class RequestTimings:
+    """Mutable per-request accumulator shared with the database event hooks"""
+
+    __slots__ = ("endpoint", "pool_wait", "sql")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.pool_wait = 0.0
+        self.sql = 0.0
+
+
+_request_timings: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def start_request(endpoint: str) -> RequestTimings:
+    timings = RequestTimings(endpoint)
+    _request_timings.set(timings)
+    return timings
+
+
+def finish_request(timings: RequestTimings, elapsed: float) -> None:
+    request_seconds.observe(elapsed, endpoint=timings.endpoint)
+    request_phase_seconds.observe(timings.pool_wait, endpoint=timings.endpoint, phase="pool_wait")
+    request_phase_seconds.observe(timings.sql, endpoint=timings.endpoint, phase="sql")
+    request_phase_seconds.observe(max(elapsed - timings.pool_wait - timings.sql, 0.0),
+                                  endpoint=timings.endpoint, phase="python")
+
+
+def current_endpoint() -> str:
+    timings = _request_timings.get()
+    return timings.endpoint if timings else "background"
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited"""
+
+    metrics_name = "primary"
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            pool_checkout_timeouts.inc(pool=self.metrics_name, endpoint=current_endpoint())
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            timings = _request_timings.get()
+            if timings is not None:
+                timings.pool_wait += waited
+            pool_checkout_seconds.observe(waited, pool=self.metrics_name, endpoint=current_endpoint())
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Label engine's pool and hook checkout/connect/SQL timing events into the registry"""
+    sync_engine = engine.sync_engine
+    if isinstance(sync_engine.pool, TimedQueuePool):
+        sync_engine.pool.metrics_name = name
+
+    @event.listens_for(sync_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        pool_checkouts.inc(pool=name, endpoint=current_endpoint())
+        pool_connection_age.observe(time.time() - connection_record.starttime, pool=name)
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pool_connects.inc(pool=name)
+
+    @event.listens_for(sync_engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        pool_invalidations.inc(pool=name)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_started"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("query_started", None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.sql += elapsed
+        query_seconds.observe(elapsed, endpoint=current_endpoint())
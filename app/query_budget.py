@@ -0,0 +1,160 @@
+"""
+HopJetAir Query Budgets
+Per-endpoint limits on what a request may do with its database connection
+
+    statement_timeout_ms / lock_timeout_ms
+        Postgres timeouts. The defaults are set once per connection
+        (asyncpg server_settings); an endpoint with its own values gets
+        SET LOCAL at the start of its transaction.
+    max_queries / max_db_seconds
+        Per-request caps on statement count and total SQL time, checked
+        before each statement.
+
+A request that runs past its budget fails fast: the statement that broke it
+(or hit a timeout) is logged with the endpoint, every later statement in the
+request is refused, and main.py answers 503 (budget) or 504 (timeout)
+instead of the service's own error payload.
+"""
+
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import NamedTuple, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Postgres errors raised by statement_timeout / lock_timeout
+TIMEOUT_SQLSTATES = {"57014": "statement_timeout", "55P03": "lock_timeout"}
+
+
+class QueryBudget(NamedTuple):
+    statement_timeout_ms: int
+    lock_timeout_ms: int
+    max_queries: int
+    max_db_seconds: float
+
+
+DEFAULT_BUDGET = QueryBudget(
+    statement_timeout_ms=int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000")),
+    lock_timeout_ms=int(os.getenv("DB_LOCK_TIMEOUT_MS", "2000")),
+    max_queries=int(os.getenv("DB_MAX_QUERIES_PER_REQUEST", "200")),
+    max_db_seconds=float(os.getenv("DB_MAX_SECONDS_PER_REQUEST", "10")),
+)
+
+
+class QueryBudgetExceeded(Exception):
+    """A request went over its query count or DB time budget"""
+    pass
+
+
+class Violation(NamedTuple):
+    kind: str  # max_queries, max_db_seconds, statement_timeout, lock_timeout
+    message: str
+    statement: str
+
+
+class RequestUsage:
+    """Statements and SQL time used so far by one request"""
+
+    __slots__ = ("endpoint", "budget", "queries", "db_seconds", "violation")
+
+    def __init__(self, endpoint: str, budget: QueryBudget):
+        self.endpoint = endpoint
+        self.budget = budget
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.violation: Optional[Violation] = None
+
+    @property
+    def http_status(self) -> int:
+        return 504 if self.violation and self.violation.kind in TIMEOUT_SQLSTATES.values() else 503
+
+
+_request_usage: ContextVar[Optional[RequestUsage]] = ContextVar("request_usage", default=None)
+
+
+def start_request(endpoint: str, budget: QueryBudget) -> RequestUsage:
+    usage = RequestUsage(endpoint, budget)
+    _request_usage.set(usage)
+    return usage
+
+
+def current_usage() -> Optional[RequestUsage]:
+    return _request_usage.get()
+
+
+def server_settings() -> dict:
+    """Connection-level defaults, passed to asyncpg at connect"""
+    return {
+        "statement_timeout": str(DEFAULT_BUDGET.statement_timeout_ms),
+        "lock_timeout": str(DEFAULT_BUDGET.lock_timeout_ms),
+    }
+
+
+def _record(usage: RequestUsage, kind: str, message: str, statement: str) -> None:
+    if usage.violation is None:
+        usage.violation = Violation(kind, message, statement)
+        logger.warning(
+            f"Query budget violation on {usage.endpoint} ({kind}): {message} "
+            f"after {usage.queries} queries / {usage.db_seconds:.3f}s; SQL: {' '.join(statement.split())[:1000]}"
+        )
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_timeouts(session, transaction, connection):
+    usage = _request_usage.get()
+    if usage is None:
+        return
+    budget = usage.budget
+    if budget.statement_timeout_ms != DEFAULT_BUDGET.statement_timeout_ms:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(budget.statement_timeout_ms)}")
+    if budget.lock_timeout_ms != DEFAULT_BUDGET.lock_timeout_ms:
+        connection.exec_driver_sql(f"SET LOCAL lock_timeout = {int(budget.lock_timeout_ms)}")
+
+
+def instrument_engine(engine) -> None:
+    """Count and time every statement against the current request's budget"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        usage = _request_usage.get()
+        if usage is None or statement.startswith("SET LOCAL "):
+            return
+        if usage.violation is not None:
+            raise QueryBudgetExceeded(f"Query budget exceeded: {usage.violation.message}")
+        budget = usage.budget
+        if usage.queries >= budget.max_queries:
+            _record(usage, "max_queries", f"more than {budget.max_queries} queries", statement)
+        elif usage.db_seconds >= budget.max_db_seconds:
+            _record(usage, "max_db_seconds", f"over {budget.max_db_seconds:g}s of database time", statement)
+        if usage.violation is not None:
+            raise QueryBudgetExceeded(f"Query budget exceeded: {usage.violation.message}")
+        usage.queries += 1
+        conn.info["budget_started"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.pop("budget_started", None)
+        usage = _request_usage.get()
+        if started is not None and usage is not None:
+            usage.db_seconds += time.perf_counter() - started
+
+    @event.listens_for(sync_engine, "handle_error")
+    def on_error(context):
+        conn = context.connection
+        started = conn.info.pop("budget_started", None) if conn is not None else None
+        usage = _request_usage.get()
+        if usage is None:
+            return
+        if started is not None:
+            usage.db_seconds += time.perf_counter() - started
+        error = context.original_exception
+        sqlstate = getattr(error, "sqlstate", None) or getattr(error.__cause__, "sqlstate", None)
+        if sqlstate in TIMEOUT_SQLSTATES:
+            kind = TIMEOUT_SQLSTATES[sqlstate]
+            limit = usage.budget.statement_timeout_ms if kind == "statement_timeout" else usage.budget.lock_timeout_ms
+            _record(usage, kind, f"{kind} of {limit} ms reached", context.statement or "")
@@ -0,0 +1,83 @@
+"""
+HopJetAir Query Helpers
+Date and time-of-day filters expressed as half-open timestamp ranges
+
+Wrapping a column in func.date() hides it from the btree indexes on
+flights, so every "flights on day X" filter is written as
+    start <= column < end
+which Postgres can answer from idx_flights_route_departure and
+idx_flights_number_date.
+"""
+
+from datetime import datetime, date, time, timedelta
+from typing import Any, Optional, Tuple
+from sqlalchemy import and_
+
+# Local departure hours for the time-of-day preferences used by the agents, [start, end)
+TIME_OF_DAY_WINDOWS = {
+    'night': (0, 6),
+    'morning': (6, 12),
+    'afternoon': (12, 18),
+    'evening': (18, 24),
+}
+
+
+def parse_date(value: Any, default: Optional[date] = None) -> Optional[date]:
+    """Accept a date, datetime or 'YYYY-MM-DD' string; raises ValueError on bad strings"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """[midnight, next midnight) for a single day"""
+    start = datetime.combine(day, time.min)
+    return start, start + timedelta(days=1)
+
+
+def date_range_bounds(start_day: date, end_day: date) -> Tuple[datetime, datetime]:
+    """[start_day midnight, midnight after end_day) - both days are inclusive"""
+    if end_day < start_day:
+        start_day, end_day = end_day, start_day
+    return datetime.combine(start_day, time.min), datetime.combine(end_day, time.min) + timedelta(days=1)
+
+
+def time_of_day_hours(label: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Hour window for 'morning', 'afternoon', ... or None when the label is unknown"""
+    if not label:
+        return None
+    return TIME_OF_DAY_WINDOWS.get(str(label).strip().lower())
+
+
+def time_of_day_bounds(day: date, label: Optional[str]) -> Tuple[datetime, datetime]:
+    """Half-open range for a day narrowed to a time-of-day window (whole day if unknown)"""
+    hours = time_of_day_hours(label)
+    start, end = day_bounds(day)
+    if hours is None:
+        return start, end
+    return start + timedelta(hours=hours[0]), start + timedelta(hours=hours[1])
+
+
+def within(column, bounds: Tuple[datetime, datetime]):
+    """column >= start AND column < end"""
+    start, end = bounds
+    return and_(column >= start, column < end)
+
+
+def on_day(column, day: date):
+    """Index-friendly replacement for func.date(column) == day"""
+    return within(column, day_bounds(day))
+
+
+def between_days(column, start_day: date, end_day: date):
+    """Rows whose timestamp falls on any day from start_day to end_day inclusive"""
+    return within(column, date_range_bounds(start_day, end_day))
+
+
+def in_time_of_day(column, day: date, label: Optional[str]):
+    """Rows on the given day inside the named time-of-day window"""
+    return within(column, time_of_day_bounds(day, label))
@@ -0,0 +1,263 @@
+"""
+HopJetAir Read Models
+Core (non-ORM) queries for the hottest read endpoints
+
+get_booking_details, retrieve_booking_by_email and check_flight_status only
+copy a handful of attributes into their responses. Loading them as ORM
+entities (joinedload chains, identity map, one segment query per booking)
+costs far more Python time and memory than the SQL itself, so these
+functions select exactly the columns each response needs and map rows
+straight into response dicts. Statements are built once, like the ones in
+statements.py, and bound per call.
+"""
+
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import bindparam, select, true
+from sqlalchemy.orm import aliased
+from .database_models import (
+    Aircraft, AircraftType, Airline, Airport, Booking, BookingSegment, Flight, FlightStatusUpdate, Passenger, Route
+)
+from .query_helpers import day_bounds
+
+_origin = aliased(Airport, name="origin")
+_destination = aliased(Airport, name="destination")
+
+_BOOKING_WITH_PASSENGER = (
+    select(
+        Booking.id, Booking.booking_reference, Booking.booking_date, Booking.status, Booking.trip_type,
+        Booking.booking_source, Booking.total_amount, Booking.currency,
+        Passenger.first_name, Passenger.last_name, Passenger.email, Passenger.phone, Passenger.date_of_birth,
+        Passenger.nationality, Passenger.passport_number, Passenger.frequent_flyer_number, Passenger.tier_status
+    )
+    .join(Passenger, Passenger.id == Booking.passenger_id)
+    .where(Booking.booking_reference == bindparam("booking_ref"))
+    .limit(1)
+)
+
+_BOOKING_SEGMENTS = (
+    select(
+        BookingSegment.id, BookingSegment.class_of_service, BookingSegment.seat_number, BookingSegment.ticket_number,
+        BookingSegment.fare_basis, BookingSegment.meal_preference, BookingSegment.baggage_allowance_kg,
+        BookingSegment.check_in_status, BookingSegment.boarding_pass_issued, BookingSegment.special_requests,
+        Flight.flight_number, Flight.scheduled_departure, Flight.scheduled_arrival, Flight.gate, Flight.terminal,
+        Airline.name.label("airline"), Route.flight_duration_minutes,
+        _origin.iata_code.label("origin_code"), _origin.name.label("origin_name"),
+        _origin.city.label("origin_city"), _origin.country.label("origin_country"),
+        _destination.iata_code.label("destination_code"), _destination.name.label("destination_name"),
+        _destination.city.label("destination_city"), _destination.country.label("destination_country"),
+        AircraftType.manufacturer, AircraftType.model
+    )
+    .join(Flight, Flight.id == BookingSegment.flight_id)
+    .join(Route, Route.id == Flight.route_id)
+    .join(_origin, _origin.id == Route.origin_airport_id)
+    .join(_destination, _destination.id == Route.destination_airport_id)
+    .outerjoin(Airline, Airline.id == Flight.airline_id)
+    .outerjoin(Aircraft, Aircraft.id == Flight.aircraft_id)
+    .outerjoin(AircraftType, AircraftType.id == Aircraft.aircraft_type_id)
+    .where(BookingSegment.booking_id == bindparam("booking_id"))
+)
+
+_PASSENGER_BY_EMAIL = (
+    select(Passenger.id, Passenger.first_name, Passenger.last_name, Passenger.tier_status,
+           Passenger.frequent_flyer_number)
+    .where(Passenger.email == bindparam("email"))
+    .limit(1)
+)
+
+# Every booking of the passenger with its segments' routes in one query,
+# instead of one segment query per booking
+_PASSENGER_BOOKINGS = (
+    select(
+        Booking.id, Booking.booking_reference, Booking.booking_date, Booking.status, Booking.total_amount,
+        Booking.currency, Booking.trip_type, Booking.booking_source,
+        BookingSegment.id.label("segment_id"), Flight.scheduled_departure,
+        _origin.iata_code.label("origin_code"), _origin.city.label("origin_city"),
+        _destination.iata_code.label("destination_code"), _destination.city.label("destination_city")
+    )
+    .outerjoin(BookingSegment, BookingSegment.booking_id == Booking.id)
+    .outerjoin(Flight, Flight.id == BookingSegment.flight_id)
+    .outerjoin(Route, Route.id == Flight.route_id)
+    .outerjoin(_origin, _origin.id == Route.origin_airport_id)
+    .outerjoin(_destination, _destination.id == Route.destination_airport_id)
+    .where(Booking.passenger_id == bindparam("passenger_id"))
+    .order_by(Booking.booking_date.desc(), Booking.id, BookingSegment.id.asc())
+)
+
+_latest_update = (
+    select(FlightStatusUpdate.id, FlightStatusUpdate.new_departure_time, FlightStatusUpdate.new_arrival_time,
+           FlightStatusUpdate.delay_minutes, FlightStatusUpdate.reason)
+    .where(FlightStatusUpdate.flight_id == Flight.id)
+    .order_by(FlightStatusUpdate.update_time.desc())
+    .limit(1)
+    .lateral("latest_update")
+)
+
+_FLIGHT_STATUS = (
+    select(
+        Flight.flight_number, Flight.status, Flight.scheduled_departure, Flight.scheduled_arrival,
+        Flight.gate, Flight.terminal, Airline.name.label("airline"),
+        _origin.iata_code.label("origin_code"), _origin.name.label("origin_name"), _origin.city.label("origin_city"),
+        _destination.iata_code.label("destination_code"), _destination.name.label("destination_name"),
+        _destination.city.label("destination_city"),
+        _latest_update.c.id.label("update_id"), _latest_update.c.new_departure_time, _latest_update.c.new_arrival_time,
+        _latest_update.c.delay_minutes, _latest_update.c.reason
+    )
+    .join(Route, Route.id == Flight.route_id)
+    .join(_origin, _origin.id == Route.origin_airport_id)
+    .join(_destination, _destination.id == Route.destination_airport_id)
+    .outerjoin(Airline, Airline.id == Flight.airline_id)
+    .outerjoin(_latest_update, true())
+    .where(
+        Flight.flight_number == bindparam("flight_number"),
+        Flight.scheduled_departure >= bindparam("day_start"),
+        Flight.scheduled_departure < bindparam("day_end")
+    )
+    .limit(1)
+)
+
+# Pre-compiled at startup, see statements.HOT_STATEMENTS
+HOT_STATEMENTS = [
+    (_BOOKING_WITH_PASSENGER, {"booking_ref": ""}),
+    (_BOOKING_SEGMENTS, {"booking_id": 0}),
+    (_PASSENGER_BY_EMAIL, {"email": ""}),
+    (_PASSENGER_BOOKINGS, {"passenger_id": 0}),
+    (_FLIGHT_STATUS, {"flight_number": "", "day_start": datetime(1970, 1, 1), "day_end": datetime(1970, 1, 2)}),
+]
+
+
+def _isoformat(value) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _duration(minutes: Optional[int]) -> Optional[str]:
+    return f"{minutes // 60}h {minutes % 60}m" if minutes is not None else None
+
+
+async def booking_details(db, booking_ref: str) -> Optional[Dict[str, Any]]:
+    """Booking, passenger and segment rows for get_booking_details, or None"""
+    booking = (await db.execute(_BOOKING_WITH_PASSENGER, {"booking_ref": booking_ref})).mappings().first()
+    if booking is None:
+        return None
+    rows = (await db.execute(_BOOKING_SEGMENTS, {"booking_id": booking["id"]})).mappings().all()
+    segments = [
+        {
+            "segment_id": row["id"],
+            "flight_number": row["flight_number"],
+            "airline": row["airline"],
+            "origin": {
+                "code": row["origin_code"],
+                "name": row["origin_name"],
+                "city": row["origin_city"],
+                "country": row["origin_country"]
+            },
+            "destination": {
+                "code": row["destination_code"],
+                "name": row["destination_name"],
+                "city": row["destination_city"],
+                "country": row["destination_country"]
+            },
+            "departure_time": row["scheduled_departure"].isoformat(),
+            "arrival_time": row["scheduled_arrival"].isoformat(),
+            "flight_duration": _duration(row["flight_duration_minutes"]),
+            "class_of_service": row["class_of_service"],
+            "seat_number": row["seat_number"],
+            "ticket_number": row["ticket_number"],
+            "fare_basis": row["fare_basis"],
+            "meal_preference": row["meal_preference"],
+            "baggage_allowance": f"{row['baggage_allowance_kg']}kg",
+            "check_in_status": row["check_in_status"],
+            "boarding_pass_issued": row["boarding_pass_issued"],
+            "special_requests": row["special_requests"],
+            "gate": row["gate"],
+            "terminal": row["terminal"],
+            "aircraft": f"{row['manufacturer']} {row['model']}" if row["model"] else None
+        }
+        for row in rows
+    ]
+    return {"booking": booking, "segments": segments}
+
+
+async def passenger_bookings(db, email: str) -> Optional[Dict[str, Any]]:
+    """Passenger summary and booking list for retrieve_booking_by_email, or None"""
+    passenger = (await db.execute(_PASSENGER_BY_EMAIL, {"email": email})).mappings().first()
+    if passenger is None:
+        return None
+    bookings: List[Dict[str, Any]] = []
+    current, first_row, last_row, segment_count = None, None, None, 0
+
+    def close_booking():
+        if current is None:
+            return
+        current["flight_count"] = segment_count
+        if first_row is not None:
+            current["primary_route"] = {
+                "origin": first_row["origin_code"],
+                "destination": first_row["destination_code"],
+                "origin_city": first_row["origin_city"],
+                "destination_city": first_row["destination_city"],
+                "departure_date": first_row["scheduled_departure"].strftime('%Y-%m-%d'),
+                "departure_time": first_row["scheduled_departure"].strftime('%H:%M')
+            }
+            if segment_count > 1:
+                current["return_date"] = last_row["scheduled_departure"].strftime('%Y-%m-%d')
+        bookings.append(current)
+
+    current_id = None
+    for row in (await db.execute(_PASSENGER_BOOKINGS, {"passenger_id": passenger["id"]})).mappings():
+        if row["id"] != current_id:
+            close_booking()
+            current_id, first_row, last_row, segment_count = row["id"], None, None, 0
+            current = {
+                "booking_reference": row["booking_reference"],
+                "booking_date": row["booking_date"].isoformat(),
+                "status": row["status"],
+                "total_amount": float(row["total_amount"]),
+                "currency": row["currency"],
+                "trip_type": row["trip_type"],
+                "flight_count": 0,
+                "booking_source": row["booking_source"]
+            }
+        if row["segment_id"] is not None:
+            segment_count += 1
+            first_row = first_row or row
+            last_row = row
+    close_booking()
+    return {"passenger": passenger, "bookings": bookings}
+
+
+async def flight_status(db, flight_number: str, day: date) -> Optional[Dict[str, Any]]:
+    """Flight, route and latest status update for check_flight_status, or None"""
+    day_start, day_end = day_bounds(day)
+    row = (await db.execute(_FLIGHT_STATUS, {
+        "flight_number": flight_number, "day_start": day_start, "day_end": day_end
+    })).mappings().first()
+    if row is None:
+        return None
+    status_info = {
+        "flight_number": row["flight_number"],
+        "airline": row["airline"],
+        "status": row["status"],
+        "origin": {
+            "code": row["origin_code"],
+            "name": row["origin_name"],
+            "city": row["origin_city"]
+        },
+        "destination": {
+            "code": row["destination_code"],
+            "name": row["destination_name"],
+            "city": row["destination_city"]
+        },
+        "scheduled_departure": row["scheduled_departure"].isoformat(),
+        "scheduled_arrival": row["scheduled_arrival"].isoformat(),
+        "gate": row["gate"],
+        "terminal": row["terminal"]
+    }
+    if row["update_id"] is not None:
+        status_info.update({
+            "actual_departure": _isoformat(row["new_departure_time"]),
+            "actual_arrival": _isoformat(row["new_arrival_time"]),
+            "delay_minutes": row["delay_minutes"],
+            "update_reason": row["reason"]
+        })
+    return status_info
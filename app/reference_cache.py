@@ -0,0 +1,135 @@
+"""
+HopJetAir Reference Caches
+In-memory snapshots of small, slowly changing tables (airports, routes)
+loaded at startup and refreshed on a timer
+"""
+
+import asyncio
+import logging
+import os
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+REFERENCE_REFRESH_SECONDS = int(os.getenv("REFERENCE_REFRESH_SECONDS", "900"))
+
+# Every cache registers itself here so lifespan can start/stop them together
+_registered_caches: List["ReferenceCache"] = []
+
+
+class ReferenceCache(ABC):
+    """
+    Base class for reference data held in process memory.
+    Subclasses implement _load(db) and swap their lookup structures in one
+    assignment so readers never see a half-built snapshot.
+    """
+
+    name = "reference"
+
+    def __init__(self, refresh_seconds: int = REFERENCE_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self.loaded_at: Optional[datetime] = None
+        self.generation = 0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._session_factory: Optional[Callable] = None
+        _registered_caches.append(self)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    @abstractmethod
+    async def _load(self, db) -> None:
+        """Read the table(s) through db and replace the lookup structures"""
+
+    async def refresh(self, db) -> None:
+        """Reload the snapshot from the database"""
+        async with self._lock:
+            await self._load(db)
+            self.loaded_at = datetime.now()
+            self.generation += 1
+        logger.info(f"Reference cache '{self.name}' refreshed (generation {self.generation})")
+
+    async def ensure_loaded(self, db=None) -> None:
+        """
+        Load on first use when startup loading did not happen (or failed).
+        Endpoints that run without a session pass db=None; the cache then
+        opens its own from the factory it was started with.
+        """
+        if not self.is_loaded:
+            async with self._lock:
+                if self.is_loaded:
+                    return
+                if db is None:
+                    if self._session_factory is None:
+                        raise RuntimeError(f"Reference cache '{self.name}' is not loaded and has no session factory")
+                    async with self._session_factory() as session:
+                        await self._load(session)
+                else:
+                    await self._load(db)
+                self.loaded_at = datetime.now()
+                self.generation += 1
+
+    async def _refresh_loop(self, session_factory: Callable) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                async with session_factory() as session:
+                    await self.refresh(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Keep serving the previous snapshot
+                logger.error(f"Reference cache '{self.name}' refresh failed: {e}")
+
+    def start(self, session_factory: Callable) -> None:
+        self._session_factory = session_factory
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop(session_factory))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loaded": self.is_loaded,
+            "loaded_at": self.loaded_at.isoformat() if self.loaded_at else None,
+            "generation": self.generation,
+            "refresh_seconds": self.refresh_seconds,
+        }
+
+
+def bind_reference_caches(session_factory: Callable) -> None:
+    """Give every cache its session factory so ensure_loaded() works before start_reference_caches() ran"""
+    for cache in _registered_caches:
+        cache._session_factory = session_factory
+
+
+async def start_reference_caches(session_factory: Callable) -> None:
+    """Load every registered cache once, then keep them fresh in the background"""
+    for cache in _registered_caches:
+        try:
+            async with session_factory() as session:
+                await cache.refresh(session)
+        except Exception as e:
+            # Services fall back to ensure_loaded() on first use
+            logger.error(f"Initial load of reference cache '{cache.name}' failed: {e}")
+        cache.start(session_factory)
+
+
+async def stop_reference_caches() -> None:
+    for cache in _registered_caches:
+        await cache.stop()
+
+
+def reference_cache_stats() -> Dict[str, Any]:
+    return {cache.name: cache.stats() for cache in _registered_caches}
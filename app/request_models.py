@@ -13,6 +13,7 @@ class SearchFlightRequest(BaseModel):
     passengers: int = 1
     non_stop: bool = True
     departure_window: Dict[str, Any] = {'start': '2025-09-10', 'end': '2025-09-20'}
+    flexible_dates: bool = False  # search the whole departure_window as a fare calendar
     max_price: int = 700
     airline_preferences: List[Any] = []
     direct_only: bool = True
@@ -179,7 +180,9 @@ class SearchFlightsRequest(BaseModel):
     max_price: int = 700
     preferences: Dict[str, Any] = {'budget_friendly': True}
     return_window: List[Any] = ['2025-09-25', '2025-09-30']
-    sort_by: str = "price"
+    sort_by: str = "price"  # price, time or arrival
+    limit: int = 20
+    cursor: Optional[str] = None  # next_cursor from the previous page
 
 class GetBookingDetailsRequest(BaseModel):
     booking_reference: str = "NX2Z5S"
@@ -940,4 +943,15 @@ class SearchTripInsuranceRequest(BaseModel):
     budget: int = 50
     pre_existing_conditions: bool = False
     coverage_needs: List[Any] = ['medical emergencies', 'trip cancellations']
-    coverage_type: str = "comprehensive"
\ No newline at end of file
+    coverage_type: str = "comprehensive"
+
+class BatchCall(BaseModel):
+    endpoint: str = "get_booking_details"
+    params: Dict[str, Any] = {'booking_reference': 'ABC123'}
+
+class BatchRequest(BaseModel):
+    calls: List[BatchCall] = [
+        BatchCall(),
+        BatchCall(endpoint="check_flight_status", params={'flight_number': 'DL4253', 'date': '2025-09-13'}),
+        BatchCall(endpoint="check_seat_availability", params={'booking_reference': 'ABC123', 'flight_number': 'BA256'})
+    ]
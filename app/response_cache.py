@@ -0,0 +1,177 @@
+"""
+HopJetAir Response Cache
+Rendered responses of slowly changing lookups, with ETag / If-None-Match
+
+Policy lookups, check-in information, trip package searches and baggage
+allowances only change when a few small tables do. handle_endpoint keeps the
+rendered body of such an endpoint per normalized request (the validated
+request model, so defaults and field order do not matter) and serves it
+again without running the service while:
+    - none of the entry's datasets has changed: DataVersions polls a digest of
+      each table every RESPONSE_CACHE_VERSION_SECONDS ("day" is the calendar
+      date, for results relative to today)
+    - the entry is younger than its policy's max_age
+Every cached response carries a strong ETag (hash of the body) and a
+Cache-Control header. A request whose If-None-Match holds that ETag gets a
+304; answered from a valid entry, it never touches the database.
+"""
+
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import date
+from typing import Any, Dict, Hashable, NamedTuple, Optional, Tuple
+from sqlalchemy import text
+from .database_models import AirlinePolicy, Airport, TripPackage
+from .reference_cache import ReferenceCache
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+RESPONSE_CACHE_VERSION_SECONDS = int(os.getenv("RESPONSE_CACHE_VERSION_SECONDS", "30"))
+
+
+class CachePolicy(NamedTuple):
+    datasets: Tuple[str, ...]  # DataVersions names, plus "day"
+    max_age: int  # seconds, also sent as Cache-Control max-age
+    # Request fields that bring in data no dataset versions (a passenger's
+    # booking); calls that set any of them bypass the cache
+    bypass_fields: Tuple[str, ...] = ()
+
+    @property
+    def cache_control(self) -> str:
+        return f"public, max-age={self.max_age}"
+
+    def applies(self, request_data: Dict[str, Any]) -> bool:
+        return not any(request_data.get(field) for field in self.bypass_fields)
+
+
+class DataVersions(ReferenceCache):
+    """Content digest per table, refreshed on the reference cache timer"""
+
+    name = "data_versions"
+    TABLES = {
+        "airports": Airport.__table__.name,
+        "airline_policies": AirlinePolicy.__table__.name,
+        "trip_packages": TripPackage.__table__.name,
+    }
+
+    def __init__(self):
+        super().__init__(refresh_seconds=RESPONSE_CACHE_VERSION_SECONDS)
+        self._versions: Dict[str, str] = {}
+
+    async def _load(self, db) -> None:
+        versions = {}
+        for dataset, table in self.TABLES.items():
+            versions[dataset] = (await db.execute(text(
+                f"SELECT md5(coalesce(string_agg(md5(t::text), ',' ORDER BY t.id), '')) FROM {table} t"
+            ))).scalar()
+        self._versions = versions
+
+    def current(self, datasets: Tuple[str, ...]) -> Optional[Tuple[str, ...]]:
+        """Versions of these datasets, or None while they are unknown"""
+        if not self.is_loaded:
+            return None
+        return tuple(date.today().isoformat() if name == "day" else self._versions[name] for name in datasets)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "versions": dict(self._versions)}
+
+
+data_versions = DataVersions()
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    etag: str
+    versions: Tuple[str, ...]
+    expires: float
+
+
+class ResponseCache:
+    """Bounded LRU of rendered responses, validated against data versions and max_age"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, CachedResponse]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(endpoint_name: str, request_data: Dict[str, Any]) -> Hashable:
+        return endpoint_name, json.dumps(request_data, sort_keys=True, default=str)
+
+    def get(self, key: Hashable, policy: CachePolicy) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires > time.monotonic() and entry.versions == data_versions.current(policy.datasets):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: Hashable, policy: CachePolicy, body: bytes) -> CachedResponse:
+        """Entry for a freshly rendered body; only stored when the data versions are known"""
+        versions = data_versions.current(policy.datasets)
+        entry = CachedResponse(body, make_etag(body), versions or (), time.monotonic() + policy.max_age)
+        if versions is not None and self.max_entries > 0:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+        }
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def matching_etag(etag: str, if_none_match: Optional[str]) -> Optional[str]:
+    """
+    The If-None-Match entry that matches etag (weak comparison, so W/ tags set
+    by the compression middleware match too), or None
+    """
+    if not if_none_match:
+        return None
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return etag if candidate == "*" else candidate
+    return None
+
+
+_if_none_match: ContextVar[Optional[str]] = ContextVar("if_none_match", default=None)
+
+
+def set_if_none_match(if_none_match: Optional[str]) -> None:
+    """Called per request by main.py's middleware, read by handle_endpoint"""
+    _if_none_match.set(if_none_match)
+
+
+def current_if_none_match() -> Optional[str]:
+    return _if_none_match.get()
+
+
+# Global response cache instance
+response_cache = ResponseCache()
@@ -0,0 +1,224 @@
+# response_models.py
+#
+# Declared shapes of the service results, for the OpenAPI schema. Routes list
+# them as response_model, but handle_endpoint returns a ready FastJSONResponse
+# (app/serialization.py), so FastAPI neither validates nor re-encodes through
+# them at runtime. Services report failures as {"status": "error", "message"}
+# inside the same envelope, hence the Union with ServiceError.
+
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Generic, TypeVar, Union
+
+T = TypeVar("T")
+
+class ServiceError(BaseModel):
+    status: str = "error"
+    message: str
+
+class ServiceResponse(BaseModel, Generic[T]):
+    status: str = "success"
+    data: Union[T, ServiceError]
+
+class GenericResult(BaseModel):
+    status: str
+    model_config = {"extra": "allow"}
+
+# Shared pieces
+
+class AirportInfo(BaseModel):
+    code: str
+    name: str
+    city: str
+    country: Optional[str] = None
+
+# search_flight_prices
+
+class SpecialOffer(BaseModel):
+    type: str
+    discount: int
+    conditions: str
+
+class PriceOption(BaseModel):
+    airline: str
+    class_: str = Field(alias="class")
+    price_per_person: int
+    total_price: int
+    currency: str
+    availability: bool  # not checked by search_flight_prices (route-level quote), always True
+    refundable: bool
+    changes_allowed: bool
+    change_fee: int
+    baggage_included: bool
+    flight_duration: str
+    stops: int
+    booking_class: str
+    special_offer: Optional[SpecialOffer] = None
+    original_price: Optional[int] = None
+    model_config = {"populate_by_name": True}
+
+class PriceAnalysis(BaseModel):
+    lowest_price: int
+    highest_price: int
+    average_price: int
+    price_range: str
+
+class PriceAlerts(BaseModel):
+    available: bool
+    notification_methods: List[str]
+    price_drop_threshold: str
+
+class FlightPriceSearchResult(BaseModel):
+    status: str
+    search_criteria: Dict[str, Any]
+    price_options: List[PriceOption]
+    price_analysis: PriceAnalysis
+    booking_tips: List[str]
+    price_alerts: PriceAlerts
+
+# check_seat_availability
+
+class SeatOption(BaseModel):
+    seat_number: str
+    seat_type: str
+    extra_legroom: bool
+    exit_row: bool
+    fee: int
+    available: bool
+
+class SeatMapInfo(BaseModel):
+    total_seats: int
+    occupied_seats: int
+    available_seats: int
+
+class SeatAvailabilityResult(BaseModel):
+    status: str
+    flight_number: str
+    aircraft_type: str
+    passenger_class: str
+    seat_preference: Optional[str] = None
+    available_seats: List[SeatOption]
+    seats_by_row: Dict[int, List[SeatOption]]
+    total_available: int
+    seat_map_info: SeatMapInfo
+
+# get_booking_details
+
+class PassengerDetails(BaseModel):
+    name: str
+    email: Optional[str] = None
+    phone: Optional[str] = None
+    date_of_birth: Optional[str] = None
+    nationality: Optional[str] = None
+    passport_number: Optional[str] = None
+    frequent_flyer_number: Optional[str] = None
+    tier_status: Optional[str] = None
+
+class FlightSegment(BaseModel):
+    segment_id: int
+    flight_number: str
+    airline: Optional[str] = None
+    origin: AirportInfo
+    destination: AirportInfo
+    departure_time: str
+    arrival_time: str
+    flight_duration: Optional[str] = None
+    class_of_service: Optional[str] = None
+    seat_number: Optional[str] = None
+    ticket_number: Optional[str] = None
+    fare_basis: Optional[str] = None
+    meal_preference: Optional[str] = None
+    baggage_allowance: str
+    check_in_status: Optional[str] = None
+    boarding_pass_issued: Optional[bool] = None
+    special_requests: Optional[str] = None
+    gate: Optional[str] = None
+    terminal: Optional[str] = None
+    aircraft: Optional[str] = None
+
+class BookingDetails(BaseModel):
+    booking_reference: str
+    booking_date: str
+    booking_status: str
+    trip_type: Optional[str] = None
+    booking_source: Optional[str] = None
+    total_amount: float
+    currency: str
+    passenger_details: PassengerDetails
+    flight_segments: List[FlightSegment]
+    segment_count: int
+
+class BookingDetailsResult(BaseModel):
+    status: str
+    booking_details: BookingDetails
+
+# retrieve_booking_by_email
+
+class PrimaryRoute(BaseModel):
+    origin: str
+    destination: str
+    origin_city: str
+    destination_city: str
+    departure_date: str
+    departure_time: str
+
+class BookingSummary(BaseModel):
+    booking_reference: str
+    booking_date: str
+    status: str
+    total_amount: float
+    currency: str
+    trip_type: Optional[str] = None
+    flight_count: int
+    booking_source: Optional[str] = None
+    primary_route: Optional[PrimaryRoute] = None
+    return_date: Optional[str] = None
+
+class PassengerSummary(BaseModel):
+    name: str
+    tier_status: Optional[str] = None
+    frequent_flyer_number: Optional[str] = None
+
+class BookingsByEmailResult(BaseModel):
+    status: str
+    email: str
+    passenger_details: PassengerSummary
+    bookings_found: int
+    bookings: List[BookingSummary]
+
+# check_flight_status
+
+class FlightStatusAirport(BaseModel):
+    code: str
+    name: str
+    city: str
+
+class FlightStatus(BaseModel):
+    flight_number: str
+    airline: Optional[str] = None
+    status: str
+    origin: FlightStatusAirport
+    destination: FlightStatusAirport
+    scheduled_departure: str
+    scheduled_arrival: str
+    gate: Optional[str] = None
+    terminal: Optional[str] = None
+    actual_departure: Optional[str] = None
+    actual_arrival: Optional[str] = None
+    delay_minutes: Optional[int] = None
+    update_reason: Optional[str] = None
+
+class FlightStatusResult(BaseModel):
+    status: str
+    flight_status: FlightStatus
+
+# Endpoints with a declared result model; every other route documents GenericResult
+ENDPOINT_RESPONSE_MODELS = {
+    "search_flight_prices": FlightPriceSearchResult,
+    "check_seat_availability": SeatAvailabilityResult,
+    "get_booking_details": BookingDetailsResult,
+    "retrieve_booking_by_email": BookingsByEmailResult,
+    "check_flight_status": FlightStatusResult,
+}
+
+def service_response_model(endpoint_name: str):
+    return ServiceResponse[ENDPOINT_RESPONSE_MODELS.get(endpoint_name, GenericResult)]
@@ -0,0 +1,148 @@
+"""
+HopJetAir Route Graph
+In-memory adjacency graph of the routes table, used to answer direct-route
+lookups and to enumerate one- and two-stop connection paths without SQL
+"""
+
+import os
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import select
+from .database_models import Route
+from .reference_cache import ReferenceCache
+
+# Minimum connection times, minutes
+MIN_CONNECTION_MINUTES = {
+    'domestic': int(os.getenv("MCT_DOMESTIC_MINUTES", "45")),
+    'international': int(os.getenv("MCT_INTERNATIONAL_MINUTES", "90")),
+}
+MAX_CONNECTION_MINUTES = int(os.getenv("MAX_CONNECTION_MINUTES", "360"))
+
+# Paths longer than this multiple of the shortest candidate are not worth offering
+MAX_DETOUR_FACTOR = 1.6
+MAX_CANDIDATE_PATHS = 40
+
+
+class RouteEdge(NamedTuple):
+    id: int
+    origin_airport_id: int
+    destination_airport_id: int
+    distance_km: int
+    flight_duration_minutes: int
+
+
+class RouteGraph(ReferenceCache):
+    """Routes keyed by airport pair plus an outbound adjacency list per airport"""
+
+    name = "routes"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._by_pair: Dict[Tuple[int, int], RouteEdge] = {}
+        self._adjacency: Dict[int, List[RouteEdge]] = {}
+
+    async def _load(self, db) -> None:
+        rows = (await db.execute(select(
+            Route.id, Route.origin_airport_id, Route.destination_airport_id,
+            Route.distance_km, Route.flight_duration_minutes
+        ))).all()
+
+        by_pair, adjacency = {}, {}
+        for row in rows:
+            edge = RouteEdge(
+                id=row.id,
+                origin_airport_id=row.origin_airport_id,
+                destination_airport_id=row.destination_airport_id,
+                distance_km=row.distance_km or 0,
+                flight_duration_minutes=row.flight_duration_minutes or 0
+            )
+            by_pair[(edge.origin_airport_id, edge.destination_airport_id)] = edge
+            adjacency.setdefault(edge.origin_airport_id, []).append(edge)
+
+        self._by_pair, self._adjacency = by_pair, adjacency
+
+    def direct(self, origin_id: int, destination_id: int) -> Optional[RouteEdge]:
+        return self._by_pair.get((origin_id, destination_id))
+
+    def connection_paths(self, origin_id: int, destination_id: int, max_stops: int = 2) -> List[List[RouteEdge]]:
+        """
+        One-stop and (optionally) two-stop paths from origin to destination,
+        shortest first, pruned to MAX_DETOUR_FACTOR of the shortest one
+        """
+        by_pair, adjacency = self._by_pair, self._adjacency
+        paths = []
+        for first in adjacency.get(origin_id, ()):
+            hub = first.destination_airport_id
+            if hub in (origin_id, destination_id):
+                continue
+            last = by_pair.get((hub, destination_id))
+            if last:
+                paths.append([first, last])
+            if max_stops < 2:
+                continue
+            for second in adjacency.get(hub, ()):
+                hub2 = second.destination_airport_id
+                if hub2 in (origin_id, destination_id, hub):
+                    continue
+                last = by_pair.get((hub2, destination_id))
+                if last:
+                    paths.append([first, second, last])
+
+        if not paths:
+            return []
+        paths.sort(key=lambda path: (len(path), sum(edge.distance_km for edge in path)))
+        shortest = min(sum(edge.distance_km for edge in path) for path in paths)
+        limit = shortest * MAX_DETOUR_FACTOR if shortest else float("inf")
+        return [
+            path for path in paths
+            if sum(edge.distance_km for edge in path) <= limit
+        ][:MAX_CANDIDATE_PATHS]
+
+
+class FlightDayIndex:
+    """
+    Flights of the searched window grouped by route and sorted by departure,
+    so the next feasible connection is a bisect rather than a query
+    """
+
+    def __init__(self, rows: Iterable):
+        self._departures: Dict[int, List[datetime]] = {}
+        self._rows: Dict[int, List] = {}
+        for row in sorted(rows, key=lambda r: (r.route_id, r.scheduled_departure)):
+            self._departures.setdefault(row.route_id, []).append(row.scheduled_departure)
+            self._rows.setdefault(row.route_id, []).append(row)
+
+    def departing_between(self, route_id: int, start: datetime, end: datetime) -> List:
+        departures = self._departures.get(route_id, [])
+        rows = self._rows.get(route_id, [])
+        position = bisect_left(departures, start)
+        result = []
+        while position < len(departures) and departures[position] < end:
+            result.append(rows[position])
+            position += 1
+        return result
+
+    def next_connection(self, route_id: int, arrival: datetime, min_minutes: int) -> Optional[object]:
+        """Earliest flight on route_id leaving inside the connection window after arrival"""
+        window = self.departing_between(
+            route_id,
+            arrival + timedelta(minutes=min_minutes),
+            arrival + timedelta(minutes=MAX_CONNECTION_MINUTES)
+        )
+        return window[0] if window else None
+
+
+def minimum_connection_minutes(*countries: Optional[str]) -> int:
+    """
+    MCT at a hub given the countries of the inbound origin, the hub and the
+    outbound destination; any border crossing makes it international
+    """
+    # Unknown countries are treated conservatively as international
+    if all(countries) and len(set(countries)) == 1:
+        return MIN_CONNECTION_MINUTES['domestic']
+    return MIN_CONNECTION_MINUTES['international']
+
+
+# Global route graph instance
+route_graph = RouteGraph()
@@ -0,0 +1,166 @@
+"""
+HopJetAir Search Cache
+Bounded LRU + TTL cache for flight search results, invalidated by the write
+paths that change seat inventory (in every worker: see cache_invalidation.py)
+"""
+
+import copy
+import functools
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+from .airport_resolver import airport_resolver
+from .route_graph import route_graph
+
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2048"))
+SEARCH_CACHE_TTL_SECONDS = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "60"))
+
+
+def _flight_ids(value: Any, found: Set[int]) -> Set[int]:
+    """Every flight_id in a (nested) service result, including connection legs"""
+    if isinstance(value, dict):
+        if isinstance(value.get("flight_id"), int):
+            found.add(value["flight_id"])
+        for item in value.values():
+            if isinstance(item, (dict, list)):
+                _flight_ids(item, found)
+    elif isinstance(value, list):
+        for item in value:
+            _flight_ids(item, found)
+    return found
+
+
+class SearchCache:
+    """
+    Results are tagged with the flights they contain and the direct route that
+    was searched; a write on a flight drops every entry carrying either tag,
+    so searches that did not list the flight (e.g. it was full) are dropped too.
+    """
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_MAX_ENTRIES, ttl_seconds: float = SEARCH_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict[str, Any], Set[Tuple[str, int]]]]" = OrderedDict()
+        self._keys_by_tag: Dict[Tuple[str, int], Set[Hashable]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        # Set by cache_invalidation: publish sends local invalidations to the
+        # other processes; suspended bypasses the cache while theirs may be missed
+        self.publish: Optional[Callable[[List[int], List[int]], None]] = None
+        self.suspended = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0 and not self.suspended
+
+    def _drop(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry[2]:
+            keys = self._keys_by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_tag[tag]
+
+    def get(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] <= time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Callers decorate results in place, so never hand out the stored copy
+        return copy.deepcopy(entry[1])
+
+    def set(self, key: Hashable, value: Dict[str, Any], tags: Set[Tuple[str, int]]) -> None:
+        self._drop(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(value), tags)
+        for tag in tags:
+            self._keys_by_tag.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def invalidate_flights(
+        self, flight_ids: Iterable[int] = (), route_ids: Iterable[int] = (), broadcast: bool = True
+    ) -> int:
+        """Drop cached searches containing these flights or covering these routes (everywhere if broadcast)"""
+        flight_ids = sorted({f for f in flight_ids if f is not None})
+        route_ids = sorted({r for r in route_ids if r is not None})
+        if broadcast and self.publish is not None and (flight_ids or route_ids):
+            self.publish(flight_ids, route_ids)
+        tags = {("flight", f) for f in flight_ids} | {("route", r) for r in route_ids}
+        keys = set()
+        for tag in tags:
+            keys |= self._keys_by_tag.get(tag, set())
+        for key in keys:
+            self._drop(key)
+        self.invalidations += len(keys)
+        return len(keys)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._keys_by_tag.clear()
+
+    @staticmethod
+    def _route_tag(params: Dict[str, Any]):
+        origin = airport_resolver.resolve(params.get('origin') or params.get('frm') or '')
+        destination = airport_resolver.resolve(params.get('destination') or params.get('to') or '')
+        route = route_graph.direct(origin.id, destination.id) if origin and destination else None
+        return ("route", route.id) if route else None
+
+    def cached(self, name: str):
+        """Decorator for service methods with the (db, params) signature"""
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(db, params: Dict[str, Any]) -> Dict[str, Any]:
+                if not self.enabled:
+                    return await func(db, params)
+
+                key = (name, json.dumps(params, sort_keys=True, default=str))
+                result = self.get(key)
+                if result is not None:
+                    return result
+
+                result = await func(db, params)
+                if isinstance(result, dict) and result.get("status") == "success":
+                    tags = {("flight", flight_id) for flight_id in _flight_ids(result, set())}
+                    route_tag = self._route_tag(params)
+                    if route_tag:
+                        tags.add(route_tag)
+                    self.set(key, result, tags)
+                return result
+            return wrapper
+        return decorator
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "suspended": self.suspended,
+        }
+
+
+# Global search cache instance
+search_cache = SearchCache()
@@ -7,7 +7,11 @@ from sqlalchemy.orm import joinedload
 from sqlalchemy import select, and_, or_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from .database_models import *
-from .database_connection import DatabaseError, BookingNotFoundError, FlightNotFoundError, PassengerNotFoundError
+from . import statements
+from .database_connection import DatabaseError, BookingNotFoundError, FlightNotFoundError, PassengerNotFoundError, is_transient_error
+from .airport_resolver import airport_resolver
+from .search_cache import search_cache
+from . import seat_inventory
 
 class SeatManagementService:
     @staticmethod
@@ -19,8 +23,7 @@ class SeatManagementService:
             seat_preference = params.get("seat_preference", "any")
 
             # 🔍 Get booking with passenger preloaded
-            booking_stmt = select(Booking).where(Booking.booking_reference == booking_ref)
-            booking = (await db.execute(booking_stmt)).scalars().first()
+            booking = await statements.first(db, statements.BOOKING_BY_REFERENCE, booking_ref=booking_ref)
             if not booking:
                 raise BookingNotFoundError(f"Booking {booking_ref} not found")
 
@@ -42,10 +45,17 @@ class SeatManagementService:
             aircraft_type = flight.aircraft.aircraft_type
             passenger_class = segment.class_of_service
 
-            # 🪑 Get seat map for aircraft + class + preference
+            # 🪑 Get free seats for aircraft + class + preference (occupied ones are excluded in SQL)
+            occupied_seat = select(FlightSeat.id).where(
+                FlightSeat.flight_id == flight.id,
+                FlightSeat.seat_number == SeatMap.seat_number,
+                FlightSeat.status == "occupied"
+            )
             seat_map_stmt = select(SeatMap).where(
                 SeatMap.aircraft_type_id == aircraft_type.id,
-                SeatMap.class_of_service == passenger_class
+                SeatMap.class_of_service == passenger_class,
+                SeatMap.is_blocked.isnot(True),
+                ~occupied_seat.exists()
             )
 
             if seat_preference and seat_preference != "any":
@@ -56,29 +66,23 @@ class SeatManagementService:
                 elif seat_preference == "exit":
                     seat_map_stmt = seat_map_stmt.where(SeatMap.is_exit_row == True)
 
-            available_seats = (await db.execute(seat_map_stmt)).scalars().all()
+            available_seats = (await db.execute(seat_map_stmt.order_by(SeatMap.id))).scalars().all()
 
-            # 🚫 Get occupied seats
-            occupied_stmt = select(FlightSeat).where(
-                FlightSeat.flight_id == flight.id,
-                FlightSeat.status == "occupied"
-            )
-            occupied = (await db.execute(occupied_stmt)).scalars().all()
-            occupied_numbers = {s.seat_number for s in occupied}
+            # 🚫 Occupied seat count from the per-cabin counters
+            inventory = (await seat_inventory.cabin_inventory(db, [flight.id])).get(flight.id, {})
+            occupied_count = sum(cabin["seats_assigned"] for cabin in inventory.values())
 
-            # 🎯 Filter seat map against occupied + blocked
             free_seats = []
             for seat in available_seats:
-                if seat.seat_number not in occupied_numbers and not seat.is_blocked:
-                    seat_fee = 25 if seat.extra_legroom else 15 if seat.is_exit_row else 0
-                    free_seats.append({
-                        "seat_number": seat.seat_number,
-                        "seat_type": seat.seat_type,
-                        "extra_legroom": seat.extra_legroom,
-                        "exit_row": seat.is_exit_row,
-                        "fee": seat_fee,
-                        "available": True
-                    })
+                seat_fee = 25 if seat.extra_legroom else 15 if seat.is_exit_row else 0
+                free_seats.append({
+                    "seat_number": seat.seat_number,
+                    "seat_type": seat.seat_type,
+                    "extra_legroom": seat.extra_legroom,
+                    "exit_row": seat.is_exit_row,
+                    "fee": seat_fee,
+                    "available": True
+                })
 
             # 🪑 Organize by row
             seat_rows = {}
@@ -97,7 +101,7 @@ class SeatManagementService:
                 "total_available": len(free_seats),
                 "seat_map_info": {
                     "total_seats": aircraft_type.total_seats,
-                    "occupied_seats": len(occupied_numbers),
+                    "occupied_seats": occupied_count,
                     "available_seats": len(free_seats)
                 }
             }
@@ -117,8 +121,7 @@ class SeatManagementService:
             # 🔍 Get booking
             # We need to load the booking and its associated segments.
             # Use joinedload for Booking.segments to fetch them in one query.
-            booking_stmt = select(Booking).where(Booking.booking_reference == booking_ref)
-            booking = (await db.execute(booking_stmt)).scalars().first()
+            booking = await statements.first(db, statements.BOOKING_BY_REFERENCE, booking_ref=booking_ref)
             if not booking:
                 raise BookingNotFoundError(f"Booking {booking_ref} not found")
             
@@ -200,6 +203,7 @@ class SeatManagementService:
             segment.seat_number = new_seat
             
             # Update FlightSeat records
+            seats_assigned_delta = 1
             # If there's an existing FlightSeat record for the new_seat, update it.
             if existing_seat:
                 existing_seat.passenger_id = segment.passenger_id
@@ -227,12 +231,16 @@ class SeatManagementService:
                 old_flight_seat = (await db.execute(old_flight_seat_stmt)).scalars().first()
                 
                 if old_flight_seat:
+                    if old_flight_seat.status == 'occupied':
+                        seats_assigned_delta -= 1
                     old_flight_seat.passenger_id = None
                     old_flight_seat.booking_segment_id = None
                     old_flight_seat.status = 'available'
                     old_flight_seat.seat_fee = Decimal('0.00') # Reset fee for available seat
             
+            await seat_inventory.adjust(db, flight.id, segment.class_of_service, seats_assigned=seats_assigned_delta)
             await db.commit()
+            search_cache.invalidate_flights([flight.id], [flight.route_id])
             await db.refresh(segment) # Refresh segment to ensure changes are reflected in the object
 
             return {
@@ -256,6 +264,8 @@ class SeatManagementService:
             return {"status": "error", "message": str(e)}
         except Exception as e:
             await db.rollback() # Rollback in case of any other exception
+            if is_transient_error(e):
+                raise # retried in a fresh session by the service registry
             # In a real application, you should log the full exception traceback for debugging.
             return {"status": "error", "message": f"Seat change failed: {str(e)}"}
     
@@ -267,8 +277,7 @@ class SeatManagementService:
             seat_number = params.get("seat_number")
 
             # Get booking
-            booking_stmt = select(Booking).where(Booking.booking_reference == booking_ref)
-            booking = (await db.execute(booking_stmt)).scalars().first()
+            booking = await statements.first(db, statements.BOOKING_BY_REFERENCE, booking_ref=booking_ref)
 
             if not booking:
                 raise BookingNotFoundError(f"Booking {booking_ref} not found")
@@ -345,6 +354,7 @@ class CheckInService:
                 return {"status": "error", "message": "No flight segments found"}
 
             checked_in_segments = []
+            seated_flights = []
 
             for segment in segments:
                 flight = segment.flight
@@ -401,6 +411,8 @@ class CheckInService:
                             status="occupied"
                         )
                         db.add(seat_record)
+                        await seat_inventory.adjust(db, flight.id, segment.class_of_service, seats_assigned=1)
+                        seated_flights.append(flight)
 
                 checked_in_segments.append({
                     "flight_number": flight.flight_number,
@@ -415,6 +427,9 @@ class CheckInService:
                 })
 
             await db.commit()
+            search_cache.invalidate_flights(
+                [f.id for f in seated_flights], [f.route_id for f in seated_flights]
+            )
             passenger = booking.passenger
 
             return {
@@ -1008,12 +1023,8 @@ class CheckInInfoService:
             
             # Airport-specific information
             if airport:
-                airport_obj = db.query(Airport).filter(
-                    or_(
-                        Airport.iata_code == airport,
-                        Airport.name.ilike(f"%{airport}%")
-                    )
-                ).first()
+                await airport_resolver.ensure_loaded(db)
+                airport_obj = airport_resolver.resolve(airport)
                 
                 if airport_obj:
                     checkin_info["airport_details"] = {
@@ -1053,7 +1064,8 @@ class CheckInInfoService:
             airport_code = params.get('airport_code')
             info_requested = params.get('info_requested', ['check-in counters', 'baggage drop-off timings'])
             
-            airport = db.query(Airport).filter_by(iata_code=airport_code).first()
+            await airport_resolver.ensure_loaded(db)
+            airport = airport_resolver.by_code(airport_code)
             if not airport:
                 return {"status": "error", "message": f"Airport {airport_code} not found"}
             
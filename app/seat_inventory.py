@@ -0,0 +1,190 @@
+"""
+HopJetAir Seat Inventory
+Per-flight, per-cabin seat counters kept in flight_inventory
+
+The booking, cancellation and seat-assignment paths adjust the counters in
+their own transaction with a single upsert, so availability reads are a
+primary-key lookup instead of counting booking_segments / flight_seats.
+reconcile_inventory() rebuilds the counters from those tables in bulk.
+
+Run the reconciliation job with:  python -m app.seat_inventory
+"""
+
+import asyncio
+import logging
+import os
+from typing import Dict, Iterable, Optional
+from sqlalchemy import select, func, and_, or_, case, true, values, column, String
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database_models import (
+    Flight, Aircraft, AircraftType, Booking, BookingSegment, SeatMap, FlightSeat, FlightInventory
+)
+from .fare_engine import CABINS
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_BATCH_SIZE = int(os.getenv("INVENTORY_RECONCILE_BATCH_SIZE", "5000"))
+
+INVENTORY_COLUMNS = ['flight_id', 'class_of_service', 'capacity', 'booked', 'seats_assigned']
+
+
+def normalize_cabin(class_of_service: Optional[str]) -> str:
+    return (class_of_service or 'economy').strip().lower().replace(' ', '_').replace('-', '_')
+
+
+def _inventory_source(flight_ids: Optional[Iterable[int]] = None, cabin: Optional[str] = None):
+    """
+    Counters as they should be, computed from the booking tables: one row per
+    flight and cabin with the aircraft capacity, live (non-cancelled) booked
+    segments and occupied seats
+    """
+    cabins = values(column('class_of_service', String), name='cabins').data(
+        [(c,) for c in ((cabin,) if cabin else CABINS)]
+    )
+
+    booked = (
+        select(BookingSegment.flight_id, BookingSegment.class_of_service, func.count().label('n'))
+        .join(Booking, BookingSegment.booking_id == Booking.id)
+        .where(func.coalesce(Booking.status, '') != 'cancelled')
+        .group_by(BookingSegment.flight_id, BookingSegment.class_of_service)
+    )
+    assigned = (
+        select(FlightSeat.flight_id, SeatMap.class_of_service, func.count().label('n'))
+        .join(Flight, FlightSeat.flight_id == Flight.id)
+        .join(Aircraft, Flight.aircraft_id == Aircraft.id)
+        .join(SeatMap, and_(
+            SeatMap.aircraft_type_id == Aircraft.aircraft_type_id,
+            SeatMap.seat_number == FlightSeat.seat_number
+        ))
+        .where(FlightSeat.status == 'occupied')
+        .group_by(FlightSeat.flight_id, SeatMap.class_of_service)
+    )
+    source = (
+        select(Flight.id, cabins.c.class_of_service)
+        .join(Aircraft, Flight.aircraft_id == Aircraft.id)
+        .join(AircraftType, Aircraft.aircraft_type_id == AircraftType.id)
+        .join(cabins, true())
+    )
+    if flight_ids is not None:
+        flight_ids = list(flight_ids)
+        booked = booked.where(BookingSegment.flight_id.in_(flight_ids))
+        assigned = assigned.where(FlightSeat.flight_id.in_(flight_ids))
+        source = source.where(Flight.id.in_(flight_ids))
+    booked, assigned = booked.subquery(), assigned.subquery()
+
+    capacity = case(
+        *[(cabins.c.class_of_service == c, getattr(AircraftType, f"seats_{c}")) for c in CABINS]
+    )
+    return (
+        source
+        .add_columns(
+            func.coalesce(capacity, 0),
+            func.coalesce(booked.c.n, 0),
+            func.coalesce(assigned.c.n, 0)
+        )
+        .outerjoin(booked, and_(
+            booked.c.flight_id == Flight.id, booked.c.class_of_service == cabins.c.class_of_service
+        ))
+        .outerjoin(assigned, and_(
+            assigned.c.flight_id == Flight.id, assigned.c.class_of_service == cabins.c.class_of_service
+        ))
+    )
+
+
+async def adjust(db: AsyncSession, flight_id: int, class_of_service: Optional[str],
+                 booked: int = 0, seats_assigned: int = 0) -> None:
+    """
+    Apply a delta to one flight/cabin counter inside the caller's transaction.
+    A missing row is created from the live counts (which already include the
+    caller's flushed change), so the delta is only added to existing rows.
+    """
+    if not (booked or seats_assigned) or flight_id is None:
+        return
+    cabin = normalize_cabin(class_of_service)
+    if cabin not in CABINS:
+        return
+
+    # The seeding SELECT must see the caller's pending rows
+    await db.flush()
+    stmt = insert(FlightInventory).from_select(INVENTORY_COLUMNS, _inventory_source([flight_id], cabin))
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[FlightInventory.flight_id, FlightInventory.class_of_service],
+        set_={
+            'booked': func.greatest(FlightInventory.booked + booked, 0),
+            'seats_assigned': func.greatest(FlightInventory.seats_assigned + seats_assigned, 0),
+            'updated_at': func.now()
+        }
+    )
+    await db.execute(stmt)
+
+
+async def cabin_inventory(db: AsyncSession, flight_ids: Iterable[int]) -> Dict[int, Dict[str, Dict[str, int]]]:
+    """{flight_id: {cabin: {capacity, booked, seats_assigned, available}}} for the given flights"""
+    flight_ids = list(flight_ids)
+    if not flight_ids:
+        return {}
+    rows = (await db.execute(
+        select(FlightInventory).where(FlightInventory.flight_id.in_(flight_ids))
+    )).scalars().all()
+
+    inventory: Dict[int, Dict[str, Dict[str, int]]] = {}
+    for row in rows:
+        inventory.setdefault(row.flight_id, {})[row.class_of_service] = {
+            "capacity": row.capacity,
+            "booked": row.booked,
+            "seats_assigned": row.seats_assigned,
+            "available": max(row.capacity - row.booked, 0)
+        }
+    return inventory
+
+
+async def reconcile_inventory(db: AsyncSession, flight_ids: Optional[Iterable[int]] = None,
+                              batch_size: int = RECONCILE_BATCH_SIZE) -> int:
+    """
+    Rebuild the counters from booking_segments / flight_seats, committing per
+    batch of flight ids so no lock is held across the whole table. Only rows
+    that drifted are rewritten; returns the number of rows inserted or fixed.
+    """
+    if flight_ids is None:
+        flight_ids = (await db.execute(select(Flight.id).order_by(Flight.id))).scalars().all()
+    flight_ids = list(flight_ids)
+
+    fixed = 0
+    for start in range(0, len(flight_ids), batch_size):
+        batch = flight_ids[start:start + batch_size]
+        stmt = insert(FlightInventory).from_select(INVENTORY_COLUMNS, _inventory_source(batch))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[FlightInventory.flight_id, FlightInventory.class_of_service],
+            set_={
+                'capacity': stmt.excluded.capacity,
+                'booked': stmt.excluded.booked,
+                'seats_assigned': stmt.excluded.seats_assigned,
+                'updated_at': func.now()
+            },
+            where=or_(
+                FlightInventory.capacity != stmt.excluded.capacity,
+                FlightInventory.booked != stmt.excluded.booked,
+                FlightInventory.seats_assigned != stmt.excluded.seats_assigned
+            )
+        )
+        result = await db.execute(stmt)
+        await db.commit()
+        fixed += max(result.rowcount, 0)
+    return fixed
+
+
+async def _main() -> None:
+    from .database_connection import init_database, close_database, db_manager
+
+    await init_database()
+    try:
+        async with db_manager.get_session() as db:
+            fixed = await reconcile_inventory(db)
+        logger.info(f"Flight inventory reconciled, {fixed} rows inserted or corrected")
+    finally:
+        await close_database()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
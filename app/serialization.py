@@ -0,0 +1,48 @@
+"""
+HopJetAir Serialization
+orjson response class for the service endpoints
+
+Service results are plain dicts that already hold JSON-ready values, so
+running them through FastAPI's jsonable_encoder and then stdlib json walks
+every nested dict twice. handle_endpoint returns a FastJSONResponse instead,
+which FastAPI sends as is; orjson serializes the dict in one pass in C.
+
+The few values orjson does not handle natively are encoded the way
+jsonable_encoder did, so responses stay the same: Decimal as int or float,
+sets as lists, timedeltas as seconds, pydantic models through model_dump().
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+import orjson
+from fastapi.encoders import decimal_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return decimal_encoder(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if isinstance(value, timedelta):
+        return value.total_seconds()
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if hasattr(value, "item"):  # numpy scalars OPT_SERIALIZE_NUMPY does not cover
+        return value.item()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=OPTIONS)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; content must not need jsonable_encoder"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,37 @@
+"""
+HopJetAir Server
+Multi-worker entry point: python -m app.serve
+
+Runs uvicorn with worker_count() processes (app/workers.py; 1 unless
+WEB_CONCURRENCY says otherwise). The resolved count is exported as
+WEB_CONCURRENCY before the workers are spawned, so each of them sizes its
+database pools for its share of the connection budget. On SIGTERM uvicorn
+stops accepting connections and gives in-flight requests
+WORKER_DRAIN_SECONDS to finish; workers that die are replaced.
+"""
+
+import os
+import secrets
+import uvicorn
+from .workers import WORKER_DRAIN_SECONDS, worker_count
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8003"))
+
+
+def main() -> None:
+    workers = worker_count()
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    # Read-your-writes tokens issued by one worker must verify in the others
+    os.environ.setdefault("DB_PIN_SECRET", secrets.token_hex(32))
+    uvicorn.run(
+        "app.main:app",
+        host=HOST,
+        port=PORT,
+        workers=workers,
+        timeout_graceful_shutdown=WORKER_DRAIN_SECONDS,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,9 @@ from .booking_services import BookingServices
 from .seat_checkin_services import SeatManagementService, CheckInService, BoardingPassService, CheckInInfoService
 from .trip_insurance_services import TripPackageService, InsuranceService
 from .support_pricing_services import CustomerSupportService, PolicyService, RefundService, BaggageService, PricingService
+from .database_connection import db_manager, retry_db_operation
+from .query_budget import DEFAULT_BUDGET, QueryBudget
+from .response_cache import CachePolicy
 
 class HopJetAirServiceRegistry:
     """
@@ -95,21 +98,24 @@ SERVICE_ENDPOINTS = {
     'get_check_in_info': ('check_in_info', 'get_check_in_info'),
     'query_airport_checkin_info': ('check_in_info', 'query_airport_checkin_info'),
     
-    # Trip and Insurance Services 9
+    # Trip and Insurance Services 11
     'search_trip': ('trip_packages', 'search_trip'),
     'book_trip': ('trip_packages', 'book_trip'),
     'check_trip_details': ('trip_packages', 'check_trip_details'),
     'check_trip_offers': ('trip_packages', 'check_trip_offers'),
     'purchase_flight_insurance': ('insurance', 'purchase_flight_insurance'),
     'purchase_trip_insurance': ('insurance', 'purchase_trip_insurance'),
+    'search_flight_insurance': ('insurance', 'search_flight_insurance'),
+    'search_trip_insurance': ('insurance', 'search_trip_insurance'),
        
-    # Support and Pricing Services 7
+    # Support and Pricing Services 8
     'escalate_to_human_agent': ('customer_support', 'escalate_to_human_agent'),
     'schedule_callback': ('customer_support', 'schedule_callback'),
     'query_policy_rag_db': ('policy', 'query_policy_rag_db'),
     'initiate_refund': ('refund', 'initiate_refund'),
     'check_refund_eligibility': ('refund', 'check_refund_eligibility'),
     'search_flight_prices': ('pricing', 'search_flight_prices'),
+    'check_baggage_allowance': ('baggage', 'check_baggage_allowance'),
 }
 
 # Additional service mappings for endpoints with similar functionality
@@ -158,6 +164,93 @@ ADDITIONAL_MAPPINGS = {
 # Combine all mappings
 ALL_SERVICE_MAPPINGS = {**SERVICE_ENDPOINTS, **ADDITIONAL_MAPPINGS}
 
+# Service methods that modify the database (directly or through a method they
+# delegate to); every endpoint mapped to one of these runs on the primary
+WRITE_METHODS = {
+    ('flight_booking', 'book_flight'),
+    ('flight_change', 'confirm_flight_change'),
+    ('booking', 'cancel_booking'),
+    ('seat_management', 'change_seat'),
+    ('seat_management', 'choose_seat'),
+    ('check_in', 'check_in_passenger'),
+    ('check_in', 'check_in'),
+    ('boarding_pass', 'get_boarding_pass'),
+    ('boarding_pass', 'get_boarding_pass_pdf'),
+    ('boarding_pass', 'send_boarding_pass_email'),
+    ('boarding_pass', 'verify_booking_and_get_boarding_pass'),
+    ('trip_packages', 'book_trip'),
+    ('insurance', 'purchase_flight_insurance'),
+    ('insurance', 'purchase_trip_insurance'),
+    ('customer_support', 'escalate_to_human_agent'),
+    ('refund', 'initiate_refund'),
+}
+
+# Service methods that never query the database (static data or in-memory
+# reference caches); their endpoints do not check out a connection at all
+NO_DB_METHODS = {
+    ('pricing', 'search_flight_prices'),
+    ('insurance', 'search_flight_insurance'),
+    ('insurance', 'search_trip_insurance'),
+    ('check_in_info', 'get_check_in_info'),
+    ('check_in_info', 'query_airport_checkin_info'),
+    ('customer_support', 'schedule_callback'),
+}
+
+# Session mode per endpoint:
+#   'none'  - no session (the service gets db=None)
+#   'read'  - READ ONLY transaction, never committed, may be served by a replica
+#   'write' - primary, committed at the end of the request
+ENDPOINT_ACCESS = {
+    endpoint: 'write' if mapping in WRITE_METHODS else 'none' if mapping in NO_DB_METHODS else 'read'
+    for endpoint, mapping in ALL_SERVICE_MAPPINGS.items()
+}
+
+# Write paths re-run as a whole, each attempt in its own session, when they
+# hit a transient database error (serialization failure, deadlock, reset)
+RETRY_METHODS = {
+    ('flight_booking', 'book_flight'),
+    ('booking', 'cancel_booking'),
+    ('seat_management', 'change_seat'),
+    ('refund', 'initiate_refund'),
+}
+
+# Query budgets that differ from query_budget.DEFAULT_BUDGET. Lookups by a
+# loosely matched passenger name can walk whole booking histories, so they
+# get short timeouts and few queries.
+NAME_LOOKUP_BUDGET = dict(statement_timeout_ms=2000, max_queries=50, max_db_seconds=3)
+ENDPOINT_BUDGET_OVERRIDES = {
+    'get_booking_details': NAME_LOOKUP_BUDGET,
+    'check_flight_reservation': NAME_LOOKUP_BUDGET,
+    'send_email': NAME_LOOKUP_BUDGET,
+    'send_boarding_pass_email': NAME_LOOKUP_BUDGET,
+    'resend_boarding_pass': NAME_LOOKUP_BUDGET,
+    'verify_booking_and_get_boarding_pass': NAME_LOOKUP_BUDGET,
+}
+
+# Lookups whose responses only change with a few small tables (see
+# response_cache.py); every endpoint mapped to one of these methods is served
+# from the response cache and answers If-None-Match. Baggage allowances are
+# static rules unless a booking reference brings in the passenger's tier, which
+# is not versioned, so only calls without one are cached.
+CACHED_METHODS = {
+    ('policy', 'query_policy_rag_db'): CachePolicy(datasets=('airline_policies',), max_age=300),
+    ('check_in_info', 'get_check_in_info'): CachePolicy(datasets=('airports',), max_age=3600),
+    ('trip_packages', 'search_trip'): CachePolicy(datasets=('trip_packages', 'airports', 'day'), max_age=300),
+    ('baggage', 'check_baggage_allowance'): CachePolicy(datasets=(), max_age=300, bypass_fields=('booking_reference',)),
+}
+
+def endpoint_cache_policy(endpoint_name: str):
+    """CachePolicy of a cacheable endpoint, or None"""
+    return CACHED_METHODS.get(ALL_SERVICE_MAPPINGS.get(endpoint_name))
+
+def endpoint_budget(endpoint_name: str) -> QueryBudget:
+    """Statement/lock timeouts and per-request query caps for an endpoint"""
+    return DEFAULT_BUDGET._replace(**ENDPOINT_BUDGET_OVERRIDES.get(endpoint_name, {}))
+
+def endpoint_access(endpoint_name: str) -> str:
+    """'none', 'read' or 'write'; unknown endpoints are treated as writes"""
+    return ENDPOINT_ACCESS.get(endpoint_name, 'write')
+
 # Global service registry instance
 service_registry = HopJetAirServiceRegistry()
 
@@ -196,6 +289,8 @@ async def execute_service_endpoint(endpoint_name: str, db, params: dict):
         }
     
     try:
+        if (service_name, method_name) in RETRY_METHODS:
+            return await _run_with_retry(endpoint_name, method, params)
         return await method(db, params)
     except Exception as e:
         return {
@@ -203,6 +298,14 @@ async def execute_service_endpoint(endpoint_name: str, db, params: dict):
             "message": f"Service execution failed: {str(e)}"
         }
 
+async def _run_with_retry(endpoint_name: str, method, params: dict):
+    """Run method as one unit of work, retried in a fresh session per attempt"""
+    @retry_db_operation(operation=endpoint_name)
+    async def unit_of_work():
+        async with db_manager.get_session() as session:
+            return await method(session, dict(params))
+    return await unit_of_work()
+
 def get_service_info():
     """Get information about all available services"""
     return {
@@ -248,5 +351,9 @@ __all__ = [
     'execute_service_endpoint', 
     'get_service_info',
     'check_service_health',
-    'ALL_SERVICE_MAPPINGS'
+    'endpoint_access',
+    'endpoint_budget',
+    'endpoint_cache_policy',
+    'ALL_SERVICE_MAPPINGS',
+    'ENDPOINT_ACCESS'
 ]
\ No newline at end of file
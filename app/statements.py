@@ -0,0 +1,92 @@
+"""
+HopJetAir Statement Registry
+Pre-built statements for the lookups almost every service runs
+
+A statement such as
+    select(Booking).where(Booking.booking_reference == ref)
+is rebuilt as an expression tree on every call, and SQLAlchemy then has to
+walk that tree again to compute its compiled-cache key. The statements here
+are built once at import with bindparam() placeholders, so a call only binds
+values:
+    booking = await statements.first(db, statements.BOOKING_BY_REFERENCE, booking_ref=ref)
+
+Below the compiled cache, the asyncpg dialect keeps a per-connection LRU of
+server-side prepared statements (DB_PREPARED_STATEMENT_CACHE_SIZE); the
+compiled cache itself holds DB_QUERY_CACHE_SIZE entries per engine. stats()
+reports both, plus compiled-cache hits and misses per engine.
+"""
+
+import os
+import weakref
+from typing import Any, Dict
+from sqlalchemy import bindparam, event, select
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from .database_models import Booking, BookingSegment, InsurancePolicy, Passenger, TripBooking
+
+QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))
+PREPARED_STATEMENT_CACHE_SIZE = int(os.getenv("DB_PREPARED_STATEMENT_CACHE_SIZE", "256"))
+
+BOOKING_BY_REFERENCE = select(Booking).where(Booking.booking_reference == bindparam("booking_ref"))
+TRIP_BOOKING_BY_REFERENCE = select(TripBooking).where(TripBooking.booking_reference == bindparam("booking_ref"))
+PASSENGER_BY_EMAIL = select(Passenger).where(Passenger.email == bindparam("email"))
+SEGMENT_BY_BOOKING = select(BookingSegment).where(BookingSegment.booking_id == bindparam("booking_id"))
+POLICY_BY_BOOKING = select(InsurancePolicy).where(InsurancePolicy.booking_id == bindparam("booking_id"))
+POLICY_BY_NUMBER = select(InsurancePolicy).where(InsurancePolicy.policy_number == bindparam("policy_number"))
+
+# Statements run at startup (warmup.py) with parameters that match no rows,
+# so the compiled cache and each pooled connection's prepared statements are
+# filled before the first request
+HOT_STATEMENTS = [
+    (BOOKING_BY_REFERENCE, {"booking_ref": ""}),
+    (TRIP_BOOKING_BY_REFERENCE, {"booking_ref": ""}),
+    (PASSENGER_BY_EMAIL, {"email": ""}),
+    (SEGMENT_BY_BOOKING, {"booking_id": 0}),
+    (POLICY_BY_BOOKING, {"booking_id": 0}),
+    (POLICY_BY_NUMBER, {"policy_number": ""}),
+]
+
+
+async def first(db, statement, **params) -> Any:
+    """First ORM entity of a registry statement, or None"""
+    return (await db.execute(statement, params)).scalars().first()
+
+
+class StatementCacheStats:
+    """Compiled-cache hits/misses and prepared-statement cache sizes of one engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.hits = 0
+        self.misses = 0
+        self._records = weakref.WeakSet()
+        event.listen(engine.sync_engine, "after_cursor_execute", self._after_execute)
+        event.listen(engine.sync_engine, "connect", self._on_connect)
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is None:
+            return
+        if context.cache_hit == CACHE_HIT:
+            self.hits += 1
+        elif context.cache_hit == CACHE_MISS:
+            self.misses += 1
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self._records.add(connection_record)
+
+    def stats(self) -> Dict:
+        compiled_cache = self.engine.sync_engine._compiled_cache
+        prepared = [
+            len(cache) for cache in (
+                getattr(record.dbapi_connection, "_prepared_statement_cache", None) for record in list(self._records)
+            ) if cache is not None
+        ]
+        lookups = self.hits + self.misses
+        return {
+            "compiled_cache_entries": len(compiled_cache) if compiled_cache is not None else 0,
+            "compiled_cache_size": QUERY_CACHE_SIZE,
+            "compiled_cache_hits": self.hits,
+            "compiled_cache_misses": self.misses,
+            "compiled_cache_hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "prepared_statement_cache_size": PREPARED_STATEMENT_CACHE_SIZE,
+            "prepared_statements_per_connection": prepared,
+        }
@@ -7,7 +7,11 @@ from sqlalchemy.orm import joinedload
 from sqlalchemy import select, and_, or_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from .database_models import *
-from .database_connection import DatabaseError, BookingNotFoundError, FlightNotFoundError, PassengerNotFoundError
+from . import statements
+from .database_connection import DatabaseError, BookingNotFoundError, FlightNotFoundError, PassengerNotFoundError, is_transient_error
+from .airport_resolver import airport_resolver
+from .route_graph import route_graph
+from . import fare_engine
 
 class CustomerSupportService:
     @staticmethod
@@ -216,7 +220,7 @@ class PolicyService:
             if class_of_service:
                 stmt = stmt.where(AirlinePolicy.class_of_service == class_of_service)
 
-            result = await db.execute(stmt)
+            result = await db.execute(stmt.order_by(AirlinePolicy.id))
             policies = result.scalars().all()
 
             if not policies:
@@ -297,11 +301,8 @@ class RefundService:
             amount = params.get("amount")
 
             # 🔍 Find flight or trip booking
-            flight_stmt = select(Booking).where(Booking.booking_reference == booking_ref)
-            trip_stmt = select(TripBooking).where(TripBooking.booking_reference == booking_ref)
-
-            booking = (await db.execute(flight_stmt)).scalars().first()
-            trip_booking = (await db.execute(trip_stmt)).scalars().first()
+            booking = await statements.first(db, statements.BOOKING_BY_REFERENCE, booking_ref=booking_ref)
+            trip_booking = await statements.first(db, statements.TRIP_BOOKING_BY_REFERENCE, booking_ref=booking_ref)
 
             if not booking and not trip_booking:
                 raise BookingNotFoundError(f"Booking {booking_ref} not found")
@@ -430,6 +431,8 @@ class RefundService:
             return {"status": "error", "message": str(e)}
         except Exception as e:
             await db.rollback()
+            if is_transient_error(e):
+                raise
             return {"status": "error", "message": f"Refund initiation failed: {str(e)}"}
     
     @staticmethod
@@ -439,8 +442,7 @@ class RefundService:
             booking_ref = params.get("booking_reference")
 
             # 🔍 Fetch booking with eager-loaded passenger
-            booking_stmt = select(Booking).where(Booking.booking_reference == booking_ref)
-            booking = (await db.execute(booking_stmt)).scalars().first()
+            booking = await statements.first(db, statements.BOOKING_BY_REFERENCE, booking_ref=booking_ref)
 
             if not booking:
                 return {"status": "error", "message": f"Booking {booking_ref} not found"}
@@ -662,6 +664,17 @@ class BaggageService:
         except Exception as e:
             return {"status": "error", "message": f"Baggage allowance check failed: {str(e)}"}
     
+# Carrier price positioning relative to the HopJetAir fare
+AIRLINE_FARE_FACTORS = {
+    "HopJetAir": 1.0,
+    "American Airlines": 1.06,
+    "Delta Air Lines": 1.08,
+    "United Airlines": 1.04,
+    "British Airways": 1.12,
+}
+DEFAULT_DISTANCE_KM = 1500
+CRUISE_SPEED_KMH = 800
+
 class PricingService:
     @staticmethod
     async def search_flight_prices(db: AsyncSession, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -675,51 +688,45 @@ class PricingService:
             cabin_class = params.get("cabin_classname") or params.get("travel_classname") or "economy"
             trip_type = params.get("trip_type", "roundtrip")
 
-            base_prices = {
-                "economy": random.randint(300, 800),
-                "premium_economy": random.randint(600, 1200),
-                "business": random.randint(1200, 2500),
-                "first": random.randint(2500, 5000)
-            }
+            # Route distance from the in-memory reference data
+            await airport_resolver.ensure_loaded(db)
+            await route_graph.ensure_loaded(db)
+            origin_airport = airport_resolver.resolve(origin)
+            dest_airport = airport_resolver.resolve(destination)
+            route = route_graph.direct(origin_airport.id, dest_airport.id) if origin_airport and dest_airport else None
+            if route and route.distance_km:
+                distance_km = route.distance_km
+            elif origin_airport and dest_airport:
+                distance_km = fare_engine.great_circle_km(
+                    origin_airport.latitude, origin_airport.longitude,
+                    dest_airport.latitude, dest_airport.longitude
+                ) or DEFAULT_DISTANCE_KM
+            else:
+                distance_km = DEFAULT_DISTANCE_KM
+            duration_minutes = (
+                route.flight_duration_minutes if route and route.flight_duration_minutes
+                else int(distance_km / CRUISE_SPEED_KMH * 60) + 30
+            )
 
-            multiplier = 1.0
             try:
-                if departure_date:
-                    dep_date = datetime.strptime(departure_date, "%Y-%m-%d")
-                    days_ahead = (dep_date - datetime.now()).days
-
-                    if days_ahead < 14:
-                        multiplier *= 1.5
-                    elif days_ahead < 30:
-                        multiplier *= 1.2
-                    elif days_ahead < 60:
-                        multiplier *= 1.0
-                    else:
-                        multiplier *= 0.9
-
-                    month = dep_date.month
-                    if month in [6, 7, 8, 12]:
-                        multiplier *= 1.3
-                    elif month in [1, 2, 11]:
-                        multiplier *= 0.8
-
-                    base_prices = {k: int(v * multiplier) for k, v in base_prices.items()}
-            except Exception:
-                pass
-
-            airlines = ["HopJetAir", "American Airlines", "Delta Air Lines", "United Airlines", "British Airways"]
+                dep_date = datetime.strptime(departure_date, "%Y-%m-%d").date() if departure_date else date.today()
+            except ValueError:
+                dep_date = date.today()
+            days_ahead = (dep_date - date.today()).days
+            base_prices = fare_engine.cabin_quotes(distance_km, dep_date)
+
             price_options = []
 
             adult_count = passengers.get("adults", 1) if isinstance(passengers, dict) else 1
             child_count = passengers.get("children", 0) if isinstance(passengers, dict) else 0
             infant_count = passengers.get("infants", 0) if isinstance(passengers, dict) else 0
 
-            for airline in airlines:
+            for airline, airline_factor in AIRLINE_FARE_FACTORS.items():
                 for class_type, base_price in base_prices.items():
                     if cabin_class != "all" and class_type != cabin_class:
                         continue
 
-                    final_price = int(base_price * random.uniform(0.85, 1.15))
+                    final_price = int(base_price * airline_factor)
                     total_price = (
                         final_price * adult_count +
                         final_price * 0.75 * child_count +
@@ -729,29 +736,35 @@ class PricingService:
                     if trip_type == "roundtrip" and return_date:
                         total_price *= 2
 
-                    booking_class = random.choice(["Y", "B", "M", "H"]) if class_type == "economy" else class_type[0].upper()
-
+                    # Every carrier flies the direct route when we have one and connects otherwise
+                    stops = 0 if route else 1
                     price_entry = {
                         "airline": airline,
                         "class": class_type,
                         "price_per_person": final_price,
                         "total_price": int(total_price),
                         "currency": "USD",
-                        "availability": random.random() < 0.75,
+                        # Not checked here: this is a route-level quote without seat counts;
+                        # search_flight / check_flight_availability have the real inventory
+                        "availability": True,
                         "refundable": class_type in ["business", "first"],
                         "changes_allowed": True,
                         "change_fee": 75 if class_type == "economy" else 0,
                         "baggage_included": class_type != "economy",
-                        "flight_duration": f"{random.randint(8, 15)}h {random.randint(0, 59)}m",
-                        "stops": 0 if airline == "HopJetAir" else random.choice([0, 1]),
-                        "booking_class": booking_class
+                        "flight_duration": f"{duration_minutes // 60}h {duration_minutes % 60}m",
+                        "stops": stops,
+                        "booking_class": fare_engine.booking_class(class_type, dep_date)
                     }
 
-                    if random.random() < 0.3:
-                        discount = random.choice([10, 15, 20, 25])
+                    offer = None
+                    if days_ahead >= 60:
+                        offer = "Early Bird"
+                    elif adult_count + child_count >= 4:
+                        offer = "Group Discount"
+                    if offer:
                         price_entry["special_offer"] = {
-                            "type": random.choice(["Early Bird", "Weekend Special", "Last Minute", "Group Discount"]),
-                            "discount": discount,
+                            "type": offer,
+                            "discount": 15,
                             "conditions": "Limited time offer"
                         }
                         price_entry["original_price"] = price_entry["total_price"]
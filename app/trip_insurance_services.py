@@ -7,7 +7,13 @@ from sqlalchemy.orm import joinedload
 from sqlalchemy import select, and_, or_, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from .database_models import *
+from . import statements
 from .database_connection import DatabaseError, BookingNotFoundError, FlightNotFoundError, PassengerNotFoundError
+from .airport_resolver import airport_resolver
+from . import fare_engine
+
+# Distance used for flight estimates when an airport cannot be resolved
+DEFAULT_TRIP_DISTANCE_KM = 6000
 
 class TripPackageService:
     @staticmethod
@@ -52,9 +58,31 @@ class TripPackageService:
             if filters:
                 stmt = stmt.where(*filters)
 
-            result = await db.execute(stmt)
+            result = await db.execute(stmt.order_by(TripPackage.id))
             packages = result.scalars().all()
 
+            # ✈️ Round-trip economy fare from the origin, for packages without flights
+            await airport_resolver.ensure_loaded(db)
+            origin_airport = airport_resolver.resolve(origin or "")
+            try:
+                fare_date = datetime.strptime(departure_date, "%Y-%m-%d").date() if departure_date else date.today()
+            except ValueError:
+                fare_date = date.today()
+            flight_costs = {}
+
+            def estimate_flight_cost(city: str) -> int:
+                if city not in flight_costs:
+                    dest_airport = airport_resolver.resolve(city or "")
+                    distance_km = None
+                    if origin_airport and dest_airport:
+                        distance_km = fare_engine.great_circle_km(
+                            origin_airport.latitude, origin_airport.longitude,
+                            dest_airport.latitude, dest_airport.longitude
+                        )
+                    fare = fare_engine.quote(distance_km or DEFAULT_TRIP_DISTANCE_KM, "economy", fare_date)
+                    flight_costs[city] = int(fare * 2)
+                return flight_costs[city]
+
             # 🧠 Score packages based on interests
             scored_packages = []
             for package in packages:
@@ -69,9 +97,11 @@ class TripPackageService:
                         score += 3
 
                 # 💰 Estimate flight cost
-                flight_cost = random.randint(400, 1200)
                 total_price = float(package.price_per_person)
-                estimated_total = total_price if package.includes_flight else total_price + flight_cost
+                estimated_total = (
+                    total_price if package.includes_flight
+                    else total_price + estimate_flight_cost(package.destination_city)
+                )
 
                 package_info = {
                     "package_code": package.package_code,
@@ -172,7 +202,7 @@ class TripPackageService:
 
             # 🔐 Generate unique booking reference
             booking_ref = "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
-            while await db.scalar(select(TripBooking).where(TripBooking.booking_reference == booking_ref)):
+            while await statements.first(db, statements.TRIP_BOOKING_BY_REFERENCE, booking_ref=booking_ref):
                 booking_ref = "".join(random.choices(string.ascii_uppercase + string.digits, k=6))
 
             # 🧍 Create default passenger (demo fallback)
@@ -613,8 +643,7 @@ class InsuranceService:
             # 🔍 Find existing booking
             booking = None
             if booking_ref:
-                booking_stmt = select(Booking).where(Booking.booking_reference == booking_ref)
-                booking = (await db.execute(booking_stmt)).scalars().first()
+                booking = await statements.first(db, statements.BOOKING_BY_REFERENCE, booking_ref=booking_ref)
 
             # 🛡️ Insurance plan details
             plan_details = {
@@ -782,14 +811,11 @@ class InsuranceService:
             policy = None
 
             if policy_number:
-                policy_stmt = select(InsurancePolicy).where(InsurancePolicy.policy_number == policy_number)
-                policy = (await db.execute(policy_stmt)).scalars().first()
+                policy = await statements.first(db, statements.POLICY_BY_NUMBER, policy_number=policy_number)
             elif booking_ref:
-                booking_stmt = select(Booking).where(Booking.booking_reference == booking_ref)
-                booking = (await db.execute(booking_stmt)).scalars().first()
+                booking = await statements.first(db, statements.BOOKING_BY_REFERENCE, booking_ref=booking_ref)
                 if booking:
-                    policy_stmt = select(InsurancePolicy).where(InsurancePolicy.booking_id == booking.id)
-                    policy = (await db.execute(policy_stmt)).scalars().first()
+                    policy = await statements.first(db, statements.POLICY_BY_BOOKING, booking_id=booking.id)
 
             if not policy:
                 return {"status": "error", "message": "Insurance policy not found"}
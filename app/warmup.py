@@ -0,0 +1,143 @@
+"""
+HopJetAir Startup Warm-up
+Opens pools, compiles hot statements and loads reference caches before the
+service reports ready
+
+Without it the first requests after a deploy pay for everything at once:
+connection handshakes, mapper configuration, SQL compilation, asyncpg
+prepare round-trips and the reference cache loads. lifespan runs warm_up()
+in the background; /health answers as soon as the process is up (liveness)
+while /ready stays 503 until every required step has finished (readiness).
+
+Steps:
+    mappers       configure_mappers() so the first ORM query does not do it
+    pools         open pool_size connections on the primary and each replica,
+                  then run statements.HOT_STATEMENTS / read_models.HOT_STATEMENTS
+                  on every one of them, filling the compiled cache and each
+                  connection's prepared statement cache
+    reference     load the reference caches and start their refresh loops
+                  (not required: services fall back to ensure_loaded())
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import configure_mappers
+from . import read_models, statements
+from .reference_cache import start_reference_caches
+
+logger = logging.getLogger(__name__)
+
+# Seconds between warm-up attempts while a required step keeps failing
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "10"))
+
+HOT_STATEMENTS = statements.HOT_STATEMENTS + read_models.HOT_STATEMENTS
+
+
+class WarmupState:
+    """Outcome of the last warm-up, as reported by /ready"""
+
+    def __init__(self):
+        self.ready = False
+        self.attempts = 0
+        self.started_at: Optional[datetime] = None
+        self.completed_at: Optional[datetime] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "status": "ready" if self.ready else "warming_up",
+            "attempts": self.attempts,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "completed_at": self.completed_at.isoformat() if self.completed_at else None,
+            "steps": self.steps,
+        }
+
+
+warmup_state = WarmupState()
+
+
+async def _step(name: str, func, *args) -> bool:
+    started = time.perf_counter()
+    try:
+        detail = await func(*args)
+        ok, error = True, None
+    except Exception as e:
+        detail, ok, error = None, False, str(e)
+        logger.error(f"Warm-up step '{name}' failed: {e}")
+    warmup_state.steps[name] = {
+        "ok": ok,
+        "seconds": round(time.perf_counter() - started, 3),
+        "detail": detail,
+        "error": error,
+    }
+    return ok
+
+
+async def _configure_mappers() -> None:
+    configure_mappers()
+
+
+async def _prepare(conn) -> None:
+    await conn.execute(text("SELECT 1"))
+    async with AsyncSession(bind=conn) as session:
+        for stmt, params in HOT_STATEMENTS:
+            await session.execute(stmt, params)
+        await session.rollback()
+
+
+async def _warm_engine(engine) -> int:
+    """Hold pool_size connections at once so the pool opens that many, then prepare on each"""
+    count = engine.pool.size()
+    opened = await asyncio.gather(*(engine.connect() for _ in range(count)), return_exceptions=True)
+    connections = [conn for conn in opened if not isinstance(conn, BaseException)]
+    try:
+        for conn in opened:
+            if isinstance(conn, BaseException):
+                raise conn
+        await asyncio.gather(*(_prepare(conn) for conn in connections))
+    finally:
+        for conn in connections:
+            await conn.close()
+    return count
+
+
+async def _warm_pools(db_manager) -> Dict[str, Any]:
+    warmed = {"primary": await _warm_engine(db_manager.engine)}
+    for replica in db_manager.replicas:
+        try:
+            warmed[f"replica:{replica.name}"] = await _warm_engine(replica.engine)
+        except Exception as e:
+            # A replica that is down is skipped by routing; it must not block readiness
+            logger.warning(f"Warm-up of replica {replica.name} failed: {e}")
+    return {"connections": warmed, "statements": len(HOT_STATEMENTS)}
+
+
+async def _load_reference_caches(db_manager) -> None:
+    await start_reference_caches(db_manager.get_session)
+
+
+async def warm_up(db_manager) -> bool:
+    """Run every step once; True when the required ones succeeded"""
+    warmup_state.attempts += 1
+    warmup_state.started_at, warmup_state.completed_at = datetime.now(), None
+    warmup_state.steps = {}
+    started = time.perf_counter()
+    ok = await _step("mappers", _configure_mappers)
+    ok = ok and await _step("pools", _warm_pools, db_manager)
+    await _step("reference", _load_reference_caches, db_manager)
+    warmup_state.completed_at = datetime.now()
+    warmup_state.ready = ok
+    logger.info(f"Warm-up {'finished' if ok else 'failed'} in {time.perf_counter() - started:.2f}s")
+    return ok
+
+
+async def warm_up_until_ready(db_manager) -> None:
+    """lifespan's background task: retry until the service can report ready"""
+    while not await warm_up(db_manager):
+        await asyncio.sleep(WARMUP_RETRY_SECONDS)
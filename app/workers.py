@@ -0,0 +1,216 @@
+"""
+HopJetAir Workers
+Worker count and per-worker stats for multi-process serving
+
+app/serve.py starts WEB_CONCURRENCY uvicorn worker processes: 1 by default,
+or with WEB_CONCURRENCY=auto one per CPU available to the container (cgroup
+quota included), at most DB_MAX_CONNECTIONS / 2. Each worker is a separate
+interpreter with its own pools, caches and metrics, so:
+    - database_connection divides DB_MIN/DB_MAX_CONNECTIONS and the server's
+      connection budget by WEB_CONCURRENCY
+    - search cache invalidations are broadcast to the other workers with
+      Postgres NOTIFY (cache_invalidation.py), on one more connection each
+    - every worker publishes a snapshot of its counters and metrics to a
+      JSON file in WORKER_STATS_DIR every WORKER_STATS_SECONDS; /worker-stats
+      and /metrics, answered by whichever worker gets the request, read them all
+
+Read-your-writes pins travel with the client as a signed token (see
+database_connection.py).
+
+On SIGTERM uvicorn stops accepting connections and gives in-flight requests
+WORKER_DRAIN_SECONDS before lifespan shutdown closes the pools.
+"""
+
+import asyncio
+import json
+import logging
+import math
+import os
+import resource
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+WORKER_STATS_SECONDS = float(os.getenv("WORKER_STATS_SECONDS", "5"))
+# uvicorn's graceful shutdown timeout; with closing the pools it fits in the
+# 10 s docker stop / ECS stopTimeout default before SIGKILL
+WORKER_DRAIN_SECONDS = int(os.getenv("WORKER_DRAIN_SECONDS", "8"))
+# Per-container connection ceiling (same variable and default as
+# database_connection); a lone worker needs one connection, each of several
+# workers two (its pool and the cache invalidation listener)
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "20"))
+# Shared by the workers of one server: they all have the supervisor as parent
+WORKER_STATS_DIR = os.getenv(
+    "WORKER_STATS_DIR", os.path.join(tempfile.gettempdir(), f"hopjetair-workers-{os.getppid()}")
+)
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """CPUs allowed by the container's CFS quota (cgroup v2, then v1), None if unlimited"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()[:2]
+        if quota != "max":
+            return int(quota) / int(period)
+        return None
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0 and period > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def available_cpus() -> int:
+    """CPUs this process may use: affinity mask, capped by the cgroup quota"""
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS / Windows
+        cpus = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(cpus, 1)
+
+
+def worker_count() -> int:
+    """
+    WEB_CONCURRENCY (default 1), or one worker per available CPU for "auto";
+    never more workers than fit in DB_MAX_CONNECTIONS
+    """
+    max_workers = max(DB_MAX_CONNECTIONS // 2, 1)
+    configured = (os.getenv("WEB_CONCURRENCY") or "1").strip().lower()
+    if configured == "auto":
+        cpus = available_cpus()
+        workers = min(cpus, max_workers)
+        if workers < cpus:
+            logger.warning(f"{cpus} CPUs but DB_MAX_CONNECTIONS={DB_MAX_CONNECTIONS}; starting {workers} workers")
+        return workers
+    if not configured.isdigit() or int(configured) < 1:
+        raise ValueError(f"WEB_CONCURRENCY must be a positive number or 'auto', got {configured!r}")
+    if int(configured) > max_workers:
+        raise ValueError(
+            f"WEB_CONCURRENCY={configured} does not fit in DB_MAX_CONNECTIONS={DB_MAX_CONNECTIONS}: "
+            "each of several workers needs two database connections"
+        )
+    return int(configured)
+
+
+class WorkerStats:
+    """This worker's request counters, published for /worker-stats"""
+
+    def __init__(self, stats_dir: str = WORKER_STATS_DIR):
+        self.stats_dir = stats_dir
+        self.pid = os.getpid()
+        self.started = time.monotonic()
+        self.started_at = datetime.now()
+        self.requests = 0
+        self.in_flight = 0
+        self.extra: Dict[str, Callable[[], Any]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.stats_dir, f"{self.pid}.json")
+
+    def request_started(self) -> None:
+        self.requests += 1
+        self.in_flight += 1
+
+    def request_finished(self) -> None:
+        self.in_flight -= 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        return {
+            "pid": self.pid,
+            "started_at": self.started_at.isoformat(),
+            "uptime_seconds": round(time.monotonic() - self.started, 1),
+            "requests": self.requests,
+            "in_flight": self.in_flight,
+            "cpu_seconds": round(usage.ru_utime + usage.ru_stime, 3),
+            "max_rss_kib": usage.ru_maxrss,
+            **{name: func() for name, func in self.extra.items()},
+            "published_at": datetime.now().isoformat(),
+        }
+
+    def publish(self) -> None:
+        """Write the snapshot atomically so readers never see a partial file"""
+        os.makedirs(self.stats_dir, exist_ok=True)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(self.snapshot(), f, default=str)
+        os.replace(temporary, self.path)
+
+    async def _publish_loop(self) -> None:
+        while True:
+            try:
+                self.publish()
+            except Exception as e:
+                logger.warning(f"Could not publish worker stats to {self.stats_dir}: {e}")
+            await asyncio.sleep(WORKER_STATS_SECONDS)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._publish_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """Latest snapshot of every live worker of this server, this one fresh"""
+        workers = {self.pid: self.snapshot()}
+        try:
+            names = os.listdir(self.stats_dir)
+        except OSError:
+            names = []
+        for name in names:
+            pid_text, _, extension = name.partition(".")
+            if extension != "json" or not pid_text.isdigit() or int(pid_text) == self.pid:
+                continue
+            pid = int(pid_text)
+            if not _alive(pid):
+                try:
+                    os.remove(os.path.join(self.stats_dir, name))
+                except OSError:
+                    pass
+                continue
+            try:
+                with open(os.path.join(self.stats_dir, name)) as f:
+                    workers[pid] = json.load(f)
+            except (OSError, ValueError):
+                continue
+        return sorted(workers.values(), key=lambda worker: worker["pid"])
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# Global stats of this worker process
+worker_stats = WorkerStats()
@@ -0,0 +1,10 @@
+-- Composite indexes for the half-open departure ranges used by the services
+-- (see app/query_helpers.py). Safe to run on a live database.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_flights_route_departure
+    ON flights(route_id, scheduled_departure);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_flights_number_date
+    ON flights(flight_number, scheduled_departure);
+
+ANALYZE flights;
@@ -0,0 +1,51 @@
+-- Per-flight, per-cabin seat counters (see app/seat_inventory.py).
+-- Creates the table and backfills it from booking_segments / flight_seats;
+-- afterwards run `python -m app.seat_inventory` to reconcile any drift.
+
+CREATE TABLE IF NOT EXISTS flight_inventory (
+    flight_id INTEGER REFERENCES flights(id),
+    class_of_service VARCHAR(20) NOT NULL,
+    capacity INTEGER NOT NULL DEFAULT 0,
+    booked INTEGER NOT NULL DEFAULT 0,
+    seats_assigned INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (flight_id, class_of_service)
+);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_booking_segments_flight
+    ON booking_segments(flight_id);
+
+INSERT INTO flight_inventory (flight_id, class_of_service, capacity, booked, seats_assigned)
+SELECT f.id,
+       c.class_of_service,
+       COALESCE(CASE c.class_of_service
+                    WHEN 'economy' THEN t.seats_economy
+                    WHEN 'premium_economy' THEN t.seats_premium_economy
+                    WHEN 'business' THEN t.seats_business
+                    WHEN 'first' THEN t.seats_first
+                END, 0),
+       COALESCE(b.n, 0),
+       COALESCE(s.n, 0)
+FROM flights f
+JOIN aircraft a ON a.id = f.aircraft_id
+JOIN aircraft_types t ON t.id = a.aircraft_type_id
+CROSS JOIN (VALUES ('economy'), ('premium_economy'), ('business'), ('first')) AS c(class_of_service)
+LEFT JOIN (
+    SELECT bs.flight_id, bs.class_of_service, COUNT(*) AS n
+    FROM booking_segments bs
+    JOIN bookings bk ON bk.id = bs.booking_id
+    WHERE COALESCE(bk.status, '') <> 'cancelled'
+    GROUP BY bs.flight_id, bs.class_of_service
+) b ON b.flight_id = f.id AND b.class_of_service = c.class_of_service
+LEFT JOIN (
+    SELECT fs.flight_id, sm.class_of_service, COUNT(*) AS n
+    FROM flight_seats fs
+    JOIN flights f2 ON f2.id = fs.flight_id
+    JOIN aircraft a2 ON a2.id = f2.aircraft_id
+    JOIN seat_maps sm ON sm.aircraft_type_id = a2.aircraft_type_id AND sm.seat_number = fs.seat_number
+    WHERE fs.status = 'occupied'
+    GROUP BY fs.flight_id, sm.class_of_service
+) s ON s.flight_id = f.id AND s.class_of_service = c.class_of_service
+ON CONFLICT (flight_id, class_of_service) DO NOTHING;
+
+ANALYZE flight_inventory;
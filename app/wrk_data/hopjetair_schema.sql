@@ -175,6 +175,17 @@ CREATE TABLE flight_seats (
     UNIQUE(flight_id, seat_number)
 );
 
+-- Seat counters per flight and cabin (maintained by the booking and seat paths)
+CREATE TABLE flight_inventory (
+    flight_id INTEGER REFERENCES flights(id),
+    class_of_service VARCHAR(20) NOT NULL,
+    capacity INTEGER NOT NULL DEFAULT 0,
+    booked INTEGER NOT NULL DEFAULT 0,
+    seats_assigned INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (flight_id, class_of_service)
+);
+
 -- Baggage
 CREATE TABLE baggage (
     id SERIAL PRIMARY KEY,
@@ -332,10 +343,12 @@ CREATE INDEX idx_bookings_reference ON bookings(booking_reference);
 CREATE INDEX idx_bookings_passenger ON bookings(passenger_id);
 CREATE INDEX idx_flights_number_date ON flights(flight_number, scheduled_departure);
 CREATE INDEX idx_flights_route ON flights(route_id);
+CREATE INDEX idx_flights_route_departure ON flights(route_id, scheduled_departure);
 CREATE INDEX idx_passengers_email ON passengers(email);
 CREATE INDEX idx_trip_bookings_reference ON trip_bookings(booking_reference);
 CREATE INDEX idx_excursion_bookings_reference ON excursion_bookings(booking_reference);
 CREATE INDEX idx_booking_segments_booking ON booking_segments(booking_id);
+CREATE INDEX idx_booking_segments_flight ON booking_segments(flight_id);
 CREATE INDEX idx_flight_seats_flight ON flight_seats(flight_id);
 CREATE INDEX idx_insurance_policies_booking ON insurance_policies(booking_id);
 
@@ -0,0 +1,77 @@
+"""
+Import-time budget for the API service
+
+Imports app.main in a fresh interpreter with no database or AWS settings
+(python -X importtime), prints the slowest modules and fails when
+  - the import raises (the module must be importable offline),
+  - the cumulative import time of app.main exceeds IMPORT_TIME_BUDGET_MS, or
+  - a module that should load lazily (boto3, botocore) was imported.
+
+Run from the repository root:
+    python app/wrk_data/import_time_budget.py
+"""
+
+import os
+import subprocess
+import sys
+
+BUDGET_MS = float(os.getenv("IMPORT_TIME_BUDGET_MS", "2500"))
+RUNS = int(os.getenv("IMPORT_TIME_RUNS", "3"))
+LAZY_MODULES = ("boto3", "botocore")
+TOP = 10
+
+PROBE = (
+    "import sys; import app.main; "
+    f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+)
+
+
+def measure(repo_root):
+    # Only what the interpreter needs: no DB_*, AWS_* or credential files
+    env = {key: os.environ[key] for key in ("PATH", "HOME", "SYSTEMROOT") if key in os.environ}
+    env["PYTHONPATH"] = repo_root
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE],
+        cwd=repo_root, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        print(proc.stderr[-3000:])
+        raise SystemExit("FAIL: app.main cannot be imported without database/AWS settings")
+
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line.split(":", 1)[1].split("|")]
+        modules[name] = (int(self_us), int(cumulative_us))
+    leaked = [m for m in proc.stdout.strip().split(",") if m]
+    return modules, leaked
+
+
+def main():
+    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+    totals, leaked, modules = [], [], {}
+    for _ in range(RUNS):
+        modules, leaked = measure(repo_root)
+        totals.append(modules["app.main"][1] / 1000)
+
+    best = min(totals)
+    print(f"app.main import: best {best:.0f} ms of {RUNS} runs ({', '.join(f'{t:.0f}' for t in totals)}), budget {BUDGET_MS:.0f} ms")
+    print("slowest modules (self time, last run):")
+    for name, (self_us, cumulative_us) in sorted(modules.items(), key=lambda item: -item[1][0])[:TOP]:
+        print(f"  {self_us / 1000:8.1f} ms  {cumulative_us / 1000:8.1f} ms cumulative  {name}")
+
+    failed = False
+    if leaked:
+        print(f"FAIL: imported at startup but should be lazy: {', '.join(leaked)}")
+        failed = True
+    if best > BUDGET_MS:
+        print(f"FAIL: import time {best:.0f} ms is over the {BUDGET_MS:.0f} ms budget")
+        failed = True
+    if failed:
+        raise SystemExit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Benchmark: statements rebuilt per call vs the pre-built registry (app/statements.py)
+
+Runs the booking-by-reference and passenger-by-email lookups through an ORM
+session on an in-memory SQLite copy of the two tables, so the numbers are the
+Python CPU spent per lookup (statement construction, cache-key generation,
+compiled-cache lookup, result processing) without a network round trip:
+    inline   - select(Booking).where(Booking.booking_reference == ref), as the services used to
+    registry - statements.BOOKING_BY_REFERENCE with booking_ref bound at execute
+
+Usage (from the repository root):
+    python app/wrk_data/statement_cache_benchmark.py [runs]
+"""
+
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from app import statements
+from app.database_models import Booking, Passenger
+
+RUNS = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+REPEATS = 5
+
+
+def setup():
+    engine = create_engine("sqlite://")
+    Passenger.__table__.create(engine)
+    Booking.__table__.create(engine)
+    session = Session(engine)
+    passenger = Passenger(first_name="John", last_name="Doe", email="john.doe@example.com")
+    session.add(passenger)
+    session.flush()
+    session.add(Booking(booking_reference="ABC123", passenger_id=passenger.id, status="confirmed"))
+    session.commit()
+    return session
+
+
+LOOKUPS = {
+    "booking by reference": {
+        "inline": lambda s, v: s.execute(select(Booking).where(Booking.booking_reference == v)).scalars().first(),
+        "registry": lambda s, v: s.execute(statements.BOOKING_BY_REFERENCE, {"booking_ref": v}).scalars().first(),
+        "value": "ABC123",
+    },
+    "passenger by email": {
+        "inline": lambda s, v: s.execute(select(Passenger).where(Passenger.email == v)).scalars().first(),
+        "registry": lambda s, v: s.execute(statements.PASSENGER_BY_EMAIL, {"email": v}).scalars().first(),
+        "value": "john.doe@example.com",
+    },
+}
+
+
+def cpu_us_per_call(session, run, value):
+    for _ in range(200):  # warm the compiled cache
+        run(session, value)
+    samples = []
+    for _ in range(REPEATS):
+        start = time.process_time()
+        for _ in range(RUNS):
+            run(session, value)
+        samples.append((time.process_time() - start) / RUNS * 1e6)
+    return statistics.median(samples)
+
+
+def main():
+    session = setup()
+    print(f"{RUNS:,} calls x {REPEATS} repeats, median CPU time per call")
+    for name, lookup in LOOKUPS.items():
+        assert lookup["inline"](session, lookup["value"]) is not None
+        inline = cpu_us_per_call(session, lookup["inline"], lookup["value"])
+        registry = cpu_us_per_call(session, lookup["registry"], lookup["value"])
+        print(f"  {name:22s} inline {inline:7.1f} us   registry {registry:7.1f} us   "
+              f"saved {inline - registry:5.1f} us ({(inline - registry) / inline:.0%})")
+
+
+if __name__ == "__main__":
+    main()